@@ -23,6 +23,10 @@ from anasymod.enums import ConfigSections, FPGASimCtrl
 from anasymod.utils import statpro
 from anasymod.util import expand_path
 from anasymod.wave import ConvertWaveform
+from anasymod.utils.probe_data import StepView, stack_runs
+from anasymod.utils.probe_cache import ProbeCache
+from anasymod.utils.run_registry import RunRegistry
+from anasymod.utils.resample import resample, iter_resample
 from anasymod.plugins import Plugin
 from typing import Union
 from importlib import import_module
@@ -99,6 +103,14 @@ class Analysis():
         # Initialize project config
         self._prj_cfg = EmuConfig(root=self.args.input, cfg_file=self.cfg_file, active_target=self.args.active_target, build_root=build_root)
 
+        # Initialize probe cache shared by the probe objects of all targets
+        self.probe_cache = ProbeCache(max_bytes=self._prj_cfg.cfg.probe_cache_size)
+
+        # Initialize registry of stored simulation and emulation runs; it is located outside of the target-specific
+        # build dirs, which are cleaned before each simulation
+        self.runs = RunRegistry(root=os.path.join(self._prj_cfg.build_root_base, 'runs'),
+                                max_runs=self._prj_cfg.cfg.max_runs)
+
         # Initialize Plugins
         self._plugins = []
         for plugin in self._prj_cfg.cfg.plugins:
@@ -356,8 +368,8 @@ class Analysis():
         target = getattr(self, self.act_fpga_target)
 
         # create sim result folders
-        if not os.path.exists(os.path.dirname(target.cfg.vcd_path)):
-            mkdir_p(os.path.dirname(target.cfg.vcd_path))
+        if not os.path.exists(os.path.dirname(target.result_path)):
+            mkdir_p(os.path.dirname(target.result_path))
 
         if not os.path.exists(os.path.dirname(target.result_path_raw)):
             mkdir_p(os.path.dirname(target.result_path_raw))
@@ -382,11 +394,13 @@ class Analysis():
 
         statpro.statpro_update(statpro.FEATURES.anasymod_post_vivado)
 
-    def emulate(self, server_addr=None, convert_waveform=True):
+    def emulate(self, server_addr=None, convert_waveform=True, params=None):
         """
         Program bitstream to FPGA and run simulation/emulation on FPGA
 
         :param server_addr: Address of Vivado hardware server used for communication to FPGA board
+        :param params: dict of parameters describing this run, e.g. the sweep point, stored in the run registry
+        :return: id of the run in the run registry, None if the results were not stored
         """
 
         if server_addr is None:
@@ -402,8 +416,8 @@ class Analysis():
             raise Exception(f'Bitstream for active FPGA target was not generated beforehand; please do so before running emulation.')
 
         # create sim result folders
-        if not os.path.exists(os.path.dirname(target.cfg.vcd_path)):
-            mkdir_p(os.path.dirname(target.cfg.vcd_path))
+        if not os.path.exists(os.path.dirname(target.result_path)):
+            mkdir_p(os.path.dirname(target.result_path))
 
         if not os.path.exists(os.path.dirname(target.result_path_raw)):
             mkdir_p(os.path.dirname(target.result_path_raw))
@@ -422,11 +436,14 @@ class Analysis():
             ConvertWaveform(
                 result_path_raw=target.result_path_raw,
                 result_type_raw=target.cfg.result_type_raw,
-                result_path=target.cfg.vcd_path,
+                result_path=target.result_path,
                 str_cfg=target.str_cfg,
                 float_type=self.float_type,
-                dt_scale=self._prj_cfg.cfg.dt_scale
+                dt_scale=self._prj_cfg.cfg.dt_scale,
+                processes=self._prj_cfg.cfg.vcd_processes,
+                writer=self._prj_cfg.cfg.vcd_writer
             )
+            return self._store_run(target=target, kind='emulate', params=params)
 
     def launch(self, server_addr=None, debug=False):
         """
@@ -449,8 +466,8 @@ class Analysis():
             raise Exception(f'Bitstream for active FPGA target was not generated beforehand; please do so before running emulation.')
 
         # create sim result folders
-        if not os.path.exists(os.path.dirname(target.cfg.vcd_path)):
-            mkdir_p(os.path.dirname(target.cfg.vcd_path))
+        if not os.path.exists(os.path.dirname(target.result_path)):
+            mkdir_p(os.path.dirname(target.result_path))
 
         if not os.path.exists(os.path.dirname(target.result_path_raw)):
             mkdir_p(os.path.dirname(target.result_path_raw))
@@ -462,11 +479,14 @@ class Analysis():
         # Return ctrl handle for interactive control
         return ctrl_handle
 
-    def simulate(self, unit=None, id=None, convert_waveform=True, flags=None):
+    def simulate(self, unit=None, id=None, convert_waveform=True, flags=None, params=None):
         """
         Run simulation on a pc target.  'flags' contains a list of simulator-specific
         flags, as a sort of escape hatch for features that are not yet supported
         natively through anasymod.
+
+        :param params: dict of parameters describing this run, e.g. the sweep point, stored in the run registry
+        :return: id of the run in the run registry, None if the results were not stored
         """
         # Remove target-specific build dir to make sure there are no old files.
         # However, don't fail when certain files can't be removed, because that
@@ -478,8 +498,8 @@ class Analysis():
         target = getattr(self, self.act_cpu_target)
 
         # create sim result folder
-        if not os.path.exists(os.path.dirname(target.cfg.vcd_path)):
-            mkdir_p(os.path.dirname(target.cfg.vcd_path))
+        if not os.path.exists(os.path.dirname(target.result_path)):
+            mkdir_p(os.path.dirname(target.result_path))
 
         if not os.path.exists(os.path.dirname(target.result_path_raw)):
             mkdir_p(os.path.dirname(target.result_path_raw))
@@ -507,54 +527,158 @@ class Analysis():
             ConvertWaveform(
                 result_path_raw=target.result_path_raw,
                 result_type_raw=target.cfg.result_type_raw,
-                result_path=target.cfg.vcd_path,
+                result_path=target.result_path,
                 str_cfg=target.str_cfg,
                 float_type=self.float_type,
                 debug=self._prj_cfg.cfg.cpu_debug_mode,
-                dt_scale=self._prj_cfg.cfg.dt_scale
+                dt_scale=self._prj_cfg.cfg.dt_scale,
+                processes=self._prj_cfg.cfg.vcd_processes,
+                writer=self._prj_cfg.cfg.vcd_writer
             )
+            return self._store_run(target=target, kind='simulate', params=params)
 
-    def probe(self, name, emu_time=False):
+    def probe(self, name, emu_time=False, t_start=None, t_stop=None, interpolate=False, run=None, max_points=None,
+              method='minmax'):
         """
-        Probe specified signal. Signal will be stored in a numpy array.
+        Probe specified signal. Signal will be stored in a ProbeData object, which holds typed numpy arrays for
+        time, value and X/Z state of each sample. If a list of signals is given, all of them are read in one pass and
+        a dict mapping each name to its ProbeData object is returned.
+
+        :param name: full hierarchical name of the signal, or list of names
+        :param emu_time: use emulation time instead of cycle counts as time basis
+        :param t_start: only return the waveform from this cycle count on, start of the run if None
+        :param t_stop: only return the waveform up to this cycle count, end of the run if None
+        :param interpolate: with emu_time, interpolate the emulation time of each sample linearly between the samples
+            of the time probe instead of using the time of the next time probe sample
+        :param run: id of a run stored in the run registry, None for the results of the last run. For a list of run
+            ids or 'all' for all stored runs of the active target, the runs are loaded in parallel and a dict mapping
+            each run id to the probed data is returned, see stack_runs to combine them into 2d arrays.
+        :param max_points: if given, decimate the waveform to at most this many samples, e.g. for plotting. The
+            decimation is computed from the cached full-resolution waveform, zooming in via t_start and t_stop is
+            served from a multiresolution summary kept in the probe cache.
+        :param method: decimation method, 'minmax' keeps the minimum and maximum sample of each bucket, 'lttb' uses
+            Largest-Triangle-Three-Buckets decimation
         """
 
-        probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
-        return probeobj._probe(name=name, emu_time=emu_time)
+        target = getattr(self, self.args.active_target)
+        probeobj = self._setup_probeobj(target=target)
+        if run == 'all' or isinstance(run, (list, tuple)):
+            run_nums = [r.id for r in self.runs.runs(target=target._name)] if run == 'all' else run
+            return probeobj._probe_runs(name=name, run_nums=run_nums, emu_time=emu_time, t_start=t_start,
+                                        t_stop=t_stop, interpolate=interpolate, max_points=max_points,
+                                        method=method)
+        if max_points is not None:
+            return probeobj._decimate(name=name, max_points=max_points, method=method, emu_time=emu_time,
+                                      t_start=t_start, t_stop=t_stop, interpolate=interpolate, run_num=run)
+        return probeobj._probe(name=name, emu_time=emu_time, t_start=t_start, t_stop=t_stop, interpolate=interpolate,
+                               run_num=run)
+
+    def resample(self, names, dt, t_start=None, t_stop=None, emu_time=False, interpolate=False, method='zoh',
+                 run=None, chunk_size=None):
+        """
+        Resample event-based probe data of one or several signals onto a shared uniform time grid, e.g. for FFTs,
+        eye diagrams or correlations.
+
+        :param names: full hierarchical name of the signal, or list of names
+        :param dt: time step of the grid, in seconds with emu_time, otherwise in cycle counts
+        :param t_start: first grid point, by default the latest first sample of all signals
+        :param t_stop: last grid point, by default the latest last sample of all signals
+        :param emu_time: use emulation time instead of cycle counts as time basis
+        :param interpolate: with emu_time, interpolate the emulation time of each sample linearly between the samples
+            of the time probe
+        :param method: 'zoh' for zero-order hold or 'linear' for linear interpolation between samples
+        :param run: id of a run stored in the run registry, None for the results of the last run
+        :param chunk_size: if given, return an iterator over chunks of at most this many grid points instead, so
+            grids that do not fit into memory can be processed chunk by chunk
+
+        :return: dict mapping each name to a ProbeData object on the grid, all sharing the same time array, or an
+            iterator over such dicts for each chunk
+        """
+        waves = self.probe(name=[names] if isinstance(names, str) else list(names), emu_time=emu_time,
+                           interpolate=interpolate, run=run)
+        if chunk_size is not None:
+            return iter_resample(waves, dt, t_start=t_start, t_stop=t_stop, method=method, chunk_size=chunk_size)
+        return resample(waves, dt, t_start=t_start, t_stop=t_stop, method=method)
 
-    def probes(self):
+    def probes(self, run=None):
         """
         Display all signals that were stored for specified target run (simulation or emulation)
+        :param run: id of a run stored in the run registry, None for the results of the last run
         :return: list of signal names
         """
 
         probeobj = self._setup_probeobj(target=getattr(self, self.args.active_target))
-        return probeobj._probes()
+        return probeobj._probes(run_num=run)
+
+    def _store_run(self, target, kind, params=None):
+        """
+        Store the converted results of a target in the run registry, if enabled in the project config.
+
+        :return: id of the run, None if the results were not stored
+        """
+        if not self._prj_cfg.cfg.store_runs:
+            return None
+        stored = self.runs.runs()
+        run = self.runs.record(target=target._name, kind=kind, result_path=target.result_path, params=params)
+        print(f'Stored results of {kind} run as run {run.id}.')
+
+        # drop waveforms of runs removed to keep at most max_runs runs
+        kept = {r.id for r in self.runs.runs()}
+        for old_run in stored:
+            if old_run.id not in kept:
+                self._discard_run(old_run)
+        return run.id
+
+    def remove_run(self, run):
+        """
+        Delete a run from the run registry, together with its waveforms held in the probe cache.
 
-    def preserve(self, wave):
+        :param run: id of the run in the run registry
+        """
+        stored_run = self.runs.get(run)
+        self.runs.remove(run)
+        self._discard_run(stored_run)
+
+    def _discard_run(self, run):
+        """
+        Remove all data of a run that is no longer stored in the run registry from the probe cache and close its
+        result file handles.
+
+        :param run: Run object of the removed run
+        """
+        self.probe_cache.discard(run=run.id)
+        target = getattr(self, run.target, None)
+        for probeobj in getattr(target, 'probes', {}).values():
+            probeobj.discardloadedsimdatafile(run.id, check_loaded=False)
+
+    def preserve(self, wave, view=False):
         """
         This function preserve the stepping of the waveform 'wave'. This is necessary, if limit checks should be
-        conducted on the waveform later on.
+        conducted on the waveform later on. For each value change, a sample holding the previous value is inserted at
+        the time of the change.
 
-        :param wave: 2d numpy.ndarray
+        :param wave: ProbeData object as returned by probe, or 2d numpy.ndarray holding time and values
+        :param view: if True, return a StepView of wave instead, which does not copy the samples and supports value
+            lookups at arbitrary times
 
-        :return: 2d numpy.ndarray
+        :return: ProbeData, numpy.asarray converts it to a 2d float array for real signals, or StepView
         """
-        temp_data = None
-        wave_step =[]
+        steps = StepView(wave)
+        return steps if view else steps.materialize()
 
-        for d in wave.transpose():
-            if temp_data is not None:
-                if d[1] != temp_data:
-                    wave_step.append([d[0],temp_data]) #old value with same timestep to preserve stepping
-            wave_step.append(d)
-            temp_data = d[1]
+    def stack_runs(self, waves, dt=None, method='zoh'):
+        """
+        Combine the waveforms of one signal from several runs, as returned by probe for a list of runs, into arrays
+        with one row per run. Without dt, all waveforms need the same number of samples.
 
-        try:
-            #return np.array(wave_step, dtype='float').transpose()
-            return np.array(wave_step, dtype='O').transpose()
-        except:
-            return np.array(wave_step, dtype='O').transpose()
+        :param waves: dict mapping run ids to ProbeData objects
+        :param dt: if given, resample all runs onto a common uniform grid with this time step before stacking, so runs
+            with different value changes can be combined
+        :param method: resampling method, 'zoh' or 'linear', see resample
+
+        :return: run ids, and time, value and xz arrays with a leading run axis
+        """
+        return stack_runs(waves, dt=dt, method=method)
 
     def view(self, result_file=None):
         """
@@ -936,8 +1060,12 @@ class Analysis():
 
         #ToDo: In future it should be also possible to instantiate different probe objects, depending on data format that shall be read in
         if target_name not in target.probes.keys():
-            from anasymod.probe import ProbeVCD
-            target.probes[target_name] = ProbeVCD(target=target)
+            if self._prj_cfg.cfg.wave_format == 'fst':
+                from anasymod.probe import ProbeFST
+                target.probes[target_name] = ProbeFST(target=target, cache=self.probe_cache, runs=self.runs)
+            else:
+                from anasymod.probe import ProbeVCD
+                target.probes[target_name] = ProbeVCD(target=target, cache=self.probe_cache, runs=self.runs)
 
         return target.probes[target_name]
 
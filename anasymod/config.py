@@ -386,6 +386,17 @@ class Config(BaseConfig):
         """ type(float) : jtag communication frequency in Hz. This impacts the frequency used for programming the 
             bitstream onto the FPGA, a value that is set too high might cause stability issues. """
 
+        self.tcl_ctrl_server = True
+        """ type(bool) : If True, interactive control commands are sent to the Vivado TCL interpreter via a socket
+            server that is sourced into the interpreter at startup and reports results and errors explicitly. If False,
+            commands are typed into the TCL console and its output is scanned for the prompt and error strings. """
+
+        self.uart_protocol = None
+        """ type(str) : Protocol used for control via UART. 'binary' sends framed, CRC protected requests, that can
+            access several registers at once, see anasymod.sim_ctrl.uart_protocol. 'ascii' sends one text command per
+            register access, e.g. SET_<name> <value>, which may be used by custom firmware. If None, 'ascii' is used
+            for targets with custom_zynq_firmware and 'binary' for the generated firmware. """
+
         self.plugins = ['msdsl']
         """ type(list(str)) : list of plugins that shall be used in the scope of this project. """
 
@@ -447,6 +458,41 @@ class Config(BaseConfig):
         self.probe_to_file = False
         """ type(bool) : If True, all probes specified will be dumped to a file <probe_name>.out in the 'raw_results' folder. """
 
+        self.vcd_cache = True
+        """ type(bool) : If True, signals parsed from a VCD result file are stored in a binary cache directory
+            <vcd_path>.cache next to the VCD file. Subsequent probe calls, also from other Python sessions, load the
+            signals from there instead of parsing the VCD file again, as long as the VCD file was not modified. A
+            modification is detected by the size, the modification time and a hash of blocks sampled across the file,
+            see VCDCache. Set to False, if large result files are rewritten with the same size faster than the
+            resolution of the file system's modification time. """
+
+        self.vcd_processes = 1
+        """ type(int) : Number of worker processes used to decode VCD result files. The VCD body is split at timestamp
+            boundaries and the parts are decoded in parallel, 0 selects the number of available CPU cores. """
+
+        self.store_runs = False
+        """ type(bool) : If True, the converted result file of each simulate and emulate call is copied under a run id
+            into the directory 'runs' of the build root, together with the run parameters. Stored runs can be probed
+            later on via the run argument of probe, e.g. to analyze parameter sweeps. """
+
+        self.max_runs = 20
+        """ type(int) : Maximum number of runs kept in the run registry if store_runs is enabled, the oldest runs and
+            their result files are deleted once a new run exceeds this limit. None keeps all runs. """
+
+        self.probe_cache_size = 1024 * 1024 * 1024
+        """ type(int) : Maximum number of bytes of probed waveforms kept in memory by the probe cache, which is shared by
+            all targets and runs of an Analysis object. Least recently used waveforms are evicted once the budget is
+            exceeded, 0 disables caching and None removes the limit. """
+
+        self.vcd_writer = 'fast'
+        """ type(str) : VCD writer used to convert result files. 'fast' collects the value changes of all signals
+            and writes them in large chunks, 'pyvcd' writes each value change separately using pyvcd. """
+
+        self.wave_format = 'vcd'
+        """ type(str) : Format of converted result files, either 'vcd' or 'fst'. FST is GTKWave's compressed and
+            block-indexed waveform format, which loads much faster in GTKWave. FST files are stored at the target's
+            fst_path and are written and read natively via the fstapi bindings of the pylibfst package. """
+
 def find_tool(name, hints=None, sys_path_hint=True):
     # set defaults
     if hints is None:
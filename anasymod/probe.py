@@ -2,23 +2,43 @@
 import numpy as np
 import os
 import csv
+from multiprocessing.pool import ThreadPool
 from typing import Union
 
 # anasymod imports
 from anasymod.targets import CPUTarget, FPGATarget
-from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.VCD_parser import ParseVCD, FOLLOW_POLL_INTERVAL
+from anasymod.utils.compression import COMPRESSED_EXTENSIONS
+from anasymod.utils.decimate import MinMaxPyramid, lttb_indices, DECIMATION_METHODS
+from anasymod.utils.fst import ParseFST, is_fst
+from anasymod.utils.probe_data import ProbeData
+from anasymod.utils.probe_cache import ProbeCache
+from anasymod.utils.run_registry import RunRegistry
 
 
 class Probe():
     """
     Base class for simulation data access API
     """
-    def __init__(self, target: Union[CPUTarget, FPGATarget]):
+    def __init__(self, target: Union[CPUTarget, FPGATarget], cache: ProbeCache = None, runs: RunRegistry = None):
         """
         Constructor
+
+        :param target: target whose results are accessed
+        :param cache: probe cache shared with other Probe objects, a new one with the budget set in the project
+            config is created if None
+        :param runs: registry of stored runs, whose results can be accessed via their run id
         """
         self.handle = None
         self.target = target
+        self.runs = runs
+
+        self.cache = cache if cache is not None else ProbeCache(max_bytes=target.prj_cfg.cfg.probe_cache_size)
+        """ :type : ProbeCache"""
+
+        # modification time of the result file of each run, at the time its data was first stored in the cache
+        self._loaded_runs = {}
+        """ :type : dict[int, float]"""
 
         #self.__ref_analysis = weakref.proxy(ref_analysis)
         #if False:
@@ -41,7 +61,7 @@ class Probe():
     def __del__(self):
         self.discardloadedsimdatafiles()
 
-    def _probe(self, name, emu_time, cache=True):
+    def _probe(self, name, emu_time, cache=True, t_start=None, t_stop=None, interpolate=False, run_num=None):
         """
         Access probed waveform trace(s)
 
@@ -51,6 +71,14 @@ class Probe():
         :param cache: Cache probe data so subsequent calls for same data don't create
             more copies or trigger a SIMetrix data group load
         :type cache: bool
+        :param t_start: only return the waveform from this cycle count on, start of the simulation if None
+        :type t_start: int
+        :param t_stop: only return the waveform up to this cycle count, end of the simulation if None
+        :type t_stop: int
+        :param interpolate: interpolate emulation time linearly between the samples of the time probe
+        :type interpolate: bool
+        :param run_num: id of a run stored in the run registry, None for the results of the last run
+        :type run_num: int
 
         :return: probed data for specified probe.
         :rtype: numpy.array
@@ -58,7 +86,86 @@ class Probe():
 
         raise NotImplementedError()
 
-    def _probes(self):
+    def _probe_runs(self, name, run_nums, **kwargs):
+        """
+        Access probed waveform trace(s) of several runs. Results of the runs are loaded in parallel threads, each
+        one only if it is not cached yet.
+
+        :param name: name of probe, or list of names, see _probe
+        :param run_nums: list of run ids
+        :param kwargs: further arguments of _probe, or of _decimate if max_points is given
+        :return: probed data of each run
+        :rtype: dict[int, numpy.array]
+        """
+        run_nums = list(run_nums)
+        probe = self._probe
+        if kwargs.get('max_points') is not None:
+            probe = self._decimate
+        else:
+            kwargs.pop('max_points', None)
+            kwargs.pop('method', None)
+        if len(run_nums) <= 1:
+            return {run_num: probe(name, run_num=run_num, **kwargs) for run_num in run_nums}
+
+        tp = ThreadPool(min(len(run_nums), os.cpu_count() or 1))
+        try:
+            results = tp.map(lambda run_num: probe(name, run_num=run_num, **kwargs), run_nums)
+        finally:
+            tp.close()
+            tp.join()
+        return dict(zip(run_nums, results))
+
+    def _decimate(self, name, max_points, method='minmax', emu_time=False, cache=True, t_start=None, t_stop=None,
+                  interpolate=False, run_num=None):
+        """
+        Access a decimated version of probed waveform trace(s) with at most max_points samples, e.g. for plotting
+        waveforms with millions of samples. Decimations are computed from the full-resolution waveforms in the probe
+        cache. For min/max decimation, a multiresolution pyramid of each waveform is kept in the cache as well, so
+        further decimations, e.g. of other windows while zooming, only evaluate a few hundred buckets.
+
+        :param name: name of probe, or list of names
+        :param max_points: maximum number of samples of each returned waveform
+        :param method: 'minmax' to keep the minimum and maximum sample of each bucket, which preserves spikes, or
+            'lttb' for Largest-Triangle-Three-Buckets decimation, which preserves the visual shape with fewer points
+        :param emu_time: use emulation time instead of cycle counts as time basis
+        :param t_start: only decimate the waveform from this cycle count on, start of the simulation if None
+        :param t_stop: only decimate the waveform up to this cycle count, end of the simulation if None
+        :param interpolate: interpolate emulation time linearly between the samples of the time probe
+        :param run_num: id of a run stored in the run registry, None for the results of the last run
+
+        :return: decimated data for a single name, dict mapping each name to its decimated data for a list of names
+        """
+        if method not in DECIMATION_METHODS:
+            raise Exception(f'Decimation method {method} is not supported, use one of: {DECIMATION_METHODS}')
+        names = [name] if isinstance(name, str) else list(name)
+        full = self._probe(names, emu_time=False, cache=cache, run_num=run_num)
+        waves = self._probe(names, emu_time=True, cache=cache, interpolate=interpolate,
+                            run_num=run_num) if emu_time else full
+        target_name = self.target._name
+        results = {}
+        for n in names:
+            wave = waves[n]
+            cycles = full[n][0] if isinstance(full[n], ProbeData) else np.arange(len(full[n]))
+            # the window starts with the sample that holds the value at t_start
+            lo = 0 if t_start is None else max(int(np.searchsorted(cycles, t_start, side='right')) - 1, 0)
+            hi = len(cycles) if t_stop is None else int(np.searchsorted(cycles, t_stop, side='right'))
+            values = wave.value if isinstance(wave, ProbeData) else wave
+
+            if method == 'minmax':
+                pyramid = self.cache.get(target_name, run_num, n, variant='pyramid') if cache else None
+                if pyramid is None:
+                    pyramid = MinMaxPyramid(values)
+                    if cache:
+                        self.cache.put(target_name, run_num, n, pyramid, variant='pyramid')
+                idx = pyramid.indices(values, max_points, lo=lo, hi=hi)
+            else:
+                times = wave.time if isinstance(wave, ProbeData) else cycles
+                idx = lttb_indices(times, values, max_points, lo=lo, hi=hi)
+
+            results[n] = wave.take(idx) if isinstance(wave, ProbeData) else wave[idx]
+        return results[name] if isinstance(name, str) else results
+
+    def _probes(self, run_num=None):
         """
         Get list of names probe waveforms for data group/ run
         :rtype: list[str]
@@ -71,47 +178,90 @@ class Probe():
 
     def discardloadedsimdatafile(self, run_num, check_loaded=True):
         """
-        Discard probe data group from SIMetrix
+        Discard probe data of a run from the probe cache
 
-        Normally a probed Data group accessed via probe is kept loaded in SIMetrix
-        memory to avoid having to (expensively) reload it if further probed data vectors
-        are accessed.  Calling this forces it to be unloaded from SIMetrix free-ing up
-        memory.  Of course a follow-in accesses will be slow/expensive as data group
-        needs to be reloaded.
+        Normally probed data is kept in the probe cache to avoid having to (expensively) decode the result file
+        again if further probed data vectors are accessed. Calling this forces it to be removed from the cache,
+        free-ing up memory. Of course a follow-in accesses will be slow/expensive as the result file needs to be
+        decoded again.
 
-        :param run_num: Run number in sweep, None for last run
+        :param run_num: Run id in the run registry, None for the results of the last run
         :type run_num: int
-        :param check_loaded: Check group is actually loaded in SIMetrix, do nothing if it is not
+        :param check_loaded: Check data of the run is actually cached, do nothing if it is not
         :type check_loaded: bool
         """
-        raise NotImplementedError()
+        if check_loaded and run_num not in self._loaded_runs:
+            return
+        self.cache.discard(target=self.target._name, run=run_num)
+        self._loaded_runs.pop(run_num, None)
 
     def discardloadedsimdatafiles(self):
         """
-        discard all   data groups currently loaded into SIMetrix
+        discard all probe data of this target currently held in the probe cache
         """
-        # print("DISCARD...")
-        raise NotImplementedError()
+        self.cache.discard(target=self.target._name)
+        self._loaded_runs = {}
 
     def refreshLoadedDataGroups(self):
         """
-        Update local view of probe data groups currently loaded in SIMetrix
+        Update local view of probe data currently held in the probe cache
 
-        Refresh  table of data groups loaded into SIMetrix from
-        SIMetrix internal list.  Used to re-sync if
-        activity in SIMetrox may have caused data groups loaded to change.
+        Probe data of runs whose result file was modified since it was cached, e.g. by a new simulation run, is
+        discarded, so that subsequent probe calls decode the new results.
+
+        :return: runs with data in the probe cache
+        :rtype: list[int]
+        """
+        for run_num, mtime in list(self._loaded_runs.items()):
+            if self._result_mtime(run_num) != mtime:
+                self.discardloadedsimdatafile(run_num, check_loaded=False)
+        return self.cache.runs(self.target._name)
+
+    def _note_loaded(self, run_num):
         """
+        Record the modification time of the result file of a run, when its data is stored in the probe cache.
+        """
+        if run_num not in self._loaded_runs:
+            self._loaded_runs[run_num] = self._result_mtime(run_num)
+
+    def _result_mtime(self, run_num):
+        try:
+            return os.path.getmtime(self.path_for_sim_result_file(run_num))
+        except Exception:
+            return None
+
+    def path_for_sim_result_file(self, run_num=None):
         raise NotImplementedError()
 
+    def _run_result_file(self, run_num):
+        """
+        :return: path to the result file of a run stored in the run registry
+        :rtype: str
+        """
+        if self.runs is None:
+            raise Exception(f'No run registry available; cannot read results of run {run_num}!')
+        run = self.runs.get(run_num)
+        if run.target != self.target._name:
+            raise Exception(f'Run {run_num} belongs to target {run.target}, not to target {self.target._name}!')
+        return run.result_path
+
     def _compress(self, wave=np.ndarray):
-        """Compresses redundant data from 2d numpy array"""
-        raise NotImplementedError()
+        """
+        Compresses redundant data from 2d numpy array or ProbeData object: samples that repeat the value of their
+        predecessor are dropped, the first and last sample are always kept
 
-    def parse_emu_time(self, data, emu_time):
+        :rtype: ProbeData
+        """
+        if not isinstance(wave, ProbeData):
+            wave = ProbeData(np.asarray(wave[0]), np.asarray(wave[1]))
+        return wave.compress()
+
+    def parse_emu_time(self, data, emu_time, interpolate=False):
         """
 
         :param data:
         :param emu_time:
+        :param interpolate:
         :return:
         """
         raise NotImplementedError()
@@ -121,15 +271,11 @@ class ProbeCSV(Probe):
     API for CSV remote data access
     """
 
-    def __init__(self, target: Union[CPUTarget, FPGATarget]):
+    def __init__(self, target: Union[CPUTarget, FPGATarget], cache: ProbeCache = None, runs: RunRegistry = None):
         """
         Constructor
         """
-        super().__init__(self, target=target)
-
-        # List of dictionaries containing probename-probevalue pairs for each simulation run (one dict per sweep point)
-        self.probe_caches = []
-        """:type : list[dict[str, list[]]]"""
+        super().__init__(target=target, cache=cache, runs=runs)
 
     def __del__(self):
         """
@@ -139,18 +285,19 @@ class ProbeCSV(Probe):
         """
 
     def init_rundata(self):
-        self.probe_caches = [None] * 1 # As of now no sweeps are planned, later the value shall be set to the number of runs
         self._data_valid = True
 
-    def path_for_sim_result_file(self):
+    def path_for_sim_result_file(self, run_num=None):
+        if run_num is not None:
+            return self._run_result_file(run_num)
         return os.path.join(self.target.cfg['result_path_raw'])
 
-    def _probe(self, name, emu_time, cache=True):
+    def _probe(self, name, emu_time, cache=True, t_start=None, t_stop=None, interpolate=False, run_num=None):
         """
         Access csv logfile data for specified run number simulation parameter
 
-        :param name: Column name in csv log, omit/None for all
-        :type name: str
+        :param name: Column name in csv log, or list of names, omit/None for all
+        :type name: str | list[str]
 
         :return: dict for `run_num`only or specified,
             list  for `name`  only specified,
@@ -162,44 +309,45 @@ class ProbeCSV(Probe):
         if not self._data_valid:
             raise LookupError("No data available (no succesful simulation run / dataset reload)")
 
-        run_num = 0
+        if t_start is not None or t_stop is not None:
+            raise NotImplementedError("Time windows are not supported for CSV result files")
 
-        if run_num == 'all':
-            for r in range(len(self.probe_caches)):
-                if self.probe_caches[r] is None:
-                    self.probe_caches[r] = self.fetch_simdata(self.path_for_sim_result_file())
-        else:
-            if self.probe_caches[run_num] is None:
-                self.probe_caches[run_num] = self.fetch_simdata(self.path_for_sim_result_file())
+        columns = self._columns(run_num, cache=cache)
 
-        if run_num == 'all' and name is None:
-            return self.probe_caches
+        if name is None:
+            return columns
 
-        if run_num != 'all' and run_num >= len(self.probe_caches):
-            raise ValueError("Run number must be in range [0 .. %d]" % len(self.probe_caches))
+        if not isinstance(name, str):
+            return {n: self._probe(n, emu_time, cache=cache, run_num=run_num) for n in name}
 
-        if name is not None and run_num != 'all' and name not in self.probe_caches[run_num]:
+        if name not in columns:
             print("No such  name in simulation log: ", name)
-            print("Available names: ", self.probe_caches[run_num].keys())
+            print("Available names: ", columns.keys())
             raise LookupError("Bad probe name " + name)
 
-        if name is None:
-            return self.probe_caches[run_num]
+        return columns[name]
 
-        if run_num == 'all':
-            if name not in self.probe_caches[0]:
-                print("No such  name in simulation log: ", name)
-                print("Available names: ", self.probe_caches[0].keys())
-                raise ValueError("Bad probe name " + name)
-            res = [log[name] for log in self.probe_caches]
-            return res
+    def _columns(self, run_num, cache=True):
+        """
+        Get all columns of the csv log of a run, from the probe cache if possible
 
-        if name not in self.probe_caches[run_num]:
-            print("No such  name in simulation log: ", name)
-            print("Available names: ", self.probe_caches[run_num].keys())
-            raise ValueError("Bad probe name " + name)
+        :rtype: dict[str, numpy.array]
+        """
+        self.refreshLoadedDataGroups()
+        target_name = self.target._name
+        names = self.cache.get(target_name, run_num, None, variant='columns') if cache else None
+        if names is not None:
+            columns = {name: self.cache.get(target_name, run_num, name) for name in names}
+            if all(column is not None for column in columns.values()):
+                return columns
 
-        return self.probe_caches[run_num][name]
+        columns = self.fetch_simdata(self.path_for_sim_result_file(run_num))
+        if cache:
+            self._note_loaded(run_num)
+            for name, column in columns.items():
+                self.cache.put(target_name, run_num, name, column)
+            self.cache.put(target_name, run_num, None, list(columns), variant='columns')
+        return columns
 
     def fetch_simdata(self, csv_logfile):
         """
@@ -220,33 +368,27 @@ class ProbeCSV(Probe):
                     csvdict[name].append(float(value))
         return {name: np.array(value) for name, value in csvdict.items()}
 
-    def _probes(self):
+    def _probes(self, run_num=None):
         """
         Get list of names probe waveforms for specified run
 
+        :param run_num: Run id in the run registry, omit/None for last run
+        :type run_num: int
+
         :rtype:list[str]
         """
 
         if not self._data_valid:
             raise LookupError("No data available (no succesful simulation run / dataset open)")
 
-        run_num = 0
-
-        if self.probe_caches[run_num] is None:
-            self.probe_caches[run_num] = self.fetch_simdata(self.path_for_sim_result_file())
-
-        return self.probe_caches[run_num].keys()
+        return self._columns(run_num).keys()
 
 class ProbeVCD(Probe):
-    def __init__(self, target: Union[CPUTarget, FPGATarget]):
+    def __init__(self, target: Union[CPUTarget, FPGATarget], cache: ProbeCache = None, runs: RunRegistry = None):
         """
         Constructor for VCD reader.
         """
-        super().__init__(target=target)
-
-        # List of dictionaries containing probename-probevalue pairs for each simulation run (one dict per sweep point)
-        self.probe_caches = []
-        """:type : list[dict[str, list[]]]"""
+        super().__init__(target=target, cache=cache, runs=runs)
 
         # VCD file handle
         self.vcd_handle = dict()
@@ -260,133 +402,178 @@ class ProbeVCD(Probe):
 
         Remote Data interface is automatically closed when Api is destructed
         """
-        self.probe_caches = []
-        pass
+        try:
+            self.discardloadedsimdatafiles()
+        except Exception:
+            pass
 
     def init_rundata(self):
-        self.probe_caches = [{} for _ in range(10)] # this needs a fix later, shall be depenent on number of signals that were stored during simulation
         self._data_valid = True
 
-    def parse_emu_time(self, data, emu_time):
-        """
-        Parse Emu_time end returns new vector with emu_time instead of cycle count
-        :param data:
-        :return:
-        """
-        emutime_data = data.copy()
-        emutime_data.setflags(write=True)
-
-        # emu_time vector index
-        t = 0
-        for i in range(int(len(emutime_data[0]))):
-            while emutime_data[0][i] > emu_time[0][t]:
-                t += 1
-                # break while loop, if it reaches the end of the array of emu_time
-                if t >= len(emu_time[0]):
-                    break
-            # break for loop because whole emu_time vector was parsed
-            if t >= len(emu_time[0]):
-                break
-            # if there is a data point with no coresponding emu_time cyclecount, take the last common cycle count value
-            if emutime_data[0][i] < emu_time[0][t]:
-                emutime_data[0][i] = emu_time[1][t]
-            # if cycle count of data and emu_time vector is the same, take the time value
-            else:
-                emutime_data[0][i] = emu_time[1][t]
+    def parse_emu_time(self, data, emu_time, interpolate=False):
+        """
+        Parse Emu_time end returns new vector with emu_time instead of cycle count. Each sample gets the emulation time
+        of the first time probe sample at or after its cycle count, or, with interpolate, the emulation time
+        interpolated linearly between the surrounding time probe samples. Samples after the last time probe sample
+        keep their cycle count.
+
+        :param data: waveform with cycle counts as time basis
+        :type data: ProbeData
+        :param emu_time: waveform of the time probe
+        :type emu_time: ProbeData
+        :param interpolate: interpolate linearly between the samples of the time probe
+        :type interpolate: bool
+        :return: waveform with emulation time in seconds as time basis
+        :rtype: ProbeData
+        """
+        cycles = data.time
+        emu_cycles = emu_time.time
+        emu_seconds = emu_time.value
+        time = cycles.astype(np.float64)
+
+        # index of the first emu_time sample at or after each cycle count
+        idx = np.searchsorted(emu_cycles, cycles, side='left')
+        mapped = idx < len(emu_cycles)
+        if interpolate:
+            time[mapped] = np.interp(cycles[mapped], emu_cycles, emu_seconds)
+        else:
+            time[mapped] = emu_seconds[idx[mapped]]
 
+        emutime_data = ProbeData(time, data.value, data.xz)
         emutime_data.setflags(write=False)
         return emutime_data
 
-    def _probe(self, name, emu_time, cache=True):
+    def _probe(self, name, emu_time, cache=True, t_start=None, t_stop=None, interpolate=False, run_num=None):
         """
-        Access VCD data for specified run number simulation parameter
-        :param name: Column name in csv log, omit/None for all
-        :type name: str
+        Access VCD data for specified run number simulation parameter. Only the value changes of the requested
+        signals are decoded, several signals requested at once are decoded in a single pass over the VCD file.
+        :param name: full hierarchical signal name, or list of names
+        :type name: str | list[str]
         :param emu_time: Use emu_time as time basis or cycle_count
         :type emu_time: bool
-        :param cache:
-        :return: dict for `run_num`only or specified,
-                    list  for `name`  only specified,
-                    numpy.array for specified `run_num` and `name`,
-                    list of dict for run_num='all' specified
-        :rtype: numpy.array | list[numpy.array] | dict[ string : numpy.array]
+        :param cache: store probed data in the probe cache and serve it from there on subsequent calls
+        :param t_start: only return the waveform from this cycle count on, start of the simulation if None. Windowed
+            results are decoded via the timestamp index of the VCD file and are not cached. With emu_time, only the
+            value changes of the time probe within the window and the neighbouring ones are decoded for the mapping.
+        :type t_start: int
+        :param t_stop: only return the waveform up to this cycle count, end of the simulation if None
+        :type t_stop: int
+        :param interpolate: interpolate emulation time linearly between the samples of the time probe. Cached
+            waveforms mapped to emulation time are memoized per probe.
+        :type interpolate: bool
+        :param run_num: id of a run stored in the run registry, None for the results of the last run
+        :type run_num: int
+        :return: ProbeData for a single `name`, dict mapping each name to its ProbeData for a list of names
+        :rtype: ProbeData | dict[ string : ProbeData]
         """
 
-        run_num = 0
-        vcd_handle = self.setup_data_access()
-        try:
-            run_cache = self.probe_caches[run_num]
-        except IndexError:  # If PyVerify single run: run_num may be bigger than len(self.probe_caches)
-            run_cache = []
-            cache = False
-
-        # check if empty run_cache and parse all signals and store in run_cache
-        if len(run_cache) == 0 and cache:
-            run_cache = self.fetch_simdata(vcd_handle, update_data=False)
-            self.probe_caches[run_num] = run_cache
+        vcd_handle = self.setup_data_access(run_num)
+        names = [name] if isinstance(name, str) else list(name)
 
         #check complete name of emu_time_probe
-        matching = [s for s in self._probes() if self.target.str_cfg.time_probe.name in s]
+        matching = [s for s in vcd_handle.list_sigs() if self.target.str_cfg.time_probe.name in s]
         if len(matching) == 1:
             emu_time_probe = matching[0]
         else:
             raise Exception(f'No Time probe was found in vcd file')
 
-        if emu_time_probe not in run_cache:
-            data = self.fetch_simdata(vcd_handle, name=emu_time_probe, update_data=True)
-            print("Emu_time not in cache: " + name)
-            if cache:
-                # Cached - make it read-only to prevent nasty overwriting bugs
-                data.setflags(write=False)
-                run_cache[emu_time_probe] = data
-
-        if name not in run_cache:
-            data = self.fetch_simdata(vcd_handle, name=name)
-            print("Data not in cache: " + name)
+        if t_start is not None or t_stop is not None:
+            window = self.fetch_simdata(vcd_handle, sigs=names, t_start=t_start, t_stop=t_stop)
+            if emu_time:
+                # map cycle counts with the value changes of the time probe around the window, which include all
+                # support points the mapping of the full waveform uses for these cycle counts; the whole time probe
+                # is only used if it is in the probe cache already
+                self.refreshLoadedDataGroups()
+                time_probe = self.cache.get(self.target._name, run_num, emu_time_probe) if cache else None
+                if time_probe is None:
+                    span = vcd_handle.parse_span(t_start=t_start, t_stop=t_stop, sigs=[emu_time_probe])
+                    code = span.names()[emu_time_probe]
+                    time_probe = self._to_probe_data(span.signals[code].nets[0], *span.columns(code))
+            results = {}
+            for n in names:
+                if emu_time and n != emu_time_probe:
+                    results[n] = self.parse_emu_time(data=window[n], emu_time=time_probe, interpolate=interpolate)
+                else:
+                    results[n] = window[n]
+            return results[name] if isinstance(name, str) else results
+
+        # look up all signals in the probe cache and decode the missing ones in one pass
+        self.refreshLoadedDataGroups()
+        target_name = self.target._name
+        needed = list(names)
+        if emu_time and emu_time_probe not in needed:
+            needed.append(emu_time_probe)
+
+        waves = {}
+        for n in needed:
+            data = self.cache.get(target_name, run_num, n) if cache else None
+            if data is not None:
+                print("Data already in cache: " + n)
+                waves[n] = data
+
+        missing = [n for n in needed if n not in waves]
+        if missing:
+            print("Data not in cache: " + ', '.join(missing))
+            fetched = self.fetch_simdata(vcd_handle, sigs=missing, update_data=False)
+            waves.update(fetched)
             if cache:
-                # Cached - make it read-only to prevent nasty overwriting bugs
-                data.setflags(write=False)
-                run_cache[name] = data
-        else:
-            data = run_cache[name]
-            print("Data already in cache: " + name)
+                # Cached data is read-only to prevent nasty overwriting bugs
+                self._note_loaded(run_num)
+                for n, data in fetched.items():
+                    self.cache.put(target_name, run_num, n, data)
+
+        results = {}
+        for n in names:
+            if emu_time and n != emu_time_probe:
+                print("Using emulation time")
+                variant = 'emu_time_interp' if interpolate else 'emu_time'
+                data = self.cache.get(target_name, run_num, n, variant=variant) if cache else None
+                if data is None:
+                    data = self.parse_emu_time(data=waves[n], emu_time=waves[emu_time_probe],
+                                               interpolate=interpolate)
+                    if cache:
+                        self.cache.put(target_name, run_num, n, data, variant=variant)
+                results[n] = data
+            else:
+                print("Using cycle counts as time basis")
+                results[n] = waves[n]
 
-        if emu_time and name != emu_time_probe:
-            print("Using emulation time")
-            emutime_data = self.parse_emu_time(data=data, emu_time=run_cache[emu_time_probe])
-            return emutime_data
-        else:
-            print("Using cycle counts as time basis")
-            return data
+        return results[name] if isinstance(name, str) else results
 
-    def _probes(self):
+    def _probes(self, run_num=None):
         """
         Get list of names probe waveforms for specified run
 
-        :param run_num: Run number in sweep, omit/None for last run, 'all' for all runs
+        :param run_num: Run id in the run registry, omit/None for last run
         :type run_num: int
 
         :rtype:list[str]
         """
-        vcd_handle = self.setup_data_access()
+        vcd_handle = self.setup_data_access(run_num)
         return vcd_handle.list_sigs()
 
     def discardloadedsimdatafiles(self):
         """
-
+        discard all probe data of this target currently held in the probe cache and close the VCD file handles
         """
-        for key in self.vcd_handle.keys():
-            vcd_handle = self.vcd_handle[key]
-            try:
-                del vcd_handle
-                del self.probe_caches
-            except:
-                pass
+        super().discardloadedsimdatafiles()
         self.vcd_handle = dict()
 
-    def setup_data_access(self):
+    def discardloadedsimdatafile(self, run_num, check_loaded=True):
+        """
+        Discard probe data of a run from the probe cache, see Probe.discardloadedsimdatafile, and close the VCD file
+        handle of the run
+        """
+        super().discardloadedsimdatafile(run_num, check_loaded=check_loaded)
+        self.vcd_handle.pop(self._handle_name(run_num), None)
+
+    def _handle_name(self, run_num=None):
+        return "_".join([self.target._name] + ([f'run{run_num}'] if run_num is not None else []))
+
+    def setup_data_access(self, run_num=None):
         """
-        :rtype: ParseVCD
+        :param run_num: Run id in the run registry, omit/None for last run
+        :rtype: ParseVCD | ParseFST
         """
         if not self._data_valid:
             raise ValueError("No data available (no succesful simulation run / dataset reload)")
@@ -399,70 +586,138 @@ class ProbeVCD(Probe):
         #        "Specified Simulator is not valid. Valid simulators are: {0}; given simulator was: {1}".format(
         #            enums.SimulatorType, simulator))
 
-        vcd_handle = "_".join([self.target._name])
-        vcd_file_name = self.path_for_sim_result_file()
+        vcd_handle = self._handle_name(run_num)
+        vcd_file_name = self.path_for_sim_result_file(run_num)
         if vcd_handle not in self.vcd_handle.keys():
-            self.vcd_handle[vcd_handle] = ParseVCD(vcd_file_name)
+            if is_fst(vcd_file_name):
+                self.vcd_handle[vcd_handle] = ParseFST(vcd_file_name)
+            else:
+                self.vcd_handle[vcd_handle] = ParseVCD(vcd_file_name, cache=self.target.prj_cfg.cfg.vcd_cache,
+                                                       processes=self.target.prj_cfg.cfg.vcd_processes)
         vcd_handle = self.vcd_handle[vcd_handle]
 
         return vcd_handle
 
-    def path_for_sim_result_file(self):
-        # Setup Simulation Result file names
-        if os.path.isfile(self.target.cfg.vcd_path):
-            return self.target.cfg.vcd_path
-        else:
-            raise Exception(f'ERROR: Result file: self.target.cfg.vcd_path does not exist; cannot read results!')
-
-    def fetch_simdata(self, file_handle, name="", update_data=False):
-        """
-        Load VCD signals and store values as dictionary
-
-        :return: Dict of numpy arrays (keys are column titles, values are column values)
-        :rtype: dict[numpy.array]
-        """
-        signal = ''
-        cycle_cnt = ''
-        if name is not "":
+    def path_for_sim_result_file(self, run_num=None):
+        # Results of stored runs
+        if run_num is not None:
+            return self._run_result_file(run_num)
+
+        # Setup Simulation Result file names, a compressed variant of the result file is used if only that one exists
+        vcd_path = self.target.cfg.vcd_path
+        for path in [vcd_path] + [vcd_path + ext for ext in COMPRESSED_EXTENSIONS]:
+            if os.path.isfile(path):
+                return path
+        raise Exception(f'ERROR: Result file: {vcd_path} does not exist; cannot read results!')
+
+    def fetch_simdata(self, file_handle, name="", update_data=False, sigs=None, t_start=None, t_stop=None):
+        """
+        Load VCD signals and store values as dictionary. Signal names are resolved to VCD identifier codes from the
+        header and only the value changes of the requested codes are decoded.
+
+        :param name: full hierarchical name of a single signal, which is returned directly instead of a dict
+        :param update_data: add a sample at each timestamp of the VCD file for signals that did not change, either
+            True for all signals or a list of the signal names it applies to
+        :param sigs: list of full hierarchical signal names that shall be loaded, all signals if None
+        :param t_start: only load value changes from this cycle count on
+        :param t_stop: only load value changes up to this cycle count
+        :return: Dict of ProbeData objects (keys are signal names)
+        :rtype: dict[ProbeData] | ProbeData
+        """
+        if name != "":
             # parse only single signal name
-            signal_dict = file_handle.parse_vcd(update_data=update_data)
-            """ :type : dict()"""
-
-            for key in signal_dict.keys():
-                signal = [i[1] for i in signal_dict[key]['cv']]
-                cycle_cnt = [i[0] for i in signal_dict[key]['cv']]
-
-            if signal in [""]:
-                raise ValueError("No data found for signal:{0}".format(name))
+            return self.fetch_simdata(file_handle, update_data=[name] if update_data else False, sigs=[name],
+                                      t_start=t_start, t_stop=t_stop)[name]
 
-            if signal == self.target.str_cfg.time_probe.name:
-                return np.array([cycle_cnt, signal], dtype='O')
-            else:
-                return np.array([cycle_cnt, signal], dtype='O')
+        if sigs:
+            known = set(file_handle.list_sigs())
+            unknown = [sig for sig in sigs if sig not in known]
+            if unknown:
+                raise ValueError("No data found for signal:{0}".format(', '.join(unknown)))
 
+        if t_start is not None or t_stop is not None:
+            vcd_data = file_handle.parse_window(t_start=t_start, t_stop=t_stop, sigs=sigs)
         else:
-            # parse all signals into run_cache
-            signal_dict = file_handle.parse_vcd(sigs=name, update_data=update_data)
-            """ :type : dict()"""
-            data = {}
-            for key in signal_dict.keys():
-                signal = [i[1] for i in signal_dict[key]['cv']]
-                cycle_cnt = [i[0] for i in signal_dict[key]['cv']]
-                net = signal_dict[key]['nets'][0]
-                name = net['hier'] + '.' + net['name']
-
-                if signal_dict[key]['nets'][0]['name'] == self.target.str_cfg.time_probe.name:
-                    # convert binary representation on time signal to integer and scale according to precision set in prj
-                    dt_scale = self.target.prj_cfg.cfg.dt_scale
-                    signal_scaled = [int(x, 2) * dt_scale for x in signal]
-                    data[name] = np.array([cycle_cnt, signal_scaled], dtype='O')
-                else:
-                    data[name] = np.array([cycle_cnt, signal], dtype='O')
+            vcd_data = file_handle.parse_columnar(sigs=sigs)
 
-                data[name].setflags(write=False)
+        if sigs:
+            codes = vcd_data.names()
+            requested = [(sig, codes[sig]) for sig in sigs]
+        else:
+            requested = [(signal.name, code) for code, signal in vcd_data.signals.items()]
+
+        data = {}
+        for sig, code in requested:
+            update = update_data if isinstance(update_data, bool) else sig in update_data
+            data[sig] = self._to_probe_data(vcd_data.signals[code].nets[0], *vcd_data.columns(code, update),
+                                            compress=not update)
+
+        if not data:
+            raise ValueError("No data found for signal:{0}".format(sigs))
+
+        return data
+
+    def follow(self, names=None, poll_interval=FOLLOW_POLL_INTERVAL, idle_timeout=None):
+        """
+        Iterate over new samples of the raw VCD result file, while it is still being written by a running
+        simulation. This allows to monitor long simulations and to abort them early, see ParseVCD.follow.
+
+        :param names: list of full hierarchical signal names that shall be followed, all signals if None
+        :param poll_interval: time in seconds to wait before checking the result file for new data again
+        :param idle_timeout: time in seconds without new data after which following ends, None to follow forever
+        :return: generator yielding dicts, which map signal names to ProbeData objects holding the new cycle counts
+            and values
+        """
+        vcd_handle = ParseVCD(self.target.result_path_raw)
+        for chunk in vcd_handle.follow(sigs=names, poll_interval=poll_interval, idle_timeout=idle_timeout):
+            samples = {}
+            for signal in chunk.signals.values():
+                if len(signal):
+                    for net in signal.nets:
+                        samples[net['hier'] + '.' + net['name']] = self._to_probe_data(net, signal.time.copy(),
+                                                                                       signal.value.copy(),
+                                                                                       signal.xz.copy())
+            yield samples
+
+    def _to_probe_data(self, net, time, value, xz, compress=False):
+        """
+        Wrap the value change columns of a VCD signal into a read-only ProbeData object, values of the time probe are
+        converted to seconds.
+
+        :param net: net description of the signal from the VCD header
+        :param time: int64 array of cycle counts
+        :param value: value array, see VCDSignal
+        :param xz: uint8 X/Z mask
+        :param compress: drop samples that repeat the previous value, see _compress. The time probe is never
+            compressed, since each of its samples is a support point for mapping cycle counts to emulation time.
+        :rtype: ProbeData
+        """
+        data = ProbeData(time, value, xz)
+        if net['name'] == self.target.str_cfg.time_probe.name:
+            # convert time signal to seconds according to precision set in prj
+            dt_scale = self.target.prj_cfg.cfg.dt_scale
+            if value.ndim > 1:
+                value = np.array([int.from_bytes(row.tobytes(), 'big') for row in value], dtype=object)
+            data = ProbeData(time, value.astype(np.float64) * dt_scale, xz)
+        elif compress:
+            data = self._compress(data)
+
+        data.setflags(write=False)
+        return data
+
+class ProbeFST(ProbeVCD):
+    """
+    API for converted result files in GTKWave's FST format. Signals are read natively from the FST file via ParseFST,
+    only the blocks of the requested signals are decompressed. The binary VCD cache and the timestamp index are not
+    needed for FST files and are not used.
+    """
 
-            if signal in [""]:
-                raise ValueError("No data found for signal:{0}".format(name))
+    def path_for_sim_result_file(self, run_num=None):
+        if run_num is not None:
+            return super().path_for_sim_result_file(run_num)
 
-            return data
+        fst_path = self.target.cfg.fst_path
+        if not os.path.isfile(fst_path):
+            raise Exception(f'ERROR: Result file: {fst_path} does not exist; cannot read results!')
+        return fst_path
 
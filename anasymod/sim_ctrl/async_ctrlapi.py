@@ -0,0 +1,268 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from anasymod.sim_ctrl.ctrlapi import WAIT_POLL_MAX
+
+
+class AsyncCtrlApi():
+    """
+    asyncio interface to a control interface of a HW target, e.g. a VIOCtrlApi or UARTCtrlApi as returned by
+    Analysis.launch. All commands are coroutines, so several boards can be controlled from one test process with
+    asyncio.gather, e.g.:
+
+        ctrls = [AsyncCtrlApi(ana.launch(server_addr=addr)) for ana, addr in boards]
+        await asyncio.gather(*(ctrl.set_param(name='a_in', value=1.5) for ctrl in ctrls))
+
+    The blocking I/O of each board runs on a worker thread owned by that board, so commands of one board are executed
+    in the order they were issued, while commands of different boards run concurrently. Converting an uploaded trace
+    does not access the board and runs on a separate worker thread, so the next configuration of a board can be sent
+    while the previous trace is still being converted.
+
+    Any object implementing the CtrlApi interface can be wrapped, which allows to test scripts against local fake
+    backends without an FPGA board.
+    """
+    def __init__(self, ctrl, executor=None, convert_executor=None):
+        """
+        :param ctrl: Synchronous control interface, e.g. a CtrlApi object
+        :param executor: Executor running the commands sent to the target, a single worker thread by default. Must
+            not run more than one command at a time, as the backends are not thread-safe.
+        :param convert_executor: Executor running the waveform conversion, a single worker thread by default
+        """
+        self.ctrl = ctrl
+        """ type(CtrlApi) : wrapped synchronous control interface. """
+
+        self.executor = executor if executor is not None else \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='anasymod_ctrl')
+        """ type(concurrent.futures.Executor) : executor running the commands sent to the target. """
+
+        self.convert_executor = convert_executor if convert_executor is not None else \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='anasymod_convert')
+        """ type(concurrent.futures.Executor) : executor running the waveform conversion. """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    ### User Functions
+
+    async def sendline(self, line, timeout=float('inf')):
+        """
+        Send a single line in target shell specific language e.g. in tcl for tcl shell.
+        :param line: Line that shall be send to/processed by shell
+        :param timeout: Maximum time granted for operation to finish
+        :return: Return string from target shell
+        """
+        return await self._run(self.ctrl.sendline, line, timeout=timeout)
+
+    async def source(self, script, timeout=float('inf')):
+        """
+        Source a script written language for targeted shell.
+        :param script: Name/Path to script that shall be sourced
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.source, script, timeout=timeout)
+
+    async def setup_trace_unit(self, trigger_name, trigger_operator, trigger_value, sample_decimation=None,
+                               sample_count=None):
+        """
+        Setup the trace unit and arm it, see CtrlApi.setup_trace_unit.
+        """
+        return await self._run(self.ctrl.setup_trace_unit, trigger_name=trigger_name,
+                               trigger_operator=trigger_operator, trigger_value=trigger_value,
+                               sample_decimation=sample_decimation, sample_count=sample_count)
+
+    async def arm_trace_unit(self):
+        """
+        Arm the trace unit, this will delete the buffer and arm the trigger.
+        """
+        return await self._run(self.ctrl.arm_trace_unit)
+
+    async def upload_trace(self, result_file=None):
+        """
+        Wait until the trace unit stopped recording data and transmit this data to the host PC.
+        :param result_file: Optionally, it is possible to provide a custom result file path.
+        :return: paths of the raw result file and of the result file the converted trace shall be stored in
+        """
+        return await self._run(self.ctrl.upload_trace, result_file=result_file)
+
+    async def convert_trace(self, result_path_raw, result_path, **kwargs):
+        """
+        Convert an uploaded trace on the conversion worker, further commands to the target are not blocked.
+        :param result_path_raw: Path of the raw result file written by upload_trace
+        :param result_path: Path of the converted result file
+        :param kwargs: Additional arguments of the convert_trace function of the wrapped control interface
+        """
+        return await self._run_in(self.convert_executor, self.ctrl.convert_trace, result_path_raw=result_path_raw,
+                                  result_path=result_path, **kwargs)
+
+    async def wait_on_and_dump_trace(self, result_file=None, **kwargs):
+        """
+        Wait until the trace unit stopped recording data, upload the trace and convert it. Commands issued while the
+        trace is converted are sent to the target right away.
+        :param result_file: Optionally, it is possible to provide a custom result file path.
+        :param kwargs: Additional arguments of the convert_trace function of the wrapped control interface
+        """
+        result_path_raw, result_path = await self.upload_trace(result_file=result_file)
+        await self.convert_trace(result_path_raw=result_path_raw, result_path=result_path, **kwargs)
+
+    async def refresh_param(self, name, timeout=30):
+        """
+        Refresh selected control parameter.
+        :param name: Name of control parameter
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.refresh_param, name=name, timeout=timeout)
+
+    async def get_param(self, name, timeout=30):
+        """
+        Read value of a control parameter in design.
+        :param name: Name of control parameter to be read
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.get_param, name=name, timeout=timeout)
+
+    async def set_param(self, name, value, timeout=30):
+        """
+        Set value of a control parameter in design.
+        :param name: Name of control parameter to be set
+        :param value: Value of control parameter sto be set
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.set_param, name=name, value=value, timeout=timeout)
+
+    async def get_params(self, names, timeout=30):
+        """
+        Read values of several control parameters in design.
+        :param names: Names of control parameters to be read
+        :param timeout: Maximum time granted for operation to finish
+        :return: dict mapping each name to its value
+        """
+        return await self._run(self.ctrl.get_params, names=names, timeout=timeout)
+
+    async def set_params(self, params, timeout=30):
+        """
+        Set values of several control parameters in design.
+        :param params: dict mapping names of control parameters to the values that shall be set
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.set_params, params=params, timeout=timeout)
+
+    @asynccontextmanager
+    async def transaction(self, timeout=30):
+        """
+        Collect all control parameters that are set within an async with-block and write them at once when the block
+        is left, see CtrlApi.transaction. Parameters set by other tasks for the same target while the block is open are
+        collected as well.
+
+        Example:
+            async with ctrl.transaction():
+                await ctrl.set_param(name='a_in', value=1.5)
+                await ctrl.set_param(name='mode_in', value=2)
+
+        :param timeout: Maximum time granted for writing the parameters
+        """
+        cm = self.ctrl.transaction(timeout=timeout)
+        await self._run(cm.__enter__)
+        try:
+            yield self
+        except BaseException as err:
+            if not await self._run(cm.__exit__, type(err), err, err.__traceback__):
+                raise
+        else:
+            await self._run(cm.__exit__, None, None, None)
+
+    async def set_var(self, name, value):
+        """
+        Define a variable in target shell environment.
+        :param name: Name of variable that shall be set
+        :param value: Value of variable that shall be set
+        """
+        return await self._run(self.ctrl.set_var, name=name, value=value)
+
+    async def set_reset(self, value, timeout=30):
+        """
+        Control the 'emu_rst' signal, in order to put the system running on the FPGA into or out of reset state.
+        :param value: Value of reset signal, 1 will set it to reset and 0 will release reset.
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.set_reset, value=value, timeout=timeout)
+
+    async def get_emu_time_int(self, timeout=30):
+        """
+        Get current time of the FPGA simulation as an unscaled integer value.
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.get_emu_time_int, timeout=timeout)
+
+    async def get_emu_time(self, timeout=30):
+        """
+        Get current time of the FPGA simulation as a decimal value.
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.get_emu_time, timeout=timeout)
+
+    async def set_ctrl_mode(self, value, timeout=30):
+        """
+        Set the control mode that shall be applied to stall the FPGA simulation, see CtrlApi.set_ctrl_mode.
+        :param value: Integer value setting the currently active control mode
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.set_ctrl_mode, value=value, timeout=timeout)
+
+    async def set_ctrl_data(self, value, timeout=30):
+        """
+        Set a time value as unscaled integer.
+        :param value:  Unscaled integer value that represents a time. This value is interpreted according to
+        the selected ctrl_mode
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.set_ctrl_data, value=value, timeout=timeout)
+
+    async def stall_emu(self, timeout=30):
+        """
+        Stall the FPGA simulation immediately.
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.stall_emu, timeout=timeout)
+
+    async def sleep_emu(self, t, timeout=30):
+        """
+        Stall FPGA simulation, after emulated time of *t* has passed, starting from the point in time this function was
+        called. Only the worker of this target is blocked while waiting.
+        :param t: Time value that shall pass before FPGA simulation is stalled.
+        :param timeout: Maximum time granted for operation to finish
+        """
+        return await self._run(self.ctrl.sleep_emu, t=t, timeout=timeout)
+
+    async def wait_emu_time_int(self, t_int, timeout=float('inf'), max_poll_interval=WAIT_POLL_MAX):
+        """
+        Wait until the FPGA simulation reached a time given as unscaled integer value. Only the worker of this target
+        is blocked while waiting; cancelling the awaiting task does not abort the wait on the worker, so a finite
+        timeout should be given if the task may be cancelled.
+        :param t_int: Unscaled integer time value to wait for
+        :param timeout: Maximum time granted for the FPGA simulation to reach t_int
+        :param max_poll_interval: Maximum interval between two polls of the emulation time in seconds
+        :return: Emulation time as unscaled integer value once t_int was reached
+        """
+        return await self._run(self.ctrl.wait_emu_time_int, t_int=t_int, timeout=timeout,
+                               max_poll_interval=max_poll_interval)
+
+    def close(self):
+        """
+        Wait for all issued commands and conversions to finish and stop the workers. The wrapped control interface is
+        not closed.
+        """
+        self.executor.shutdown(wait=True)
+        self.convert_executor.shutdown(wait=True)
+
+    ### Utility Functions
+
+    async def _run(self, func, *args, **kwargs):
+        return await self._run_in(self.executor, func, *args, **kwargs)
+
+    async def _run_in(self, executor, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
@@ -1,9 +1,19 @@
 import os, sys
 import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
 
 from anasymod.config import EmuConfig
 from anasymod.structures.structure_config import StructureConfig
+from anasymod.generators.gen_api import CodeGenerator
+from anasymod.templates.tcl_ctrl_server import TemplTCL_CTRL_SERVER
 from .console_print import cprint_block_start, cprint_block_end
+from .tcl_ctrl import TclCtrlClient
+
+# initial and maximum interval in seconds between two polls of the emulation time while waiting for it to advance
+WAIT_POLL_MIN = 1e-3
+WAIT_POLL_MAX = 50e-3
 
 class CtrlApi:
     """
@@ -18,6 +28,14 @@ class CtrlApi:
         self.prompt = prompt
         self.debug = debug
 
+        # control parameters collected by an open transaction, None if no transaction is open
+        self._pending_params = None
+
+        # client of the control server running in the TCL interpreter, None if commands are sent via the console
+        self.tcl_ctrl = None
+        self._drain_thread = None
+        self._drain_stop = threading.Event()
+
     ### User Functions
 
     def sendline(self, line, timeout=float('inf')):
@@ -80,6 +98,26 @@ class CtrlApi:
         """
         raise NotImplementedError("Base class was called to execute function")
 
+    def upload_trace(self, result_file=None):
+        """
+        Wait until the trace unit stopped recording data and transmit this data to the host PC, store by default to
+        the raw result file path, or a custom path provided by the user.
+
+        :param result_file: Optionally, it is possible to provide a custom result file path.
+        :return: paths of the raw result file and of the result file the converted trace shall be stored in
+        """
+        raise NotImplementedError("Base class was called to execute function")
+
+    def convert_trace(self, result_path_raw, result_path):
+        """
+        Convert analog values of an uploaded trace from fixed-point to float and store it to a .vcd file. The target
+        is not accessed, so further control commands can be processed during the conversion.
+
+        :param result_path_raw: Path of the raw result file written by upload_trace
+        :param result_path: Path of the converted result file
+        """
+        raise NotImplementedError("Base class was called to execute function")
+
     def refresh_param(self, name, timeout=30):
         """
         Refresh selected control parameter.
@@ -108,6 +146,55 @@ class CtrlApi:
         """
         raise NotImplementedError("Base class was called to execute function")
 
+    def get_params(self, names, timeout=30):
+        """
+        Read values of several control parameters in design.
+        :param names: Names of control parameters to be read
+        :param timeout: Maximum time granted for operation to finish
+        :return: dict mapping each name to its value
+        """
+        return {name: self.get_param(name=name, timeout=timeout) for name in names}
+
+    def set_params(self, params, timeout=30):
+        """
+        Set values of several control parameters in design.
+        :param params: dict mapping names of control parameters to the values that shall be set
+        :param timeout: Maximum time granted for operation to finish
+        """
+        if self._pending_params is not None:
+            self._pending_params.update(params)
+            return
+        for name, value in params.items():
+            self.set_param(name=name, value=value, timeout=timeout)
+
+    @contextmanager
+    def transaction(self, timeout=30):
+        """
+        Collect all control parameters that are set within a with-block, e.g. via set_param, set_ctrl_mode or
+        set_reset, and write them at once via set_params when the block is left. If an exception is raised within the
+        block, none of them is written. Reading parameters within the block returns the values currently applied in
+        the design, not the collected ones. Nested transactions are merged into the outermost one.
+
+        Example:
+            with ctrl.transaction():
+                ctrl.set_param(name='a_in', value=1.5)
+                ctrl.set_param(name='mode_in', value=2)
+
+        :param timeout: Maximum time granted for writing the parameters
+        """
+        if self._pending_params is not None:
+            yield self
+            return
+
+        self._pending_params = {}
+        try:
+            yield self
+            params = self._pending_params
+        finally:
+            self._pending_params = None
+        if params:
+            self.set_params(params, timeout=timeout)
+
     def set_var(self, name, value):
         """
         Define a variable in target shell environment.
@@ -186,8 +273,29 @@ class CtrlApi:
         self.set_ctrl_mode(2)
 
         # wait for enough time to pass
-        while(self.get_emu_time_int() < t_next_int):
-            pass
+        self.wait_emu_time_int(t_next_int)
+
+    def wait_emu_time_int(self, t_int, timeout=float('inf'), max_poll_interval=WAIT_POLL_MAX):
+        """
+        Block until the FPGA simulation reached a time given as unscaled integer value. The emulation time is polled
+        with exponential backoff, starting at WAIT_POLL_MIN and growing up to max_poll_interval, so that waiting does
+        not saturate the link to the target.
+        :param t_int: Unscaled integer time value to wait for
+        :param timeout: Maximum time granted for the FPGA simulation to reach t_int
+        :param max_poll_interval: Maximum interval between two polls of the emulation time in seconds
+        :return: Emulation time as unscaled integer value once t_int was reached
+        """
+        start_time = time.time()
+        interval = WAIT_POLL_MIN
+        while True:
+            t_emu = self.get_emu_time_int()
+            if t_emu >= t_int:
+                return t_emu
+            if (time.time() - start_time) > timeout:
+                raise Exception(f'ERROR: FPGA simulation did not reach time {t_int} within {timeout} s, current time '
+                                f'is {t_emu}.')
+            time.sleep(interval)
+            interval = min(2 * interval, max_poll_interval)
 
     ### Utility Functions
 
@@ -257,7 +365,7 @@ class CtrlApi:
             env = os.environ.copy()
             env['PATH'] += f':{os.path.dirname(self.pcfg.vivado_config.vivado)}'
             # Launch Vivado
-            from pexpect import spawnu
+            from pexpect import spawnu, TIMEOUT
             self.proc = spawnu(command=cmd, cwd=self.cwd, env=env)
         elif os.name == 'nt':
             # Add Vivado to the path using the Windows PATH separator (semicolon)
@@ -269,16 +377,77 @@ class CtrlApi:
             # Launch Vivado
             try:
                 # import patched wexpect from Inicio installation
-                from site_pip_packages.wexpect import spawn
+                from site_pip_packages.wexpect import spawn, TIMEOUT
             except:
-                from wexpect import spawn
+                from wexpect import spawn, TIMEOUT
             self.proc = spawn(command=cmd, cwd=self.cwd, env=env)
         else:
             raise Exception(f'No supported OS was detected, supported OS for interactive control are windows and linux.')
+        self._proc_timeout = TIMEOUT
 
         # wait for the prompt
         self._expect_prompt(timeout=300)
 
+        if self.pcfg.cfg.tcl_ctrl_server:
+            self._start_tcl_ctrl()
+
+    def _start_tcl_ctrl(self):
+        """
+        Start the control server in the TCL interpreter and connect to it. From then on, commands are sent via the
+        server's socket instead of the console, which avoids scraping the console output for the prompt and error
+        strings. The console output is still read in a background thread, so that the interpreter does not block on a
+        full console buffer.
+        """
+        script = os.path.join(self.pcfg.build_root, 'tcl_ctrl_server.tcl')
+        codegen = CodeGenerator()
+        codegen.use_templ(TemplTCL_CTRL_SERVER())
+        codegen.write_to_file(script)
+
+        # the result of sourcing the script is the port the server listens on
+        self.proc.sendline(f'source {Path(script).resolve().as_posix()}')
+        before = self._expect_prompt(timeout=30)
+        ports = [line.strip() for line in before.splitlines() if line.strip().isdigit()]
+        if not ports:
+            raise Exception(f'Could not start TCL control server, output from Vivado: {before}')
+
+        # hand the interpreter over to the event loop, which services the requests sent to the server
+        self.proc.sendline('vwait ::anasymod_ctrl::done')
+        self.tcl_ctrl = TclCtrlClient(port=int(ports[-1]))
+
+        self._drain_stop.clear()
+        self._drain_thread = threading.Thread(target=self._drain_console, daemon=True)
+        self._drain_thread.start()
+
+    def _stop_tcl_ctrl(self):
+        """
+        Stop the control server, after which the TCL interpreter returns to the console prompt.
+        """
+        if self.tcl_ctrl is None:
+            return
+        try:
+            self.tcl_ctrl.eval('close $::anasymod_ctrl::server; set ::anasymod_ctrl::done 1', timeout=30)
+        finally:
+            self.tcl_ctrl.close()
+            self.tcl_ctrl = None
+            self._drain_stop.set()
+            self._drain_thread.join()
+            self._drain_thread = None
+
+    def _drain_console(self):
+        """
+        Read the console output of the TCL interpreter while the control server is running.
+        """
+        while not self._drain_stop.is_set():
+            try:
+                out = self.proc.read_nonblocking(size=65536, timeout=0.1)
+            except self._proc_timeout:
+                continue
+            except Exception:
+                # console was closed
+                break
+            if self.debug and out:
+                print(out, end='')
+
     def __del__(self):
         """
         Close connection to shell.
@@ -0,0 +1,82 @@
+import socket
+import struct
+
+# status codes of responses sent by the control server, see TemplTCL_CTRL_SERVER
+STATUS_OK = 0
+STATUS_TCL_ERROR = 1
+STATUS_PROTOCOL_ERROR = 2
+
+# request header: length of the script; response header: status code and length of the result
+_REQUEST_HEADER = struct.Struct('>I')
+_RESPONSE_HEADER = struct.Struct('>BI')
+
+
+class TclError(Exception):
+    """
+    Error reported by the control server, e.g. a TCL command that failed.
+    """
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        """ type(int) : status code of the response, STATUS_TCL_ERROR or STATUS_PROTOCOL_ERROR. """
+
+
+class TclCtrlClient():
+    """
+    Client of the control server that is sourced into the Vivado TCL interpreter. Scripts are sent as length-prefixed
+    frames over a TCP connection and the result is returned together with an explicit status code, so neither the
+    prompt nor error strings need to be scraped from the console output.
+    """
+    def __init__(self, port, host='127.0.0.1', connect_timeout=30):
+        """
+        :param port: TCP port the control server listens on
+        :param host: address of the control server
+        :param connect_timeout: Maximum time granted for establishing the connection
+        """
+        self.port = port
+        self.host = host
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def eval(self, script, timeout=float('inf')):
+        """
+        Evaluate a TCL script in the global namespace of the interpreter.
+        :param script: TCL script, may contain several commands
+        :param timeout: Maximum time granted for operation to finish
+        :return: result of the last command of the script
+        :rtype: str
+        """
+        if self.sock is None:
+            raise Exception(f'Connection to TCL control server on port {self.port} is closed.')
+
+        data = script.encode('utf-8')
+        try:
+            self.sock.settimeout(None if timeout == float('inf') else timeout)
+            self.sock.sendall(_REQUEST_HEADER.pack(len(data)) + data)
+            status, length = _RESPONSE_HEADER.unpack(self._recv(_RESPONSE_HEADER.size))
+            result = self._recv(length).decode('utf-8', errors='replace')
+        except socket.timeout:
+            # the response of the pending request would be read as response of the next one
+            self.close()
+            raise Exception(f'TCL control server did not respond within {timeout} s, connection was closed.')
+
+        if status != STATUS_OK:
+            raise TclError(status, result)
+        return result
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _recv(self, size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        pos = 0
+        while pos < size:
+            n = self.sock.recv_into(view[pos:])
+            if n == 0:
+                self.close()
+                raise Exception(f'Connection to TCL control server on port {self.port} was closed by the server.')
+            pos += n
+        return bytes(buf)
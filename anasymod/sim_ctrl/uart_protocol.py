@@ -0,0 +1,127 @@
+import struct
+
+__all__ = ["UARTFrameError", "select_protocol", "crc8", "encode_request", "decode_response", "RESPONSE_HEADER_SIZE",
+           "OP_SET", "OP_GET", "OP_EXIT", "MAX_BURST"]
+
+# Binary framing of the UART control protocol, the firmware side is generated by UartZynqFirmwareAppCode.
+#
+# request:  SYNC_REQUEST, opcode, sequence number, count, count entries, CRC-8
+#           entries of set frames are a register address followed by a 32-bit little-endian value,
+#           entries of get frames are a register address
+# response: SYNC_RESPONSE, status, sequence number, count, count 32-bit little-endian values, CRC-8
+#           get frames are answered with the value of each register, set frames with count 0
+#
+# The CRC-8 (polynomial 0x07, initial value 0) covers all bytes between the sync byte and the CRC. Several requests
+# may be sent before their responses are read, responses are sent in the order of the requests.
+
+SYNC_REQUEST = 0xA5
+SYNC_RESPONSE = 0x5A
+
+# opcodes
+OP_SET = 0x01
+OP_GET = 0x02
+OP_EXIT = 0x03
+
+# status codes of responses
+STATUS_OK = 0
+STATUS_CRC = 1
+STATUS_OPCODE = 2
+STATUS_ADDR = 3
+STATUS_COUNT = 4
+
+STATUS_MESSAGES = {
+    STATUS_CRC: 'CRC mismatch of request',
+    STATUS_OPCODE: 'unknown opcode',
+    STATUS_ADDR: 'unknown register address',
+    STATUS_COUNT: 'too many registers in request'
+}
+
+# maximum number of registers per frame, bounds the receive buffer of the firmware
+MAX_BURST = 64
+
+# number of bytes of a response up to and including its count, the count determines the number of remaining bytes
+RESPONSE_HEADER_SIZE = 4
+
+_CRC8_TABLE = []
+for _byte in range(256):
+    _crc = _byte
+    for _ in range(8):
+        _crc = ((_crc << 1) ^ 0x07) & 0xFF if _crc & 0x80 else (_crc << 1) & 0xFF
+    _CRC8_TABLE.append(_crc)
+
+
+class UARTFrameError(Exception):
+    """
+    Error of the UART control protocol, e.g. a corrupted response or an error status reported by the firmware.
+    """
+    pass
+
+
+def select_protocol(protocol, custom_firmware=False):
+    """
+    Determine the protocol used for control via UART. Unless selected explicitly, custom firmware is expected to
+    speak the ascii protocol, which custom firmware of earlier versions implements, and the generated firmware the
+    binary protocol.
+
+    :param protocol: 'binary', 'ascii' or None to select the protocol depending on custom_firmware
+    :param custom_firmware: True if custom firmware is running on the Zynq PS
+    :return: 'binary' or 'ascii'
+    :rtype: str
+    """
+    if protocol is None:
+        return 'ascii' if custom_firmware else 'binary'
+    if protocol not in ('binary', 'ascii'):
+        raise Exception(f'UART protocol {protocol} is not supported, use binary or ascii.')
+    return protocol
+
+
+def crc8(data, crc=0):
+    """
+    :param data: bytes the CRC is computed of
+    :param crc: CRC of preceding bytes
+    :rtype: int
+    """
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_request(op, seq, addrs, values=None):
+    """
+    :param op: OP_SET, OP_GET or OP_EXIT
+    :param seq: sequence number of the request, wraps at 256
+    :param addrs: register addresses, at most MAX_BURST
+    :param values: values to be written for OP_SET, one per address
+    :return: request frame
+    :rtype: bytes
+    """
+    if len(addrs) > MAX_BURST:
+        raise UARTFrameError(f'A request can address at most {MAX_BURST} registers, got {len(addrs)}.')
+    body = bytearray((op, seq & 0xFF, len(addrs)))
+    if op == OP_SET:
+        for addr, value in zip(addrs, values):
+            body += struct.pack('<BI', addr, int(value) & 0xFFFFFFFF)
+    else:
+        body += bytes(addrs)
+    return bytes((SYNC_REQUEST,)) + bytes(body) + bytes((crc8(body),))
+
+
+def decode_response(frame, seq):
+    """
+    :param frame: response frame, i.e. RESPONSE_HEADER_SIZE bytes, the values and the CRC
+    :param seq: sequence number of the corresponding request
+    :return: register values of a get response, empty list for other responses
+    :rtype: list[int]
+    """
+    if len(frame) <= RESPONSE_HEADER_SIZE or frame[0] != SYNC_RESPONSE:
+        raise UARTFrameError(f'Response {frame.hex()} does not start with a valid header.')
+    status, resp_seq, count = frame[1], frame[2], frame[3]
+    if crc8(frame[1:-1]) != frame[-1]:
+        raise UARTFrameError(f'CRC mismatch of response {frame.hex()}.')
+    if resp_seq != seq & 0xFF:
+        raise UARTFrameError(f'Response has sequence number {resp_seq}, expected {seq & 0xFF}.')
+    if len(frame) != RESPONSE_HEADER_SIZE + 4 * count + 1:
+        raise UARTFrameError(f'Response {frame.hex()} is truncated.')
+    if status != STATUS_OK:
+        raise UARTFrameError(f'Firmware reported error status {status}: {STATUS_MESSAGES.get(status, "unknown")}.')
+    return list(struct.unpack(f'<{count}I', bytes(frame[4:4 + 4 * count])))
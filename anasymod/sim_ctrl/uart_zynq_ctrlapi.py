@@ -1,4 +1,5 @@
 import serial, os
+import time
 import serial.tools.list_ports as ports
 from .console_print import cprint_block
 from pathlib import Path
@@ -15,6 +16,8 @@ from anasymod.sim_ctrl.datatypes import AnalogProbe, DigitalSignal
 from anasymod.util import expand_path
 from anasymod.wave import ConvertWaveform
 from anasymod.files import mkdir_p
+from anasymod.sim_ctrl.uart_protocol import select_protocol, encode_request, decode_response, UARTFrameError, \
+    RESPONSE_HEADER_SIZE, SYNC_RESPONSE, OP_SET, OP_GET, MAX_BURST
 
 
 class UARTCtrlApi(CtrlApi):
@@ -25,7 +28,7 @@ class UARTCtrlApi(CtrlApi):
     """
     def __init__(self, result_path_raw, result_type_raw, result_path, prj_cfg: EmuConfig, scfg: StructureConfig,
                  content, project_root, ltxfile_path, top_module, cwd=None, err_strs=None, debug=False,
-                 float_type=False, prompt='Vivado% '):
+                 float_type=False, prompt='Vivado% ', custom_firmware=False):
         super().__init__(cwd=cwd, pcfg=prj_cfg, scfg=scfg, prompt=prompt, debug=debug)
         # set defaults
         if err_strs is None:
@@ -64,7 +67,17 @@ class UARTCtrlApi(CtrlApi):
 
         self.uart_suffix = self.pcfg.board.uart_suffix
 
+        # protocol spoken by the firmware on the Zynq PS
+        self.protocol = select_protocol(self.pcfg.cfg.uart_protocol, custom_firmware=custom_firmware)
+
         self.port_list = []
+
+        # register addresses of control inputs and outputs used by the binary protocol
+        self.i_addrs = {param.name: param.i_addr for param in scfg.analog_ctrl_inputs + scfg.digital_ctrl_inputs
+                        if param.i_addr is not None}
+        self.o_addrs = {probe.name: probe.o_addr for probe in scfg.analog_ctrl_outputs + scfg.digital_ctrl_outputs
+                        if probe.o_addr is not None}
+        self._seq = 0
     ### User Functions
 
     def sendline(self, line, timeout=float('inf')):
@@ -77,6 +90,10 @@ class UARTCtrlApi(CtrlApi):
         if self.debug:
             cprint_block([line], title='SEND', color='magenta')
 
+        # errors are reported explicitly by the control server
+        if self.tcl_ctrl is not None:
+            return self.tcl_ctrl.eval(line, timeout=timeout)
+
         self.proc.sendline(line)
         before = self._expect_prompt(timeout=timeout)
 
@@ -227,6 +244,17 @@ class UARTCtrlApi(CtrlApi):
 
         :param result_file: Optionally, it is possible to provide a custom result file path.
         """
+        result_path_raw, result_path = self.upload_trace(result_file=result_file)
+        self.convert_trace(result_path_raw=result_path_raw, result_path=result_path)
+
+    def upload_trace(self, result_file=None):
+        """
+        Wait until the trace unit stopped recording data and transmit this data to the host PC, store by default to
+        the raw result file path, or a custom path provided by the user.
+
+        :param result_file: Optionally, it is possible to provide a custom result file path.
+        :return: paths of the raw result file and of the result file the converted trace shall be stored in
+        """
 
         if result_file is not None:
             # Expand provided path, paths relative to project root are also supported
@@ -255,6 +283,16 @@ class UARTCtrlApi(CtrlApi):
 
         self.sendline(f'write_hw_ila_data -csv_file -force {{{result_path_raw}}} [current_hw_ila_data]')
 
+        return result_path_raw, result_path
+
+    def convert_trace(self, result_path_raw, result_path):
+        """
+        Convert analog values of an uploaded trace from fixed-point to float and store it to a .vcd file. The target
+        is not accessed, so further control commands can be processed during the conversion.
+
+        :param result_path_raw: Path of the raw result file written by upload_trace
+        :param result_path: Path of the converted result file
+        """
         # Convert to .vcd and from fixed-point to float
         ConvertWaveform(result_path_raw=result_path_raw,
                         result_type_raw=self.result_type_raw,
@@ -270,8 +308,28 @@ class UARTCtrlApi(CtrlApi):
         :param timeout: Maximum time granted for operation to finish
         :return:
         """
-        self._write(name=self.cfg.get_operation_prefix+name)
-        return self._read()
+        if self.protocol == 'ascii':
+            self._write(name=self.cfg.get_operation_prefix+name)
+            return self._read()
+        return self.get_params(names=[name], timeout=timeout)[name]
+
+    def get_params(self, names, timeout=30):
+        """
+        Read values of several control parameters in design. With the binary protocol, up to MAX_BURST parameters are
+        read per request and all requests are sent before their responses are read.
+        :param names: Names of control parameters to be read
+        :param timeout: Maximum time granted for operation to finish
+        :return: dict mapping each name to its value
+        """
+        if self.protocol == 'ascii':
+            return super().get_params(names=names, timeout=timeout)
+
+        addrs = [self._get_addr(self.o_addrs, name) for name in names]
+        values = []
+        requests = [(OP_GET, addrs[k:k + MAX_BURST], None) for k in range(0, len(addrs), MAX_BURST)]
+        for result in self._transact(requests, timeout=timeout):
+            values += result
+        return dict(zip(names, values))
 
     def set_param(self, name, value, timeout=30):
         """
@@ -281,10 +339,29 @@ class UARTCtrlApi(CtrlApi):
         :param timeout: Maximum time granted for operation to finish
         :return:
         """
+        if self._pending_params is not None or self.protocol != 'ascii':
+            self.set_params(params={name: value}, timeout=timeout)
+            return
         self._write(name=self.cfg.set_operation_prefix+name, value=value)
         if self._read():
             raise Exception(f"ERROR: Couldn't properly write: {self.cfg.set_operation_prefix+name}={value} command to FPGA.")
 
+    def set_params(self, params, timeout=30):
+        """
+        Set values of several control parameters in design. With the binary protocol, up to MAX_BURST parameters are
+        written per request and all requests are sent before their responses are read.
+        :param params: dict mapping names of control parameters to the values that shall be set
+        :param timeout: Maximum time granted for operation to finish
+        """
+        if self._pending_params is not None or self.protocol == 'ascii':
+            super().set_params(params=params, timeout=timeout)
+            return
+
+        addrs = [self._get_addr(self.i_addrs, name) for name in params]
+        values = list(params.values())
+        self._transact([(OP_SET, addrs[k:k + MAX_BURST], values[k:k + MAX_BURST])
+                        for k in range(0, len(addrs), MAX_BURST)], timeout=timeout)
+
     def set_reset(self, value, timeout=30):
         """
         Control the 'emu_rst' signal, in order to put the system running on the FPGA into or out of reset state.
@@ -376,6 +453,58 @@ class UARTCtrlApi(CtrlApi):
             self.ctrl_handler.write((f'{str(name)}\n'.encode('utf-8')))
         self.ctrl_handler.flush()
 
+    def _get_addr(self, addrs, name):
+        if name not in addrs:
+            raise Exception(f'ERROR: {name} is not a control parameter accessible via UART.')
+        return addrs[name]
+
+    def _transact(self, requests, timeout=30):
+        """
+        Send requests of the binary protocol and read their responses. All requests are written before the first
+        response is read, so the firmware can process them back-to-back without waiting for the host.
+        :param requests: list of tuples of opcode, register addresses and values
+        :param timeout: Maximum time granted for receiving all responses, a UARTFrameError is raised if a response is
+            lost or incomplete
+        :return: list of the register values returned for each request
+        """
+        seqs = []
+        frames = []
+        for op, addrs, values in requests:
+            seqs.append(self._seq)
+            frames.append(encode_request(op=op, seq=self._seq, addrs=addrs, values=values))
+            self._seq = (self._seq + 1) & 0xFF
+        self.ctrl_handler.write(b''.join(frames))
+        self.ctrl_handler.flush()
+
+        results = []
+        deadline = time.time() + timeout
+        port_timeout = self.ctrl_handler.timeout
+        try:
+            for seq in seqs:
+                frame = self._read_bytes(RESPONSE_HEADER_SIZE, deadline=deadline)
+                if frame[0] == SYNC_RESPONSE:
+                    frame += self._read_bytes(4 * frame[3] + 1, deadline=deadline)
+                results.append(decode_response(frame=frame, seq=seq))
+        except UARTFrameError:
+            # drop pending responses, so they are not taken as responses of later requests
+            self.ctrl_handler.reset_input_buffer()
+            raise
+        finally:
+            self.ctrl_handler.timeout = port_timeout
+        return results
+
+    def _read_bytes(self, size, deadline):
+        """
+        Read a given number of bytes from the serial port, raise a UARTFrameError if they were not received before the
+        deadline given as time.time() value.
+        """
+        remaining = deadline - time.time()
+        self.ctrl_handler.timeout = None if remaining == float('inf') else max(remaining, 0)
+        data = self.ctrl_handler.read(size)
+        if len(data) < size:
+            raise UARTFrameError(f'Response from FPGA timed out, received {len(data)} of {size} bytes.')
+        return data
+
     def _read(self, count=1):
         for idx in range(count):
             result = self.ctrl_handler.readline().decode('utf-8').rstrip()
@@ -402,7 +531,10 @@ class UARTCtrlApi(CtrlApi):
         Close connection to shell.
         :return:
         """
-        pass
+        try:
+            self._stop_tcl_ctrl()
+        except:
+            print('Could not stop TCL control server.')
 
 class Config(BaseConfig):
     """
@@ -7,6 +7,7 @@ from anasymod.files import get_from_anasymod
 from anasymod.structures.structure_config import StructureConfig
 from anasymod.structures.firmware_gpio import FirmwareGPIO
 from anasymod.structures.uart_zynq_firmware_appcode import UartZynqFirmwareAppCode
+from anasymod.sim_ctrl.uart_protocol import select_protocol
 #from anasymod.targets import Config as tcfg
 
 class UARTControlInfrastructure(ControlInfrastructure):
@@ -67,7 +68,7 @@ class UARTControlInfrastructure(ControlInfrastructure):
 
         # Generate application code for UART_ZYNQ control, if no custom code is provided
         if not self.tcfg.custom_zynq_firmware:
-            appcode = UartZynqFirmwareAppCode(scfg=self.scfg)
+            appcode = UartZynqFirmwareAppCode(scfg=self.scfg, protocol=select_protocol(self.pcfg.cfg.uart_protocol))
             # Write application code and add to firmware files
             appcode_src = os.path.join(self.pcfg.build_root, 'main.c')
             with open(appcode_src, 'w') as f:
@@ -3,7 +3,7 @@ import time
 from numbers import Number
 from pathlib import Path
 from .console_print import cprint_block
-from anasymod.sim_ctrl.ctrlapi import CtrlApi
+from anasymod.sim_ctrl.ctrlapi import CtrlApi, WAIT_POLL_MIN, WAIT_POLL_MAX
 from anasymod.generators.gen_api import CodeGenerator
 from anasymod.templates.launch_FPGA_sim import TemplLAUNCH_FPGA_SIM
 from anasymod.structures.structure_config import StructureConfig
@@ -59,6 +59,10 @@ class VIOCtrlApi(CtrlApi):
         if self.debug:
             cprint_block([line], title='SEND', color='magenta')
 
+        # errors are reported explicitly by the control server
+        if self.tcl_ctrl is not None:
+            return self.tcl_ctrl.eval(line, timeout=timeout)
+
         self.proc.sendline(line)
         before = self._expect_prompt(timeout=timeout)
 
@@ -205,6 +209,17 @@ class VIOCtrlApi(CtrlApi):
 
         :param result_file: Optionally, it is possible to provide a custom result file path.
         """
+        result_path_raw, result_path = self.upload_trace(result_file=result_file)
+        self.convert_trace(result_path_raw=result_path_raw, result_path=result_path, emu_time_scaled=emu_time_scaled)
+
+    def upload_trace(self, result_file=None):
+        """
+        Wait until the trace unit stopped recording data and transmit this data to the host PC, store by default to
+        the raw result file path, or a custom path provided by the user.
+
+        :param result_file: Optionally, it is possible to provide a custom result file path.
+        :return: paths of the raw result file and of the result file the converted trace shall be stored in
+        """
 
         if result_file is not None:
             # Expand provided path, paths relative to project root are also supported
@@ -233,6 +248,17 @@ class VIOCtrlApi(CtrlApi):
 
         self.sendline(f'write_hw_ila_data -csv_file -force {{{result_path_raw}}} [current_hw_ila_data]')
 
+        return result_path_raw, result_path
+
+    def convert_trace(self, result_path_raw, result_path, emu_time_scaled=True):
+        """
+        Convert analog values of an uploaded trace from fixed-point to float and store it to a .vcd file. The target
+        is not accessed, so further control commands can be processed during the conversion.
+
+        :param result_path_raw: Path of the raw result file written by upload_trace
+        :param result_path: Path of the converted result file
+        :param emu_time_scaled: Flag to indicate, if signals shall be displayed over cycle count or time
+        """
         # Convert to .vcd and from fixed-point to float
         ConvertWaveform(result_path_raw=result_path_raw,
                         result_type_raw=self.result_type_raw,
@@ -268,6 +294,34 @@ class VIOCtrlApi(CtrlApi):
         # return value
         return value
 
+    def get_params(self, names, timeout=30, refresh=True):
+        """
+        Read values of several control parameters in design in a single round-trip to the Vivado TCL interpreter.
+        :param names: Names of control parameters to be read
+        :param timeout: Maximum time granted for operation to finish
+        :param refresh: Refresh the VIO once before reading, so that all values are read from the same refresh
+        :return: dict mapping each name to its value
+        """
+        names = list(names)
+        if not names:
+            return {}
+
+        # the TCL interpreter prints the result of the last command, i.e. the list of all values
+        cmds = ['refresh_hw_vio $vio_0_i'] if refresh else []
+        cmds.append('list ' + ' '.join(f'[get_property INPUT_VALUE ${name}]' for name in names))
+        lines = [line for line in self.sendline('; '.join(cmds), timeout=timeout).splitlines() if line.strip()]
+        values = lines[-1].split() if lines else []
+        if len(values) != len(names):
+            raise Exception(f'ERROR: Expected {len(names)} values from Vivado when reading: {names}, got: {values}')
+
+        # convert values to floating-point if needed
+        params = {}
+        for name, value in zip(names, values):
+            if name in self.analog_ctrl_outputs:
+                value = self.analog_ctrl_outputs[name].fixed_to_float(int(value))
+            params[name] = value
+        return params
+
     def set_param(self, name, value, timeout=30):
         """
         Set value of a control parameter in design.
@@ -275,13 +329,32 @@ class VIOCtrlApi(CtrlApi):
         :param value: Value of control parameter sto be set
         :param timeout: Maximum time granted for operation to finish
         """
-        # convert value to fixed-point if needed
-        if name in self.analog_ctrl_inputs:
-            value = self.analog_ctrl_inputs[name].float_to_fixed(value)
+        self.set_params({name: value}, timeout=timeout)
 
-        # send command
-        self.sendline(f'set_property OUTPUT_VALUE {value} ${name}', timeout=timeout)
-        self.sendline(f'commit_hw_vio ${name}')
+    def set_params(self, params, timeout=30):
+        """
+        Set values of several control parameters in design in a single round-trip to the Vivado TCL interpreter: all
+        values are set within one undo group and committed to the VIO with one commit_hw_vio.
+        :param params: dict mapping names of control parameters to the values that shall be set
+        :param timeout: Maximum time granted for operation to finish
+        """
+        if self._pending_params is not None:
+            self._pending_params.update(params)
+            return
+        if not params:
+            return
+
+        cmds = ['startgroup']
+        for name, value in params.items():
+            # convert value to fixed-point if needed
+            if name in self.analog_ctrl_inputs:
+                value = self.analog_ctrl_inputs[name].float_to_fixed(value)
+            cmds.append(f'set_property OUTPUT_VALUE {value} ${name}')
+        cmds.append('commit_hw_vio [list ' + ' '.join(f'${name}' for name in params) + ']')
+        cmds.append('endgroup')
+
+        # send commands
+        self.sendline('; '.join(cmds), timeout=timeout)
 
     def set_var(self, name, value):
         """
@@ -304,9 +377,35 @@ class VIOCtrlApi(CtrlApi):
         Get current time of the FPGA simulation as an unscaled integer value.
         :param timeout: Maximum time granted for operation to finish
         """
-        self.refresh_param('vio_0_i')
-        emu_time_vio = self.get_param(name=self.scfg.emu_time_vio.name, timeout=timeout)
-        return int(emu_time_vio)
+        name = self.scfg.emu_time_vio.name
+        return int(self.get_params([name], timeout=timeout)[name])
+
+    def wait_emu_time_int(self, t_int, timeout=float('inf'), max_poll_interval=WAIT_POLL_MAX):
+        """
+        Block until the FPGA simulation reached a time given as unscaled integer value. The emulation time is polled by
+        a loop running in the Vivado TCL interpreter with exponential backoff, so waiting takes a single round-trip
+        and the JTAG link is not saturated by refreshing the VIO in a tight loop.
+        :param t_int: Unscaled integer time value to wait for
+        :param timeout: Maximum time granted for the FPGA simulation to reach t_int
+        :param max_poll_interval: Maximum interval between two polls of the emulation time in seconds
+        :return: Emulation time as unscaled integer value once t_int was reached
+        """
+        name = self.scfg.emu_time_vio.name
+        min_ms, max_ms = max(int(WAIT_POLL_MIN * 1e3), 1), max(int(max_poll_interval * 1e3), 1)
+        deadline = 'inf' if timeout == float('inf') else f'[clock milliseconds] + {int(timeout * 1e3)}'
+        script = (f'set _deadline [expr {{{deadline}}}]; set _delay {min_ms}; '
+                  f'while {{1}} {{ refresh_hw_vio $vio_0_i; set _t [get_property INPUT_VALUE ${name}]; '
+                  f'if {{$_t >= {int(t_int)}}} {{ break }}; '
+                  f'if {{[clock milliseconds] > $_deadline}} {{ break }}; '
+                  f'after $_delay; set _delay [expr {{min(2 * $_delay, {max_ms})}}] }}; '
+                  f'set _t')
+        # the TCL loop enforces the timeout, the round-trip is granted some extra time
+        lines = [line.strip() for line in self.sendline(script, timeout=timeout + 30).splitlines() if line.strip()]
+        t_emu = int(lines[-1])
+        if t_emu < t_int:
+            raise Exception(f'ERROR: FPGA simulation did not reach time {t_int} within {timeout} s, current time '
+                            f'is {t_emu}.')
+        return t_emu
 
     ### Utility Functions
 
@@ -345,6 +444,10 @@ class VIOCtrlApi(CtrlApi):
         self.source(script=launch_script)
 
     def __del__(self):
+        try:
+            self._stop_tcl_ctrl()
+        except:
+            print('Could not stop TCL control server.')
         try:
             print('Sending "exit" to Vivado TCL interpreter.')
             self.proc.sendline('exit')
@@ -381,6 +484,8 @@ def main():
         server.register_function(tcl.refresh_param)
         server.register_function(tcl.set_param)
         server.register_function(tcl.get_param)
+        server.register_function(tcl.set_params)
+        server.register_function(tcl.get_params)
 
         # program not progress past this point unless
         # Ctrl-C or similar is pressed.
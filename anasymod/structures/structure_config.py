@@ -146,7 +146,7 @@ class StructureConfig():
             width=prj_cfg.cfg.time_width,
             abspath = 'emu_time'
         )
-        self.emu_time_vio.i_addr = self._assign_o_addr()
+        self.emu_time_vio.o_addr = self._assign_o_addr()
         self.digital_ctrl_outputs += [self.emu_time_vio]
         self.special_ctrl_ios.add(self.emu_time_vio.name)
 
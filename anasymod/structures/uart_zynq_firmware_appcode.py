@@ -1,5 +1,8 @@
+from anasymod.sim_ctrl.uart_protocol import SYNC_REQUEST, SYNC_RESPONSE, OP_SET, OP_GET, OP_EXIT, STATUS_OK, \
+    STATUS_CRC, STATUS_OPCODE, STATUS_ADDR, STATUS_COUNT, MAX_BURST
+
 class UartZynqFirmwareAppCode:
-    def __init__(self, scfg):
+    def __init__(self, scfg, protocol='binary'):
         crtl_inputs = scfg.analog_ctrl_inputs + scfg.digital_ctrl_inputs
         ctrl_outputs = scfg.analog_ctrl_outputs + scfg.digital_ctrl_outputs
 
@@ -13,9 +16,184 @@ class UartZynqFirmwareAppCode:
             if param.i_addr is not None:
                 self.setter_dict[param.i_addr] = param.name
 
+        self.protocol = protocol
         self.src_text = self.gen_src_text()
 
     def gen_src_text(self):
+        if self.protocol == 'binary':
+            return self.gen_binary_src_text()
+        elif self.protocol == 'ascii':
+            return self.gen_ascii_src_text()
+        else:
+            raise Exception(f'UART protocol {self.protocol} is not supported, use binary or ascii.')
+
+    def gen_binary_src_text(self):
+        """
+        Firmware for the binary framed protocol defined in anasymod.sim_ctrl.uart_protocol. Register accesses are
+        dispatched through jump tables indexed by register address.
+        """
+        retval = f'''
+#include "gpio_funcs.h"
+#include "xil_printf.h"
+#include <stddef.h>
+
+#define SYNC_REQUEST {SYNC_REQUEST:#04x}
+#define SYNC_RESPONSE {SYNC_RESPONSE:#04x}
+
+#define OP_SET {OP_SET}
+#define OP_GET {OP_GET}
+#define OP_EXIT {OP_EXIT}
+
+#define STATUS_OK {STATUS_OK}
+#define STATUS_CRC {STATUS_CRC}
+#define STATUS_OPCODE {STATUS_OPCODE}
+#define STATUS_ADDR {STATUS_ADDR}
+#define STATUS_COUNT {STATUS_COUNT}
+
+#define MAX_BURST {MAX_BURST}
+#define NUM_SETTERS {max(self.setter_dict, default=-1) + 1}
+#define NUM_GETTERS {max(self.getter_dict, default=-1) + 1}
+
+typedef void (*setter_t)(u32);
+typedef u32 (*getter_t)(void);
+'''
+
+        # add jump tables, unused addresses are NULL
+        setters = ', '.join(f'[{k}] = set_{v}' for k, v in self.setter_dict.items()) or 'NULL'
+        getters = ', '.join(f'[{k}] = get_{v}' for k, v in self.getter_dict.items()) or 'NULL'
+        retval += f'''
+static const setter_t setters[NUM_SETTERS > 0 ? NUM_SETTERS : 1] = {{{setters}}};
+static const getter_t getters[NUM_GETTERS > 0 ? NUM_GETTERS : 1] = {{{getters}}};
+'''
+
+        # add default body
+        retval += r'''
+// CRC-8 with polynomial 0x07
+static u8 crc8(u8 crc, u8 data) {
+    crc ^= data;
+    for (int k = 0; k < 8; k++) {
+        crc = (crc & 0x80) ? (u8)((crc << 1) ^ 0x07) : (u8)(crc << 1);
+    }
+    return crc;
+}
+
+static u8 read_byte(u8 *crc) {
+    u8 data = (u8)inbyte();
+    *crc = crc8(*crc, data);
+    return data;
+}
+
+static void write_byte(u8 data, u8 *crc) {
+    outbyte((char)data);
+    *crc = crc8(*crc, data);
+}
+
+static void respond(u8 status, u8 seq, u8 count, const u32 *values) {
+    u8 crc = 0;
+    outbyte((char)SYNC_RESPONSE);
+    write_byte(status, &crc);
+    write_byte(seq, &crc);
+    write_byte(count, &crc);
+    for (u32 i = 0; i < count; i++) {
+        for (u32 k = 0; k < 4; k++) {
+            write_byte((u8)(values[i] >> (8 * k)), &crc);
+        }
+    }
+    outbyte((char)crc);
+}
+
+int main() {
+    u8 addrs[MAX_BURST];
+    u32 values[MAX_BURST];
+
+    if (init_GPIO() != 0) {
+        xil_printf("GPIO Initialization Failed\r\n");
+        return XST_FAILURE;
+    }
+
+    while (1) {
+        // resynchronize on the start of the next request
+        if ((u8)inbyte() != SYNC_REQUEST) {
+            continue;
+        }
+
+        u8 crc = 0;
+        u8 op = read_byte(&crc);
+        u8 seq = read_byte(&crc);
+        u8 count = read_byte(&crc);
+        if (count > MAX_BURST) {
+            // drain the entries and the CRC of the frame, so that they are not searched for the start of the next
+            // request; the count is a single byte, so at most 255 entries are drained
+            u32 frame_size = count * ((op == OP_SET) ? 5 : 1) + 1;
+            for (u32 i = 0; i < frame_size; i++) {
+                inbyte();
+            }
+            respond(STATUS_COUNT, seq, 0, NULL);
+            continue;
+        }
+
+        for (u32 i = 0; i < count; i++) {
+            addrs[i] = read_byte(&crc);
+            if (op == OP_SET) {
+                values[i] = 0;
+                for (u32 k = 0; k < 4; k++) {
+                    values[i] |= ((u32)read_byte(&crc)) << (8 * k);
+                }
+            }
+        }
+        if ((u8)inbyte() != crc) {
+            respond(STATUS_CRC, seq, 0, NULL);
+            continue;
+        }
+
+        if (op == OP_SET) {
+            // check all addresses before any register is written
+            u8 status = STATUS_OK;
+            for (u32 i = 0; i < count; i++) {
+                if ((addrs[i] >= NUM_SETTERS) || (setters[addrs[i]] == NULL)) {
+                    status = STATUS_ADDR;
+                }
+            }
+            if (status == STATUS_OK) {
+                for (u32 i = 0; i < count; i++) {
+                    setters[addrs[i]](values[i]);
+                }
+            }
+            respond(status, seq, 0, NULL);
+        } else if (op == OP_GET) {
+            u8 status = STATUS_OK;
+            for (u32 i = 0; i < count; i++) {
+                if ((addrs[i] >= NUM_GETTERS) || (getters[addrs[i]] == NULL)) {
+                    status = STATUS_ADDR;
+                }
+            }
+            if (status == STATUS_OK) {
+                for (u32 i = 0; i < count; i++) {
+                    values[i] = getters[addrs[i]]();
+                }
+                respond(status, seq, count, values);
+            } else {
+                respond(status, seq, 0, NULL);
+            }
+        } else if (op == OP_EXIT) {
+            respond(STATUS_OK, seq, 0, NULL);
+            return 0;
+        } else {
+            respond(STATUS_OPCODE, seq, 0, NULL);
+        }
+    }
+
+    return 0;
+}
+'''
+
+        # return the code
+        return retval
+
+    def gen_ascii_src_text(self):
+        """
+        Firmware for the line-based ASCII protocol, e.g. SET_<name> <value>.
+        """
         retval = '''
 #include "gpio_funcs.h"
 #include <stdio.h>
@@ -145,6 +145,15 @@ class Target():
     def result_path_raw(self):
         return os.path.join(self.prj_cfg.build_root, r"raw_results", self.result_name_raw)
 
+    @property
+    def result_path(self):
+        """
+        Path of the converted result file, depending on the project option wave_format either vcd_path or fst_path.
+
+        :return: str
+        """
+        return self.cfg.fst_path if self.prj_cfg.cfg.wave_format == 'fst' else self.cfg.vcd_path
+
     @property
     def probe_file_dump_path(self):
         return os.path.join(self.prj_cfg.build_root, r"raw_results")
@@ -194,7 +203,7 @@ class FPGATarget(Target):
         if self.cfg.fpga_sim_ctrl == FPGASimCtrl.VIVADO_VIO:
             print("No direct control interface from anasymod selected, Vivado VIO interface enabled.")
             self.ctrl = VIOControlInfrastructure(prj_cfg=self.prj_cfg, plugin_includes=self.plugins)
-            self.ctrl_api = VIOCtrlApi(result_path=self.cfg.vcd_path, result_path_raw=self.result_path_raw,
+            self.ctrl_api = VIOCtrlApi(result_path=self.result_path, result_path_raw=self.result_path_raw,
                                        result_type_raw=self.cfg.result_type_raw, pcfg=self.prj_cfg, scfg=self.str_cfg,
                                        bitfile_path=self.bitfile_path, ltxfile_path=self.ltxfile_path,
                                        float_type=self.float_type, debug=debug)
@@ -205,11 +214,12 @@ class FPGATarget(Target):
                                                   plugin_includes=self.plugins,
                                                   tcfg= self.cfg
                                                   )
-            self.ctrl_api = UARTCtrlApi(result_path=self.cfg.vcd_path, result_path_raw=self.result_path_raw,
+            self.ctrl_api = UARTCtrlApi(result_path=self.result_path, result_path_raw=self.result_path_raw,
                                         result_type_raw=self.cfg.result_type_raw, prj_cfg=self.prj_cfg,
                                         scfg=self.str_cfg, content=self.content, ltxfile_path=self.ltxfile_path,
                                         top_module=self.cfg.top_module, project_root=self.project_root,
-                                        float_type=self.float_type
+                                        float_type=self.float_type,
+                                        custom_firmware=self.cfg.custom_zynq_firmware
                                         )
         else:
             raise Exception("ERROR: No FPGA simulation control was selected, shutting down.")
@@ -258,7 +268,15 @@ class Config(BaseConfig):
         """ type(str) : name of the converted vcd simulation result file. """
 
         self.vcd_path = os.path.join(prj_cfg.build_root, r"vcd", self.vcd_name)
-        """ type(str) : path used to store converted vcd simulation result file. """
+        """ type(str) : path used to store converted vcd simulation result file. If the path ends with .gz, .zst or .xz,
+            the converted file is stored compressed. """
+
+        self.fst_name = f"{self.top_module}_{name}.fst"
+        """ type(str) : name of the converted fst simulation result file. """
+
+        self.fst_path = os.path.join(prj_cfg.build_root, r"fst", self.fst_name)
+        """ type(str) : path used to store converted fst simulation result file, if the project option wave_format
+            is set to 'fst'. """
         # TODO: move these paths to toolchain specific config, which shall be instantiated in the target class
 
         self.result_type_raw = None
@@ -0,0 +1,62 @@
+from anasymod.templates.templ import JinjaTempl
+
+class TemplTCL_CTRL_SERVER(JinjaTempl):
+    def __init__(self, port=0, address='127.0.0.1'):
+        super().__init__(trim_blocks=False, lstrip_blocks=False)
+
+        # TCP port the server listens on, 0 lets the OS pick a free port
+        self.port = str(int(port))
+
+        # only accept connections on this address
+        self.address = address
+
+    TEMPLATE_TEXT = '''\
+# Control server for anasymod: evaluates TCL scripts received via a socket. Each request is a 4-byte big-endian
+# length followed by the UTF-8 encoded script, each response a 1-byte status code (0: OK, 1: TCL error, 2: protocol
+# error), a 4-byte big-endian length and the UTF-8 encoded result or error message. While the server runs, the
+# interpreter waits in vwait on ::anasymod_ctrl::done and services requests from the event loop.
+namespace eval ::anasymod_ctrl {
+    variable done 0
+
+    proc accept {chan addr port} {
+        fconfigure $chan -translation binary -buffering full -blocking 1
+        fileevent $chan readable [list ::anasymod_ctrl::serve $chan]
+    }
+
+    proc reply {chan code payload} {
+        # header and payload are sent at once, separate writes would be delayed by the Nagle algorithm
+        set payload [encoding convertto utf-8 $payload]
+        puts -nonewline $chan [binary format cI $code [string length $payload]]$payload
+        flush $chan
+    }
+
+    proc serve {chan} {
+        set header [read $chan 4]
+        if {[string length $header] < 4} {
+            close $chan
+            return
+        }
+        binary scan $header I len
+        set script [read $chan $len]
+        if {[string length $script] < $len} {
+            reply $chan 2 "incomplete request, expected $len bytes"
+            close $chan
+            return
+        }
+        if {[catch {uplevel #0 [encoding convertfrom utf-8 $script]} result options]} {
+            reply $chan 1 [dict get $options -errorinfo]
+        } else {
+            reply $chan 0 $result
+        }
+    }
+}
+
+set ::anasymod_ctrl::server [socket -server ::anasymod_ctrl::accept -myaddr {{subst.address}} {{subst.port}}]
+lindex [fconfigure $::anasymod_ctrl::server -sockname] 2
+'''
+
+def main():
+    print(TemplTCL_CTRL_SERVER().render())
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,288 @@
+import os
+import time
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from anasymod.utils.vcd_columnar import VCDData, VCDSignal, VCDBodyDecoder, GrowableArray, BLOCK_SIZE
+from anasymod.utils.vcd_cache import VCDCache
+from anasymod.utils.vcd_index import VCDIndex, INDEX_INTERVAL, _TIME_MARKER
+from anasymod.utils.compression import open_file, compression_of
 
 __all__ = ["ParseVCD"]
 
+# minimum number of bytes of the VCD body decoded by one worker process in parallel mode
+MIN_RANGE_SIZE = 4 * BLOCK_SIZE
+
+# default time in seconds between two checks for new data when following a VCD file
+FOLLOW_POLL_INTERVAL = 0.5
+
 class ParseVCD:
-    def __init__(self, vcd_root):
+    def __init__(self, vcd_root, cache=False, processes=1):
+        """
+        :param vcd_root: path to the VCD file, files ending with .gz, .zst or .xz are decompressed while reading
+        :param cache: store parsed signals in a binary sidecar cache next to the VCD file and load them from there
+            in subsequent calls, also across Python sessions
+        :param processes: number of worker processes used to decode the VCD body, 0 selects the number of CPU cores
+        """
         self.vcd_root = vcd_root
         self.cycle_value = 'cv'
+        self.cache = VCDCache(vcd_root) if cache else None
+        self.processes = processes
+        self.index = None
+        """ type(VCDIndex) : timestamp index used for windowed access, created on first use. """
+        self._index_key = None
 
-    def parse_vcd(self, sig_names=0, stdout=0, sigs=[], update_data=False):
-        #Initialization
-        usigs = {}
-        data = {}
-        hierarchy = []
-        cycle_cnt = 0
-        
-        for i in sigs:
-            usigs[i] = 1
+    def parse_vcd(self, sig_names=0, stdout=0, sigs=[], update_data=False, t_start=None, t_stop=None):
+        """
+        Compatibility wrapper around parse_columnar, returning value changes as a dict with one entry per identifier
+        code: {'nets': [...], 'cv': [(cycle, value), ...]}.
+
+        :param sig_names: only read the header, no value changes are returned
+        :param stdout: print value changes instead of returning them, only allowed for a single signal
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty
+        :param update_data: add a sample at each timestamp of the VCD file for signals that did not change
+        :param t_start: only return value changes from this timestamp on, see parse_window
+        :param t_stop: only return value changes up to this timestamp, see parse_window
+        """
+        if sig_names:
+            data, _ = self.parse_header(sigs=sigs)
+            return {code: {'nets': signal.nets} for code, signal in data.signals.items()}
 
-        if len(usigs):
-            all_sigs = 0
+        if t_start is not None or t_stop is not None:
+            data = self.parse_window(t_start=t_start, t_stop=t_stop, sigs=sigs)
         else:
-            all_sigs = 1
+            data = self.parse_columnar(sigs=sigs)
+        if stdout and len(data.signals) > 1:
+            raise Exception("Too many signals provided to VCD parser!")
+
+        legacy = data.to_legacy(update_data=update_data)
+        if stdout:
+            for signal in legacy.values():
+                for cycle_cnt, value in signal[self.cycle_value]:
+                    print(cycle_cnt, value)
+            return {code: {'nets': signal['nets']} for code, signal in legacy.items()}
+
+        return legacy
+
+    def parse_columnar(self, sigs=None, block_size=BLOCK_SIZE):
+        """
+        Parse the VCD file in blocks of block_size bytes and store all value changes in typed numpy arrays, one set
+        of columns per identifier code.
+
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty or None
+        :param block_size: number of bytes read and decoded at once
+        :rtype: VCDData
+        """
+        data, offset = self.parse_header(sigs=sigs)
+
+        if self.cache is not None:
+            try:
+                missing = set(data.signals) - self.cache.cached_codes()
+                if missing:
+                    self.cache.store(self._decode_body(data.subset(codes=missing), offset, block_size))
+                self.cache.load(data)
+                return data
+            except OSError as e:
+                print(f'Warning: VCD cache:{self.cache.cache_path} could not be used: {e}')
+                self.cache = None
+                data, offset = self.parse_header(sigs=sigs)
+
+        return self._decode_body(data, offset, block_size)
+
+    def parse_window(self, t_start=None, t_stop=None, sigs=None, block_size=BLOCK_SIZE):
+        """
+        Decode only the value changes within the time window [t_start, t_stop]. Decoding starts at the last
+        checkpoint of the timestamp index before t_start and stops at the first checkpoint after t_stop, so the
+        effort depends on the window size rather than on the file size once the index exists. Each signal starts
+        with a sample at t_start holding its active value.
+
+        :param t_start: first timestamp of the window, start of the simulation if None
+        :param t_stop: last timestamp of the window, end of the simulation if None
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty or None
+        :param block_size: number of bytes read and decoded at once
+        :rtype: VCDData
+        """
+        t_start = 0 if t_start is None else t_start
+        data, offset = self.parse_header(sigs=sigs)
+
+        # signals that are completely available in the cache are sliced directly
+        if self.cache is not None and set(data.signals) <= self.cache.cached_codes():
+            self.cache.load(data)
+            return data.window(t_start, t_stop)
+
+        index = self.build_index()
+        k, stop = index.locate(t_start, t_stop)
+        decoder = VCDBodyDecoder(data=data, time=int(index.time[k]))
+        with open_file(self.vcd_root) as file:
+            file.seek(int(index.offset[k]))
+            decoder.consume(file, block_size=block_size, stop=stop)
+        decoder.finish()
+
+        return data.window(t_start, t_stop, initial=index.snapshot(k, codes=data.signals))
+
+    def parse_span(self, t_start=None, t_stop=None, sigs=None, block_size=BLOCK_SIZE):
+        """
+        Decode the value changes within the time window [t_start, t_stop] together with the last value change at or
+        before t_start and the first value change at or after t_stop of each signal, e.g. the support points of the
+        time probe needed to map a window to emulation time. Decoding covers the checkpoints of the timestamp index
+        around the window; the range is widened, doubling the number of added checkpoints each time, until these
+        value changes are included or the start or end of the file is reached.
 
-        with open(self.vcd_root, 'r') as file:
+        :param t_start: first timestamp of the window, start of the simulation if None
+        :param t_stop: last timestamp of the window, end of the simulation if None
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty or None
+        :param block_size: number of bytes read and decoded at once
+        :rtype: VCDData
+        """
+        t_start = 0 if t_start is None else t_start
+        data, offset = self.parse_header(sigs=sigs)
+
+        # signals that are completely available in the cache are sliced directly
+        if self.cache is not None and set(data.signals) <= self.cache.cached_codes():
+            self.cache.load(data)
+            return data.span(t_start, t_stop)
+
+        index = self.build_index()
+        k = max(int(np.searchsorted(index.time, t_start, side='right')) - 1, 0)
+        j = len(index) if t_stop is None else int(np.searchsorted(index.time, t_stop, side='right'))
+        step = 1
+        while True:
+            decoder = VCDBodyDecoder(data=data, time=int(index.time[k]))
+            with open_file(self.vcd_root) as file:
+                file.seek(int(index.offset[k]))
+                decoder.consume(file, block_size=block_size, stop=int(index.offset[j]) if j < len(index) else None)
+            decoder.finish()
+
+            signals = data.signals.values()
+            before = k == 0 or all(len(signal) and signal.time[0] <= t_start for signal in signals)
+            after = j >= len(index) or all(len(signal) and signal.time[-1] >= t_stop for signal in signals)
+            if before and after:
+                return data.span(t_start, t_stop)
+            if not before:
+                k = max(k - step, 0)
+            if not after:
+                j = min(j + step, len(index))
+            step *= 2
+            data, offset = self.parse_header(sigs=sigs)
+
+    def build_index(self, interval=INDEX_INTERVAL):
+        """
+        Create the timestamp index of the VCD file, if it does not exist yet. The index is stored in the sidecar
+        cache if caching is enabled.
+
+        :param interval: minimum distance in bytes between two checkpoints of the index
+        :rtype: VCDIndex
+        """
+        stat = os.stat(self.vcd_root)
+        if self.index is not None and self._index_key == (stat.st_size, stat.st_mtime_ns):
+            return self.index
+        self.index = None
+        self._index_key = (stat.st_size, stat.st_mtime_ns)
+
+        data, offset = self.parse_header()
+        if self.cache is not None:
+            try:
+                self.index = self.cache.load_index()
+            except (OSError, ValueError) as e:
+                print(f'Warning: VCD index in cache:{self.cache.cache_path} could not be loaded: {e}')
+
+        if self.index is None:
+            self.index = VCDIndex.build(self.vcd_root, data, offset, interval=interval)
+            if self.cache is not None:
+                try:
+                    self.cache.store_index(self.index)
+                except OSError as e:
+                    print(f'Warning: VCD index could not be stored in cache:{self.cache.cache_path}: {e}')
+
+        return self.index
+
+    def follow(self, sigs=None, poll_interval=FOLLOW_POLL_INTERVAL, idle_timeout=None, block_size=BLOCK_SIZE):
+        """
+        Follow a VCD file that is still being written, e.g. by a running simulation, and decode new value changes as
+        they are appended. Incomplete lines are kept until they are completed. Value changes at the most recent
+        timestamp are held back until the next timestamp marker was read, since the simulator may still add value
+        changes for that timestamp. The file and its header don't have to exist yet when following starts.
+
+        Following ends when no new data was appended for idle_timeout seconds; the held back value changes are
+        returned then. The caller may also stop iterating at any time, e.g. to abort a simulation early.
+
+        :param sigs: list of full hierarchical signal names that shall be decoded, all signals if empty or None
+        :param poll_interval: time in seconds to wait before checking the file for new data again
+        :param idle_timeout: time in seconds without new data after which following ends, None to follow forever
+        :param block_size: maximum number of bytes read and decoded at once
+        :return: generator yielding VCDData objects, each holding the value changes decoded since the previous one
+        """
+        if compression_of(self.vcd_root) is not None:
+            raise Exception(f'Compressed VCD file {self.vcd_root} can not be followed.')
+
+        last_data = time.time()
+
+        def idle():
+            if idle_timeout is not None and time.time() - last_data >= idle_timeout:
+                return True
+            time.sleep(poll_interval)
+            return False
+
+        while not os.path.isfile(self.vcd_root) or self._find_header_end() is None:
+            if idle():
+                return
+
+        data, offset = self._read_header()
+        if sigs:
+            data = data.subset(sigs=sigs)
+            if len(data.signals) == 0:
+                raise Exception(f"No matching signals were found reading VCD file: {self.vcd_root}")
+
+        decoder = VCDBodyDecoder(data=data)
+        with open(self.vcd_root, 'rb') as file:
+            file.seek(offset)
             while True:
-                line = file.readline()
-                if line == '':  # End-of-File
-                    self.update_data(cycle_cnt=cycle_cnt, data=data)
+                block = file.read(block_size)
+                if block:
+                    last_data = time.time()
+                    decoder.feed(block)
+                    if len(block) == block_size:
+                        continue
+                    chunk = data.pop_before(decoder.time)
+                    if not chunk.empty:
+                        yield chunk
+                elif file.tell() > os.path.getsize(self.vcd_root):
+                    raise Exception(f'VCD file {self.vcd_root} was truncated while following it.')
+                elif idle():
                     break
-                line = line.strip()
 
-                if line == '':
-                    continue
+        decoder.finish()
+        if not data.empty:
+            yield data
 
-                if line[0] in ('r', 'R', 'b', 'B'):
-                    (value, code) = line[1:].split()
-                    try:
-                        #convert all x and z to 0
-                        if line[0] in ('b', 'B'):
-                            value = value.replace('x', '0').replace('z', '0')
-                        else:
-                            value = float(value)
-                    except:
-                        # This is a quick fix that sets X,Z, ... to 0
-                        value = float(0)
-                    if (code in data):
-                        if (stdout):
-                            print(cycle_cnt, value)
-                        else:
-                            if self.cycle_value not in data[code]:
-                                data[code][self.cycle_value] = []
-                            data[code][self.cycle_value].append((cycle_cnt, value))
-
-                elif line[0] in ('x', 'X', 'z', 'Z', '0', '1'):
-                    value = line[0]
-                    code = line[1:]
-                    if (code in data):
-                        if (stdout):
-                            print(cycle_cnt, value)
-                        else:
-                            if self.cycle_value not in data[code]:
-                                data[code][self.cycle_value] = []
-                            data[code][self.cycle_value].append((cycle_cnt, value))
-
-                elif line[0] == '#':
-                    if update_data: self.update_data(cycle_cnt=cycle_cnt, data=data)
-                    cycle_cnt = int(line[1:])
-
-                elif "$enddefinitions" in line:
-                    num_sigs = len(data)
-                    if (num_sigs == 0):
-                        if (all_sigs):
-                            raise Exception(f"No signals were found reading VCD file {self.vcd_root}")
-                        else:
-                            raise Exception(f"No matching signals were found reading VCD file: {self.vcd_root}")
-                    if ((num_sigs > 1) and stdout):
-                        raise Exception("Too many signals provided to VCD parser!")
-                    if sig_names:
-                        break
+    def parse_header(self, sigs=None):
+        """
+        Read the VCD header up to $enddefinitions.
 
-                elif "$scope" in line:
-                    hierarchy.append(line.split()[2])
-
-                elif "$upscope" in line:
-                    hierarchy.pop()
-
-                elif "$var" in line:
-                    ls = line.split()
-                    type = ls[1]
-                    size = ls[2]
-                    code = ls[3]
-
-                    name = ls[4]
-                    path = '.'.join(hierarchy)
-                    full_name = path + '.' + name
-                    if (full_name in usigs) or all_sigs:
-                        if code not in data:
-                            data[code] = {}
-                        if 'nets' not in data[code]:
-                            data[code]['nets'] = []
-                        var_struct = {
-                            'type': type,
-                            'name': name,
-                            'size': size,
-                            'hier': path,
-                        }
-                        if var_struct not in data[code]['nets']:
-                            data[code]['nets'].append(var_struct)
-
-        file.close()
+        :param sigs: list of full hierarchical signal names that shall be registered, all signals if empty or None
+        :return: VCDData object without value changes and the byte offset at which the VCD body starts
+        :rtype: (VCDData, int)
+        """
+        if self.cache is not None and self.cache.valid():
+            data, offset = self.cache.load_header()
+        else:
+            data, offset = self._read_header()
+            if self.cache is not None:
+                try:
+                    self.cache.store_header(data, offset)
+                except OSError as e:
+                    print(f'Warning: VCD cache:{self.cache.cache_path} could not be created: {e}')
+                    self.cache = None
 
-        return data
-    
-    def update_data(self, cycle_cnt, data):
-        if cycle_cnt != 0:
-            cycle_cnt_old = cycle_cnt
-            for d in data.keys():
-                length = len(data[d][self.cycle_value]) - 1
-                if data[d][self.cycle_value][length][0] != cycle_cnt_old:
-                    data[d][self.cycle_value].append((cycle_cnt_old, data[d][self.cycle_value][length][1]))
+        if len(data.signals) == 0:
+            raise Exception(f"No signals were found reading VCD file {self.vcd_root}")
+
+        if sigs:
+            data = data.subset(sigs=sigs)
+            if len(data.signals) == 0:
+                raise Exception(f"No matching signals were found reading VCD file: {self.vcd_root}")
+
+        return data, offset
 
     def list_sigs(self):
 
@@ -130,3 +295,185 @@ class ParseVCD:
             sigs.extend(n['hier'] + '.' + n['name'] for n in nets)
 
         return sigs
+
+    def _read_header(self):
+        """
+        Parse all declarations of the VCD header.
+
+        :rtype: (VCDData, int)
+        """
+        offset = self._find_header_end()
+        if offset is None:
+            raise Exception(f"No $enddefinitions section was found reading VCD file {self.vcd_root}")
+        with open_file(self.vcd_root) as file:
+            header = file.read(offset)
+
+        data = VCDData()
+        hierarchy = []
+
+        tokens = iter(header[:offset].decode(errors='replace').split())
+        for tok in tokens:
+            if tok == '$scope':
+                args = self._read_section(tokens)
+                hierarchy.append(args[1])
+            elif tok == '$upscope':
+                self._read_section(tokens)
+                hierarchy.pop()
+            elif tok == '$var':
+                args = self._read_section(tokens)
+                type, size, code, name = args[:4]
+                path = '.'.join(hierarchy)
+                if code not in data.signals:
+                    try:
+                        width = int(size)
+                    except ValueError:
+                        width = 1
+                    data.signals[code] = VCDSignal(code=code, var_type=type, width=width)
+                var_struct = {
+                    'type': type,
+                    'name': name,
+                    'size': size,
+                    'hier': path,
+                }
+                if var_struct not in data.signals[code].nets:
+                    data.signals[code].nets.append(var_struct)
+            elif tok == '$timescale':
+                data.timescale = ''.join(self._read_section(tokens))
+            elif tok.startswith('$') and tok not in ('$end', '$enddefinitions'):
+                self._read_section(tokens)
+
+        return data, offset
+
+    def _find_header_end(self):
+        """
+        :return: byte offset right after the $enddefinitions section, None if the file does not contain one (yet)
+        :rtype: int
+        """
+        header = b''
+        with open_file(self.vcd_root) as file:
+            while True:
+                block = file.read(1024 * 1024)
+                header += block
+                pos = header.find(b'$enddefinitions')
+                if pos >= 0:
+                    end = header.find(b'$end', pos + len(b'$enddefinitions'))
+                    if end >= 0:
+                        return end + len(b'$end')
+                if not block:
+                    return None
+
+    def _decode_body(self, data, offset, block_size=BLOCK_SIZE):
+        """
+        Decode all value changes of the signals in data, starting at byte offset of the VCD file.
+
+        :rtype: VCDData
+        """
+        # compressed files can't be split, since each worker would have to decompress the file from its start
+        processes = self.processes if self.processes else os.cpu_count()
+        if processes > 1 and compression_of(self.vcd_root) is None:
+            ranges = self._split_body(offset, processes)
+            if len(ranges) > 1:
+                return self._decode_body_parallel(data, ranges, block_size)
+
+        decoder = VCDBodyDecoder(data=data)
+        with open_file(self.vcd_root) as file:
+            file.seek(offset)
+            decoder.consume(file, block_size=block_size)
+        decoder.finish()
+        return data
+
+    def _split_body(self, offset, num):
+        """
+        Split the VCD body into at most num byte ranges of similar size. Each range except the first one starts at a
+        timestamp marker, so it can be decoded independently.
+
+        :return: list of (start, stop) byte offsets
+        :rtype: list[(int, int)]
+        """
+        size = os.path.getsize(self.vcd_root)
+        num = min(num, (size - offset) // MIN_RANGE_SIZE)
+        bounds = [offset]
+        with open(self.vcd_root, 'rb') as file:
+            for k in range(1, num):
+                pos = max(offset + k * (size - offset) // num, bounds[-1]) - 1
+                file.seek(pos)
+                buf = b''
+                while True:
+                    block = file.read(64 * 1024)
+                    buf += block
+                    m = _TIME_MARKER.search(buf)
+                    if m is not None or not block:
+                        break
+                if m is None:
+                    break
+                bounds.append(pos + m.start(1))
+        bounds.append(size)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _decode_body_parallel(self, data, ranges, block_size=BLOCK_SIZE):
+        """
+        Decode the byte ranges of the VCD body in a process pool and stitch the partial value changes of each signal
+        together in order. Since value changes are stored, each signal keeps its last value across range boundaries
+        until its next change.
+
+        :rtype: VCDData
+        """
+        signals = [(code, signal.var_type, signal.width) for code, signal in data.signals.items()]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            results = list(pool.map(_decode_range, *zip(*[(self.vcd_root, signals, start, stop, block_size)
+                                                           for start, stop in ranges])))
+
+        # a range boundary within a $comment section can't be decoded independently
+        if any(in_comment for _, _, in_comment in results[:-1]):
+            print(f'Warning: VCD file {self.vcd_root} could not be split for parallel decoding, decoding sequentially.')
+            decoder = VCDBodyDecoder(data=data)
+            with open_file(self.vcd_root) as file:
+                file.seek(ranges[0][0])
+                decoder.consume(file, block_size=block_size)
+            decoder.finish()
+            return data
+
+        for code, signal in data.signals.items():
+            parts = [changes[code] for changes, _, _ in results if code in changes]
+            if not parts:
+                continue
+            dtype = np.float64 if any(part[1].dtype == np.float64 for part in parts) else signal.value.dtype
+            signal.set_columns(np.concatenate([part[0] for part in parts]),
+                               np.concatenate([part[1] for part in parts]).astype(dtype, copy=False),
+                               np.concatenate([part[2] for part in parts]))
+        data.timestamps = GrowableArray.from_array(np.concatenate([timestamps for _, timestamps, _ in results]))
+        return data
+
+    @staticmethod
+    def _read_section(tokens):
+        """
+        Collect all tokens up to the next $end keyword.
+        """
+        args = []
+        for tok in tokens:
+            if tok == '$end':
+                break
+            args.append(tok)
+        return args
+
+
+def _decode_range(vcd_root, signals, start, stop, block_size):
+    """
+    Decode the value changes between the byte offsets start and stop of a VCD file, used by worker processes.
+
+    :param signals: list of (code, var_type, width) tuples of the signals to decode
+    :return: dict mapping identifier codes to time, value and xz arrays, array of timestamps and a flag whether
+        the range ended within a $comment section
+    """
+    data = VCDData()
+    for code, var_type, width in signals:
+        data.signals[code] = VCDSignal(code=code, var_type=var_type, width=width)
+
+    decoder = VCDBodyDecoder(data=data)
+    with open(vcd_root, 'rb') as file:
+        file.seek(start)
+        decoder.consume(file, block_size=block_size, stop=stop)
+    decoder.finish()
+
+    changes = {code: (signal.time, signal.value, signal.xz) for code, signal in data.signals.items() if len(signal)}
+    return changes, data.timestamps.view(), decoder._in_comment
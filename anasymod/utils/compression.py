@@ -0,0 +1,54 @@
+import io
+import os
+import gzip
+import lzma
+
+__all__ = ["open_file", "compression_of", "COMPRESSED_EXTENSIONS"]
+
+# file extensions of supported compression formats
+COMPRESSED_EXTENSIONS = ('.gz', '.zst', '.xz')
+
+
+def compression_of(path):
+    """
+    Determine the compression format of a file from its extension.
+
+    :param path: path to the file
+    :return: file extension of the compression format, e.g. '.gz', None for uncompressed files
+    :rtype: str
+    """
+    ext = os.path.splitext(path)[1].lower()
+    return ext if ext in COMPRESSED_EXTENSIONS else None
+
+
+def open_file(path, mode='rb'):
+    """
+    Open a file, which is decompressed or compressed as a stream in case its extension is one of
+    COMPRESSED_EXTENSIONS. Compressed files can only be read or written sequentially; seeking forward in a file opened
+    for reading is supported, but requires decompressing all data up to the target position.
+
+    :param path: path to the file
+    :param mode: 'r' or 'w', followed by 'b' for binary mode
+    :return: file object
+    """
+    ext = compression_of(path)
+    binary = 'b' in mode
+    if ext is None:
+        return open(path, mode)
+    elif ext == '.gz':
+        return gzip.open(path, mode if binary else mode + 't')
+    elif ext == '.xz':
+        return lzma.open(path, mode if binary else mode + 't')
+
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception(f'Python package zstandard is required to access file:{path}, please install it via '
+                        f'"pip install anasymod[zstd]".')
+
+    raw = open(path, mode[0] + 'b')
+    if 'r' in mode:
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return stream if binary else io.TextIOWrapper(stream)
@@ -0,0 +1,171 @@
+import numpy as np
+
+__all__ = ["MinMaxPyramid", "minmax_indices", "lttb_indices", "DECIMATION_METHODS"]
+
+# supported decimation methods
+DECIMATION_METHODS = ('minmax', 'lttb')
+
+# number of buckets of a pyramid level that are combined into one bucket of the next level
+PYRAMID_FACTOR = 8
+
+
+def _check_values(value):
+    if value.ndim != 1:
+        raise Exception('Decimation is not supported for signals wider than 64 bits.')
+
+
+def _reduce(value, imin, imax, factor):
+    """
+    Combine groups of factor consecutive buckets, given by the indices of their minimum and maximum samples.
+    """
+    pad = (-len(imin)) % factor
+    if pad:
+        imin = np.concatenate((imin, np.repeat(imin[-1:], pad)))
+        imax = np.concatenate((imax, np.repeat(imax[-1:], pad)))
+    imin = imin.reshape(-1, factor)
+    imax = imax.reshape(-1, factor)
+    rows = np.arange(len(imin))
+    return imin[rows, np.argmin(value[imin], axis=1)], imax[rows, np.argmax(value[imax], axis=1)]
+
+
+def _slice_extrema(value, lo, hi):
+    """
+    :return: indices of the minimum and maximum sample in value[lo:hi], nothing for an empty range
+    """
+    if hi <= lo:
+        return []
+    return [lo + int(np.argmin(value[lo:hi])), lo + int(np.argmax(value[lo:hi]))]
+
+
+class MinMaxPyramid():
+    """
+    Multiresolution min/max summary of a waveform. Level k splits the samples into buckets of PYRAMID_FACTOR**(k+1)
+    samples and stores the indices of the minimum and maximum sample of each bucket, so min/max decimations of any
+    window and resolution are computed from a few hundred buckets instead of all samples. The pyramid needs about 2.3
+    bytes per sample; it does not keep a reference to the sample values, which are passed to indices instead, so
+    caching a pyramid does not keep its waveform in memory.
+    """
+    def __init__(self, value, factor=PYRAMID_FACTOR):
+        """
+        :param value: 1d array of sample values
+        :param factor: number of buckets of a level combined into one bucket of the next level
+        """
+        _check_values(value)
+        self.num_samples = len(value)
+        """ type(int) : number of samples of the waveform. """
+
+        self.factor = factor
+        """ type(int) : ratio of the bucket sizes of consecutive levels. """
+
+        self.levels = []
+        """ type(list) : tuple of indices of the minimum and maximum sample of each bucket, for each level. """
+
+        if len(value) > factor:
+            idx = np.arange(len(value))
+            level = _reduce(value, idx, idx, factor)
+            self.levels.append(level)
+            while len(level[0]) > factor:
+                level = _reduce(value, *level, factor)
+                self.levels.append(level)
+
+    @property
+    def nbytes(self):
+        return sum(imin.nbytes + imax.nbytes for imin, imax in self.levels)
+
+    def bucket_size(self, level):
+        return self.factor ** (level + 1)
+
+    def indices(self, value, max_points, lo=0, hi=None):
+        """
+        Select the samples of a min/max decimation of a window: the window is split into buckets and the minimum and
+        maximum sample of each bucket are kept, along with the first and last sample of the window.
+
+        :param value: 1d array of sample values the pyramid was built from
+        :param max_points: maximum number of returned samples, at least 6
+        :param lo: index of the first sample of the window
+        :param hi: index after the last sample of the window, end of the waveform if None
+        :return: sorted indices of the selected samples
+        :rtype: numpy.ndarray
+        """
+        if max_points < 6:
+            raise Exception(f'Min/max decimation needs at least 6 points, got max_points={max_points}.')
+        if len(value) != self.num_samples:
+            raise Exception(f'Pyramid was built for {self.num_samples} samples, got {len(value)} values.')
+        hi = len(value) if hi is None else hi
+        if hi - lo <= max_points:
+            return np.arange(lo, hi)
+
+        # two points for the window borders and two for each of the partial buckets at both ends
+        max_buckets = (max_points - 6) // 2
+        level = None
+        for k in range(len(self.levels)):
+            size = self.bucket_size(k)
+            if hi // size - (-(-lo // size)) <= max_buckets * self.factor:
+                level = k
+                break
+        if level is None or max_buckets == 0:
+            return np.unique([lo, hi - 1] + _slice_extrema(value, lo, hi))
+
+        size = self.bucket_size(level)
+        first, last = -(-lo // size), hi // size
+        imin, imax = self.levels[level][0][first:last], self.levels[level][1][first:last]
+        if len(imin) > max_buckets:
+            imin, imax = _reduce(value, imin, imax, -(-len(imin) // max_buckets))
+
+        # buckets that are only partially inside the window are evaluated on the samples directly
+        head = _slice_extrema(value, lo, min(first * size, hi))
+        tail = _slice_extrema(value, max(last * size, lo), hi) if last >= first else []
+        return np.unique(np.concatenate(([lo, hi - 1], head, imin, imax, tail)).astype(np.int64))
+
+
+def minmax_indices(value, max_points, lo=0, hi=None):
+    """
+    Min/max decimation without a precomputed pyramid, see MinMaxPyramid.indices.
+
+    :rtype: numpy.ndarray
+    """
+    hi = len(value) if hi is None else hi
+    return MinMaxPyramid(value[lo:hi]).indices(value[lo:hi], max_points) + lo
+
+
+def lttb_indices(time, value, max_points, lo=0, hi=None):
+    """
+    Largest-Triangle-Three-Buckets decimation of a window: the first and last sample are kept, the samples in between
+    are split into max_points - 2 buckets and from each bucket the sample is selected that forms the largest triangle
+    with the sample selected from the previous bucket and the average of the next bucket. Compared to min/max
+    decimation, the visual shape of the waveform is preserved with fewer points, but single-sample spikes may be lost.
+
+    :param time: 1d array of sample times
+    :param value: 1d array of sample values
+    :param max_points: maximum number of returned samples, at least 3
+    :param lo: index of the first sample of the window
+    :param hi: index after the last sample of the window, end of the waveform if None
+    :return: sorted indices of the selected samples
+    :rtype: numpy.ndarray
+    """
+    _check_values(value)
+    if max_points < 3:
+        raise Exception(f'LTTB decimation needs at least 3 points, got max_points={max_points}.')
+    hi = len(value) if hi is None else hi
+    if hi - lo <= max_points:
+        return np.arange(lo, hi)
+
+    x = np.asarray(time[lo:hi], dtype=np.float64)
+    y = np.asarray(value[lo:hi], dtype=np.float64)
+    n = len(x)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(max_points - 2):
+        start, stop = edges[k], edges[k + 1]
+        if k + 2 < len(edges):
+            next_x, next_y = x[stop:edges[k + 2]].mean(), y[stop:edges[k + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # twice the area of the triangle formed by the last selected point, each candidate and the next average
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[k + 1] = a
+    return selected + lo
@@ -0,0 +1,88 @@
+import numpy as np
+
+__all__ = ["emu_time_offset", "valid_emu_time", "map_to_emu_time", "merge_order"]
+
+
+def emu_time_offset(cycles, times):
+    """
+    Determine the offset between cycle count and emulation time. It is the cycle count of the last sample of the
+    leading, non-decreasing part of the emu_time signal, at which the emulation time is not yet positive.
+
+    :param cycles: cycle counts of the emu_time samples
+    :param times: emulation time of each sample
+    :rtype: int
+    """
+    times = np.asarray(times)
+    stop = (times > 0) | (np.diff(times, prepend=times[:1]) < 0)
+    k = int(np.argmax(stop)) if stop.any() else len(times)
+    return int(cycles[k - 1]) if k > 0 else 0
+
+
+def valid_emu_time(times):
+    """
+    :return: number of leading emu_time samples that are usable; samples from the first negative emulation time on
+        are discarded, since a negative time means that wrapping has occurred
+    :rtype: int
+    """
+    negative = np.asarray(times) < 0
+    return int(np.argmax(negative)) if negative.any() else len(negative)
+
+
+def map_to_emu_time(cycles, emu_cycles, emu_times, offset=0):
+    """
+    Map cycle counts of value changes to emulation time in one vectorized pass. Cycle counts that match an emu_time
+    sample get its time, all others are interpolated linearly between the surrounding emu_time samples, shifted by
+    offset cycles. Value changes after the last emu_time sample can't be mapped.
+
+    :param cycles: int array of cycle counts of value changes
+    :param emu_cycles: sorted int array of cycle counts of the emu_time samples
+    :param emu_times: emulation time of each emu_time sample
+    :param offset: offset between cycle count and emulation time, see emu_time_offset
+    :return: int64 array of emulation times and bool array that flags value changes which could be mapped
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    cycles = np.asarray(cycles, dtype=np.int64)
+    emu_cycles = np.asarray(emu_cycles, dtype=np.int64)
+    emu_times = np.asarray(emu_times, dtype=np.int64)
+    n = len(emu_cycles)
+    if n == 0:
+        return np.zeros(len(cycles), dtype=np.int64), np.zeros(len(cycles), dtype=bool)
+
+    # interval of each value change, changes before the first interval are extrapolated from the first one
+    idx = np.clip(np.searchsorted(emu_cycles - offset, cycles, side='right') - 1, 0, n - 1)
+
+    # value changes at the cycle count of an emu_time sample are assigned to that sample
+    match = np.minimum(np.searchsorted(emu_cycles, cycles, side='left'), n - 1)
+    exact = emu_cycles[match] == cycles
+    idx[exact] = match[exact]
+    last = idx == n - 1
+    valid = exact | ~last
+
+    nxt = np.minimum(idx + 1, n - 1)
+    cycles_in_dt = emu_cycles[nxt] - emu_cycles[idx]
+    dt = emu_times[nxt] - emu_times[idx]
+    interp = ~exact & valid
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = dt[interp] / cycles_in_dt[interp]
+    mapped = emu_times[idx].copy()
+    mapped[interp] = (slope * (cycles[interp] - emu_cycles[idx][interp] + offset) +
+                      emu_times[idx][interp]).astype(np.int64)
+    return mapped, valid
+
+
+def merge_order(times):
+    """
+    Merge several sorted or unsorted event streams into one chronologically ordered stream. Events with equal time
+    keep the order of their streams and, within a stream, their original order.
+
+    :param times: list of int arrays, one per stream
+    :return: stream number and index within the stream of each event in merged order
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    lens = [len(t) for t in times]
+    if sum(lens) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    stream = np.repeat(np.arange(len(times)), lens)
+    index = np.concatenate([np.arange(n) for n in lens])
+    order = np.lexsort((index, stream, np.concatenate([np.asarray(t, dtype=np.int64) for t in times])))
+    return stream[order], index[order]
@@ -0,0 +1,51 @@
+import numpy as np
+
+__all__ = ["to_signed", "to_float"]
+
+
+def to_signed(values, width):
+    """
+    Interpret unsigned values as two's complement numbers of the given width. Bits above width are ignored.
+
+    :param values: uint64 array for width <= 64, otherwise a uint8 matrix with one row of big-endian bytes per value
+        as stored by VCDSignal
+    :param width: number of bits of each value, the MSB is the sign bit
+    :return: int64 array for width <= 64, otherwise an object array of Python ints
+    :rtype: numpy.ndarray
+    """
+    width = int(width)
+    if values.ndim == 1 and width <= 64:
+        values = np.asarray(values, dtype=np.uint64)
+        if width < 64:
+            values = values & np.uint64((1 << width) - 1)
+            sign = np.uint64(1 << (width - 1))
+            # flipping the sign bit and subtracting its weight sign-extends the value
+            return (values ^ sign).astype(np.int64) - np.int64(1 << (width - 1))
+        return values.view(np.int64)
+
+    # wide integer fallback, used for vectors that don't fit into 64 bits
+    if values.ndim == 1:
+        ints = [int(v) for v in values.tolist()]
+    else:
+        ints = [int.from_bytes(row.tobytes(), 'big') for row in values]
+    mask = (1 << width) - 1
+    sign = 1 << (width - 1)
+    result = np.empty(len(ints), dtype=object)
+    result[:] = [((v & mask) ^ sign) - sign for v in ints]
+    return result
+
+
+def to_float(values, width, exponent=None):
+    """
+    Convert unsigned fixed-point values to float64.
+
+    :param values: values as accepted by to_signed
+    :param width: number of bits of each value, the MSB is the sign bit
+    :param exponent: fixed-point exponent, the signed value is scaled by 2**exponent; no scaling if None
+    :rtype: numpy.ndarray
+    """
+    signed = to_signed(values, width).astype(np.float64)
+    if exponent is not None:
+        signed *= 2.0 ** int(exponent)
+    return signed
+
@@ -0,0 +1,341 @@
+import os
+import numpy as np
+
+from anasymod.utils.emu_time import merge_order
+from anasymod.utils.vcd_columnar import VCDData, VCDSignal, GrowableArray, REAL_VAR_TYPES, decode_binary
+from anasymod.utils.vcd_writer import FastVCDWriter, _TIMESCALE_UNITS
+
+__all__ = ["FST_EXTENSION", "is_fst", "FSTWriter", "ParseFST"]
+
+# file extension of FST waveform files
+FST_EXTENSION = '.fst'
+
+
+def is_fst(path):
+    """
+    :param path: path to a waveform file
+    :return: True if the file extension denotes an FST file
+    :rtype: bool
+    """
+    return os.path.splitext(path)[1].lower() == FST_EXTENSION
+
+
+def _fstapi(path):
+    """
+    Import the Python bindings of GTKWave's fstapi library, which are only required to access FST files.
+
+    :return: pylibfst module, providing the cffi lib and ffi objects
+    """
+    try:
+        import pylibfst
+    except ImportError:
+        raise Exception(f'Python package pylibfst is required to access file:{path}, please install it via '
+                        f'"pip install anasymod[fst]".')
+    return pylibfst
+
+
+def _var_type_code(lib, var_type):
+    """
+    Map a VCD variable type, e.g. 'reg', to the corresponding fstapi variable type.
+    """
+    for prefix in ('FST_VT_VCD_', 'FST_VT_SV_'):
+        code = getattr(lib, prefix + var_type.upper(), None)
+        if code is not None:
+            return code
+    raise Exception(f'VCD variable type {var_type} is not supported in FST files.')
+
+
+def _var_type_names(lib):
+    """
+    Map fstapi variable types to the names of the VCD variable types, e.g. 'reg'.
+
+    :rtype: dict[int, str]
+    """
+    names = {}
+    for prefix in ('FST_VT_SV_', 'FST_VT_VCD_'):
+        for attr in dir(lib):
+            if attr.startswith(prefix):
+                names[getattr(lib, attr)] = attr[len(prefix):].lower()
+    return names
+
+
+class FSTWriter(FastVCDWriter):
+    """
+    Writer for GTKWave's FST format with the same interface as FastVCDWriter. Value changes are collected as columns
+    and written via the fstapi library when the writer is closed, so no intermediate VCD file is created. The value
+    changes stored in the FST file are the same ones FastVCDWriter would write to a VCD file.
+    """
+    def __init__(self, path, timescale='1 us', date=None, comment='', version='', scope_sep='.'):
+        """
+        :param path: path of the FST file to be created
+        :param timescale: timescale of the FST file, e.g. '1 fs'
+        :param date: date string stored in the FST header, current date if None
+        :param comment: comment stored in the FST header, omitted if empty
+        :param version: version string stored in the FST header, omitted if empty
+        :param scope_sep: separator for scopes given as strings
+        """
+        super().__init__(file=None, timescale=timescale, date=date, comment=comment, version=version,
+                         scope_sep=scope_sep)
+        self._path = path
+        self._fst = _fstapi(path)
+
+    def close(self, timestamp=None):
+        """
+        Write all collected value changes to the FST file.
+
+        :param timestamp: optional final timestamp of the FST file
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        lib, ffi = self._fst.lib, self._fst.ffi
+        ctx = lib.fstWriterCreate(self._path.encode(), 1)
+        if ctx == ffi.NULL:
+            raise Exception(f'ERROR: FST file: {self._path} could not be created.')
+        try:
+            lib.fstWriterSetTimescaleFromString(ctx, self._header_keywords['$timescale'].replace(' ', '').encode())
+            lib.fstWriterSetDate(ctx, self._header_keywords['$date'].encode())
+            if self._header_keywords['$version']:
+                lib.fstWriterSetVersion(ctx, self._header_keywords['$version'].encode())
+            if self._header_keywords['$comment']:
+                lib.fstWriterSetComment(ctx, self._header_keywords['$comment'].encode())
+
+            # declare the scopes and variables in the same order as in the header of a VCD file
+            handles = {}
+            prev_scope = ()
+            for scope in sorted(self._scope_vars):
+                common = 0
+                while common < min(len(prev_scope), len(scope)) and prev_scope[common] == scope[common]:
+                    common += 1
+                for _ in prev_scope[common:]:
+                    lib.fstWriterSetUpscope(ctx)
+                for name in scope[common:]:
+                    lib.fstWriterSetScope(ctx, lib.FST_ST_VCD_MODULE, name.encode(), ffi.NULL)
+                for name, var in self._scope_vars[scope]:
+                    length = 8 if var.kind == 'real' else var.size
+                    handles[var.ident] = lib.fstWriterCreateVar(ctx, _var_type_code(lib, var.var_type),
+                                                                lib.FST_VD_IMPLICIT, length, name.encode(), 0)
+                prev_scope = scope
+            for _ in prev_scope:
+                lib.fstWriterSetUpscope(ctx)
+
+            # initial values at time 0, followed by the value changes of all variables in chronological order
+            times, values, idents = [], [], []
+            lib.fstWriterEmitTimeChange(ctx, 0)
+            for var, initial, t, v in self._value_changes():
+                handle = handles[var.ident]
+                lib.fstWriterEmitValueChange(ctx, handle, self._encode(var, [initial])[0])
+                times.append(t)
+                values.append(self._encode(var, v))
+                idents.append(handle)
+
+            last = 0
+            stream_idx, event_idx = merge_order(times)
+            for s, k in zip(stream_idx.tolist(), event_idx.tolist()):
+                t = int(times[s][k])
+                if t != last:
+                    lib.fstWriterEmitTimeChange(ctx, t)
+                    last = t
+                lib.fstWriterEmitValueChange(ctx, idents[s], values[s][k])
+
+            if timestamp is not None:
+                if timestamp < last:
+                    raise Exception(f'Out of order final timestamp: {timestamp}')
+                if timestamp > last:
+                    lib.fstWriterEmitTimeChange(ctx, int(timestamp))
+        finally:
+            lib.fstWriterClose(ctx)
+
+    def _encode(self, var, values):
+        """
+        Encode values of a variable as expected by fstWriterEmitValueChange: a double for real variables and one
+        character per bit for all others. Vectors are extended to the full width as VCD readers would do.
+        """
+        suffix = len(var.ident)
+        lines = [line[:-suffix].rstrip() for line in var.format(values)]
+        if var.kind == 'real':
+            return [self._fst.ffi.new('double *', float(v)) for v in values]
+        elif var.kind == 'scalar':
+            return [line.encode() for line in lines]
+        return [(line[1] if line[1] in 'xzXZ' else '0').encode() * (var.size - len(line) + 1) + line[1:].encode()
+                for line in lines]
+
+
+class ParseFST():
+    """
+    Reader for GTKWave's FST format, with the same interface for accessing value changes as ParseVCD. Signals are
+    read natively via the fstapi library, which decodes only the blocks of the requested signals.
+    """
+    def __init__(self, fst_root):
+        """
+        :param fst_root: path to the FST file
+        """
+        self.fst_root = fst_root
+        self._fst = _fstapi(fst_root)
+
+    def parse_header(self, sigs=None):
+        """
+        Read the hierarchy of the FST file.
+
+        :param sigs: list of full hierarchical signal names that shall be registered, all signals if empty or None
+        :return: VCDData object without value changes, identifier codes are the FST handles as str
+        :rtype: VCDData
+        """
+        ctx = self._open()
+        try:
+            data = self._read_header(ctx)
+        finally:
+            self._fst.lib.fstReaderClose(ctx)
+
+        if len(data.signals) == 0:
+            raise Exception(f"No signals were found reading FST file {self.fst_root}")
+        if sigs:
+            data = data.subset(sigs=sigs)
+            if len(data.signals) == 0:
+                raise Exception(f"No matching signals were found reading FST file: {self.fst_root}")
+        return data
+
+    def parse_columnar(self, sigs=None):
+        """
+        Read all value changes of the selected signals and store them in typed numpy arrays, one set of columns per
+        identifier code.
+
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty or None
+        :rtype: VCDData
+        """
+        lib = self._fst.lib
+        ctx = self._open()
+        try:
+            data = self._read_header(ctx)
+            if sigs:
+                data = data.subset(sigs=sigs)
+                if len(data.signals) == 0:
+                    raise Exception(f"No matching signals were found reading FST file: {self.fst_root}")
+
+            # timestamps of all signals, as found in the body of a VCD file
+            lib.fstReaderSetFacProcessMaskAll(ctx)
+            timestamps = self._timestamps(ctx)
+
+            lib.fstReaderClrFacProcessMaskAll(ctx)
+            changes = {}
+            for code in data.signals:
+                lib.fstReaderSetFacProcessMask(ctx, int(code))
+                changes[int(code)] = ([], [])
+            reals = {int(code) for code, signal in data.signals.items() if signal.kind == 'real'}
+
+            # real values are passed as native doubles, so they are read without rounding
+            lib.fstReaderIterBlocksSetNativeDoublesOnCallback(ctx, 1)
+            string, buffer = self._fst.ffi.string, self._fst.ffi.buffer
+
+            def on_change(_, time, handle, value):
+                time_list, value_list = changes[handle]
+                time_list.append(time)
+                value_list.append(buffer(value, 8)[:] if handle in reals else string(value))
+
+            self._fst.fstReaderIterBlocks(ctx, on_change)
+        finally:
+            lib.fstReaderClose(ctx)
+
+        for code, signal in data.signals.items():
+            time_list, value_list = changes[int(code)]
+            time = np.array(time_list, dtype=np.int64)
+            if signal.kind == 'real':
+                value = np.frombuffer(b''.join(value_list), dtype=np.float64).copy()
+                xz = np.zeros(len(value), dtype=np.uint8)
+            else:
+                value, xz = decode_binary(value_list, signal.width)
+            signal.set_columns(time, value, xz)
+        data.timestamps = GrowableArray.from_array(timestamps)
+        return data
+
+    def parse_window(self, t_start=None, t_stop=None, sigs=None):
+        """
+        Read the value changes within the time window [t_start, t_stop], see ParseVCD.parse_window.
+
+        :param t_start: first timestamp of the window, start of the simulation if None
+        :param t_stop: last timestamp of the window, end of the simulation if None
+        :param sigs: list of full hierarchical signal names that shall be read, all signals if empty or None
+        :rtype: VCDData
+        """
+        return self.parse_columnar(sigs=sigs).window(0 if t_start is None else t_start, t_stop)
+
+    def parse_span(self, t_start=None, t_stop=None, sigs=None):
+        """
+        Read the value changes within the time window [t_start, t_stop] together with the neighbouring value changes
+        of each signal, see ParseVCD.parse_span.
+
+        :rtype: VCDData
+        """
+        return self.parse_columnar(sigs=sigs).span(0 if t_start is None else t_start, t_stop)
+
+    def list_sigs(self):
+        """
+        :return: full hierarchical names of all signals in the FST file
+        :rtype: list[str]
+        """
+        return list(self.parse_header().names())
+
+    def _open(self):
+        lib, ffi = self._fst.lib, self._fst.ffi
+        if not os.path.isfile(self.fst_root):
+            raise Exception(f'ERROR: Result file: {self.fst_root} does not exist; cannot read results!')
+        ctx = lib.fstReaderOpen(self.fst_root.encode())
+        if ctx == ffi.NULL:
+            raise Exception(f'ERROR: FST file: {self.fst_root} could not be opened.')
+        return ctx
+
+    def _timestamps(self, ctx):
+        """
+        Collect the timestamps at which the signals selected in the process mask of an opened FST file change,
+        including the end time of the file.
+
+        :rtype: numpy.ndarray
+        """
+        lib, ffi = self._fst.lib, self._fst.ffi
+        ts = lib.fstReaderGetTimestamps(ctx)
+        if ts == ffi.NULL:
+            raise Exception(f'ERROR: Timestamps of FST file: {self.fst_root} could not be read.')
+        try:
+            timestamps = np.frombuffer(ffi.buffer(ts.val, 8 * ts.nvals), dtype=np.uint64).astype(np.int64) \
+                if ts.nvals else np.zeros(0, dtype=np.int64)
+        finally:
+            lib.fstReaderFreeTimestamps(ts)
+        return np.union1d(timestamps, [lib.fstReaderGetEndTime(ctx)])
+
+    def _read_header(self, ctx):
+        """
+        Collect all scopes and variables of an opened FST file, aliases of a variable share its identifier code.
+
+        :rtype: VCDData
+        """
+        lib, ffi = self._fst.lib, self._fst.ffi
+        data = VCDData()
+        exponent = lib.fstReaderGetTimescale(ctx)
+        unit = min(max(exponent // 3, -5), 0)
+        data.timescale = f'{10 ** (exponent - 3 * unit)}{_TIMESCALE_UNITS[-unit]}'
+
+        var_types = _var_type_names(lib)
+        hierarchy = []
+        lib.fstReaderIterateHierRewind(ctx)
+        while True:
+            hier = lib.fstReaderIterateHier(ctx)
+            if hier == ffi.NULL:
+                break
+            if hier.htyp == lib.FST_HT_SCOPE:
+                hierarchy.append(ffi.string(hier.u.scope.name).decode())
+            elif hier.htyp == lib.FST_HT_UPSCOPE:
+                hierarchy.pop()
+            elif hier.htyp == lib.FST_HT_VAR:
+                var_type = var_types.get(hier.u.var.typ, 'wire')
+                code = str(hier.u.var.handle)
+                width = 64 if var_type in REAL_VAR_TYPES else int(hier.u.var.length)
+                if code not in data.signals:
+                    data.signals[code] = VCDSignal(code=code, var_type=var_type, width=width)
+                data.signals[code].nets.append({
+                    'type': var_type,
+                    'name': ffi.string(hier.u.var.name).decode(),
+                    'size': str(width),
+                    'hier': '.'.join(hierarchy),
+                })
+        return data
@@ -0,0 +1,214 @@
+import re
+from itertools import islice
+
+import numpy as np
+
+from anasymod.utils.vcd_columnar import GrowableArray
+
+__all__ = ["ILAData", "decode_digits", "decode_decimal"]
+
+# number of CSV rows converted at once, bounds the memory needed for intermediate Python objects
+CHUNK_ROWS = 65536
+
+# number of bits per digit of the radix formats that Vivado's write_hw_ila_data uses
+_DIGIT_BITS = {'BINARY': 1, 'OCTAL': 3, 'HEX': 4}
+
+# decimal radix formats
+_DECIMAL = ('UNSIGNED', 'SIGNED')
+
+# value of each hexadecimal digit character, other characters (e.g. X) are decoded as 0
+_DIGIT_VALUE = np.zeros(256, dtype=np.uint8)
+for _k, _c in enumerate(b'0123456789abcdef'):
+    _DIGIT_VALUE[_c] = _k
+    _DIGIT_VALUE[ord(chr(_c).upper())] = _k
+
+# bit index range of a probe name, e.g. [15:0] or [3]
+_BIT_RANGE = re.compile(r'\[(\d+)(?::(\d+))?\]\s*$')
+
+
+def _pack(ints, width):
+    """
+    Store Python ints as packed big-endian bytes, as VCDSignal does for vectors wider than 64 bits.
+    """
+    nbytes = (width + 7) // 8
+    mask = (1 << width) - 1
+    packed = b''.join((v & mask).to_bytes(nbytes, 'big') for v in ints)
+    return np.frombuffer(packed, dtype=np.uint8).reshape(len(ints), nbytes)
+
+
+def decode_digits(raw, width, radix):
+    """
+    Decode binary, octal or hexadecimal values of a fixed-width probe in one vectorized pass. Values are right-aligned,
+    i.e. shorter values are zero-extended and digits exceeding the width are ignored.
+
+    :param raw: list or numpy array of bytes objects holding the digits of each value
+    :param width: number of bits of the probe
+    :param radix: 'BINARY', 'OCTAL' or 'HEX'
+    :return: uint64 array for width <= 64, otherwise a uint8 matrix with one row of big-endian bytes per value
+    :rtype: numpy.ndarray
+    """
+    n = len(raw)
+    width = max(int(width), 1)
+    if n == 0:
+        if width > 64:
+            return np.empty((0, (width + 7) // 8), dtype=np.uint8)
+        return np.empty(0, dtype=np.uint64)
+
+    bits_per_digit = _DIGIT_BITS[radix]
+    num_digits = -(-width // bits_per_digit)
+    raw = np.ascontiguousarray(raw, dtype=bytes)
+    if raw.dtype.itemsize == 0:
+        raw = raw.astype('S1')
+    maxlen = raw.dtype.itemsize
+    chars = raw.view(np.uint8).reshape(n, maxlen)
+    lens = (chars != 0).sum(axis=1)
+
+    # right-align all values to num_digits characters
+    idx = np.arange(num_digits)[None, :] - (num_digits - lens)[:, None]
+    chars = np.take_along_axis(chars, np.clip(idx, 0, maxlen - 1), axis=1)
+    digits = np.where(idx >= 0, _DIGIT_VALUE[chars], 0)
+
+    # expand digits to bits, MSB first, and drop the bits above width
+    shifts = np.arange(bits_per_digit - 1, -1, -1, dtype=np.uint8)
+    bits = ((digits[:, :, None] >> shifts) & 1).reshape(n, num_digits * bits_per_digit)[:, -width:]
+
+    if width > 64:
+        return np.packbits(np.pad(bits, ((0, 0), ((-width) % 8, 0))), axis=1)
+    weights = np.left_shift(np.uint64(1), np.arange(width - 1, -1, -1, dtype=np.uint64))
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def decode_decimal(raw, width, signed=True):
+    """
+    Decode decimal values of a fixed-width probe.
+
+    :param raw: list or numpy array of str or bytes objects holding the decimal value of each sample
+    :param width: number of bits of the probe
+    :param signed: True for values given as signed numbers
+    :return: int64 array for signed values of up to 64 bits, uint64 array for unsigned values of up to 64 bits,
+        otherwise a uint8 matrix with one row of big-endian bytes (two's complement) per value
+    :rtype: numpy.ndarray
+    """
+    width = max(int(width), 1)
+    if width > 64:
+        return _pack([int(v) for v in raw], width)
+    dtype = np.int64 if signed else np.uint64
+    try:
+        return np.array(raw).astype(dtype) if len(raw) else np.empty(0, dtype=dtype)
+    except (ValueError, OverflowError):
+        # values exceeding the range of int64, the conversion from str only supports that range
+        return np.array([int(v) for v in raw], dtype=dtype)
+
+
+class ILAData():
+    """
+    Content of a CSV file written by Vivado's write_hw_ila_data. The file is read once, in chunks of rows, and every
+    column is converted to a typed numpy array according to its radix.
+    """
+    def __init__(self):
+        self.names = []
+        """ type(list) : column names without bit index range, in the order of the CSV file. """
+
+        self.columns = {}
+        """ type(dict) : numpy array of each column, see decode_digits and decode_decimal for the datatypes. """
+
+        self.radix = {}
+        """ type(dict) : radix of each column as given by the Radix row, None if the file has no Radix row, in which
+            case values are decoded as signed decimal numbers. """
+
+        self.widths = {}
+        """ type(dict) : number of bits of each column as given by the bit index range in the column name. """
+
+    @classmethod
+    def read(cls, path, chunk_rows=CHUNK_ROWS):
+        """
+        Parse an ILA CSV file in a single pass.
+
+        :param path: path to the CSV file
+        :param chunk_rows: number of rows converted at once
+        :rtype: ILAData
+        """
+        data = cls()
+        with open(path, 'rb') as f:
+            header = [name.strip() for name in f.readline().decode().split(',')]
+            for name in header:
+                m = _BIT_RANGE.search(name)
+                if m is None:
+                    width = 1
+                else:
+                    msb, lsb = int(m.group(1)), int(m.group(2) if m.group(2) is not None else m.group(1))
+                    width = abs(msb - lsb) + 1
+                    name = name[:name.index('[')]
+                data.names.append(name)
+                data.widths[name] = width
+
+            # detect the optional Radix row, e.g. 'Radix - UNSIGNED,HEX,SIGNED'
+            first_rows = []
+            line = f.readline()
+            if line.startswith(b'Radix'):
+                radix = [r.strip().upper() for r in line.decode().split(',')]
+                radix[0] = radix[0].split('-')[-1].strip()
+            else:
+                radix = [None] * len(header)
+                first_rows.append(line)
+            for name, r in zip(data.names, radix):
+                if r is not None and r not in _DIGIT_BITS and r not in _DECIMAL:
+                    raise Exception(f'Radix {r} of column {name} in ILA CSV file {path} is not supported.')
+                data.radix[name] = r
+
+            # a name used by several columns refers to the last of them
+            index = {name: k for k, name in enumerate(data.names)}
+            arrays = {}
+            for name in index:
+                width = data.widths[name]
+                if width > 64:
+                    arrays[name] = GrowableArray(np.uint8, shape=((width + 7) // 8,))
+                elif data.radix[name] in _DIGIT_BITS or data.radix[name] == 'UNSIGNED':
+                    arrays[name] = GrowableArray(np.uint64)
+                else:
+                    arrays[name] = GrowableArray(np.int64)
+
+            while True:
+                lines = first_rows + list(islice(f, chunk_rows))
+                first_rows = []
+                if not lines:
+                    break
+
+                # tokenize the whole chunk at once into a matrix of bytes objects with one row per CSV row
+                lines = [line for line in lines if line.strip()]
+                tokens = b''.join(lines).translate(None, b' \t\r').replace(b'\n', b',').split(b',')
+                if tokens[-1] == b'':
+                    tokens.pop()
+                if len(tokens) != len(lines) * len(header):
+                    raise Exception(f'ILA CSV file {path} contains rows that do not have {len(header)} columns.')
+                table = np.array(tokens, dtype=bytes).reshape(len(lines), len(header))
+
+                for name, k in index.items():
+                    col = np.ascontiguousarray(table[:, k])
+                    try:
+                        if data.radix[name] in _DIGIT_BITS:
+                            values = decode_digits(col, data.widths[name], data.radix[name])
+                        else:
+                            values = decode_decimal(col, data.widths[name], signed=data.radix[name] != 'UNSIGNED')
+                    except (ValueError, OverflowError):
+                        raise Exception(f'Could not convert values of column {name} in ILA CSV file {path}.')
+                    arrays[name].extend(values)
+
+        for name, arr in arrays.items():
+            arr.compact()
+            data.columns[name] = arr.view()
+        return data
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def to_ints(self, name):
+        """
+        :param name: column name without bit index range
+        :return: values of a column as Python ints, values wider than 64 bits are returned unsigned
+        :rtype: list
+        """
+        values = self.columns[name]
+        if values.ndim == 1:
+            return values.tolist()
+        return [int.from_bytes(row.tobytes(), 'big') for row in values]
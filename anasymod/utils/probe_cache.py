@@ -0,0 +1,139 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ["ProbeCache", "data_size", "ANY"]
+
+# wildcard for ProbeCache.discard, None is a valid run, e.g. the results of the last run
+ANY = object()
+
+
+def data_size(data):
+    """
+    :param data: probed waveform, e.g. a ProbeData object or a numpy array
+    :return: number of bytes held by the arrays of data
+    :rtype: int
+    """
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if hasattr(data, 'nbytes'):
+        return int(data.nbytes)
+    return sys.getsizeof(data)
+
+
+class ProbeCache():
+    """
+    In-memory cache for probed waveforms, which can be shared by the Probe objects of several targets. Entries are
+    keyed by target, run and signal name, plus an optional variant for derived waveforms, e.g. ones mapped to emulation
+    time. Once the size of all entries exceeds the byte budget, the least recently used entries are evicted. The cache
+    may be used from several threads, e.g. when the runs of a sweep are loaded in parallel.
+    """
+    def __init__(self, max_bytes=None):
+        """
+        :param max_bytes: byte budget of the cache, None for no limit and 0 to disable caching
+        """
+        self.max_bytes = max_bytes
+        """ type(int) : byte budget of the cache, None for no limit. """
+
+        self.nbytes = 0
+        """ type(int) : number of bytes held by all cached waveforms. """
+
+        self.hits = 0
+        """ type(int) : number of lookups that were served from the cache. """
+
+        self.misses = 0
+        """ type(int) : number of lookups for waveforms that were not cached. """
+
+        self.evictions = 0
+        """ type(int) : number of entries that were evicted to stay within the byte budget. """
+
+        # maps (target, run, signal, variant) to (data, size), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """
+        :param key: tuple of target, run and signal name, optionally followed by the variant
+        """
+        return tuple(key) + (None,) * (4 - len(key)) in self._entries
+
+    def get(self, target, run, signal, variant=None):
+        """
+        Look up a waveform and mark it as most recently used.
+
+        :return: cached waveform, None if it is not cached
+        """
+        key = (target, run, signal, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, target, run, signal, data, variant=None):
+        """
+        Store a waveform as most recently used entry and evict least recently used entries until the cache fits
+        into its budget again. Waveforms larger than the whole budget are not cached.
+        """
+        key = (target, run, signal, variant)
+        size = data_size(data)
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (data, size)
+            self.nbytes += size
+            while self.max_bytes is not None and self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def discard(self, target=ANY, run=ANY, signal=ANY):
+        """
+        Remove all entries matching the given target, run and signal, ANY matches any value.
+
+        :return: number of removed entries
+        :rtype: int
+        """
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (target is ANY or key[0] == target) and (run is ANY or key[1] == run) and
+                    (signal is ANY or key[2] == signal)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def runs(self, target):
+        """
+        :return: sorted list of runs of a target that have cached waveforms
+        :rtype: list
+        """
+        with self._lock:
+            return sorted({key[1] for key in self._entries if key[0] == target}, key=str)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """
+        :return: hit, miss and eviction counts as well as number of entries and bytes currently cached
+        :rtype: dict
+        """
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, entries=len(self._entries),
+                    nbytes=self.nbytes, max_bytes=self.max_bytes)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
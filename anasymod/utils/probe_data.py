@@ -0,0 +1,234 @@
+import numpy as np
+
+__all__ = ["ProbeData", "StepView", "change_mask", "stack_runs"]
+
+
+def change_mask(value, xz=None):
+    """
+    Flag the first sample and each sample that differs from its predecessor in value or X/Z state.
+
+    :param value: array of values, with one row per sample for packed values
+    :param xz: optional X/Z mask
+    :rtype: numpy.ndarray
+    """
+    value = np.asarray(value)
+    mask = np.ones(len(value), dtype=bool)
+    if len(value) > 1:
+        diff = value[1:] != value[:-1]
+        if diff.ndim > 1:
+            diff = diff.any(axis=1)
+        if xz is not None:
+            diff |= xz[1:] != xz[:-1]
+        mask[1:] = diff
+    return mask
+
+
+class ProbeData():
+    """
+    Waveform of a probe stored as parallel typed arrays: a time array, a value array and an X/Z mask, all with one
+    entry per sample. Times are int64 cycle counts, or float64 seconds if the waveform was mapped to emulation time.
+    Values are float64 for real signals and the time probe, uint64 for digital signals up to 64 bits and a uint8 matrix
+    with one row of big-endian bytes per sample for wider ones. X and Z samples have a value of 0 and are flagged in
+    xz with the states defined in vcd_columnar.
+
+    For compatibility with the former representation as 2d array, data[0] returns the time and data[1] the value
+    array, a ProbeData object unpacks into (time, value) and numpy.asarray stacks both arrays into a 2d array.
+    """
+    def __init__(self, time, value, xz=None):
+        self.time = time
+        """ type(np.ndarray) : time of each sample. """
+
+        self.value = value
+        """ type(np.ndarray) : value of each sample. """
+
+        self.xz = xz if xz is not None else np.zeros(len(time), dtype=np.uint8)
+        """ type(np.ndarray) : uint8 mask flagging X and Z samples. """
+
+    def __getitem__(self, k):
+        return (self.time, self.value)[k]
+
+    def __iter__(self):
+        return iter((self.time, self.value))
+
+    def __len__(self):
+        return 2
+
+    def __array__(self, dtype=None, copy=None):
+        if self.value.ndim == 1:
+            return np.array([self.time, self.value], dtype=dtype)
+        # values wider than 64 bits are converted to Python ints
+        stacked = np.empty((2, len(self.time)), dtype=object)
+        stacked[0] = self.time.tolist()
+        stacked[1] = [int.from_bytes(row.tobytes(), 'big') for row in self.value]
+        return stacked if dtype is None else stacked.astype(dtype)
+
+    def __repr__(self):
+        return f'ProbeData(time={self.time!r}, value={self.value!r}, xz={self.xz!r})'
+
+    @property
+    def shape(self):
+        """
+        Shape of the equivalent 2d array.
+        """
+        return (2, len(self.time))
+
+    @property
+    def num_samples(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes held by all arrays.
+        """
+        return self.time.nbytes + self.value.nbytes + self.xz.nbytes
+
+    def setflags(self, write):
+        """
+        Set the writeable flag of all arrays, e.g. to protect cached waveforms against modification.
+        """
+        for arr in (self.time, self.value, self.xz):
+            arr.setflags(write=write)
+
+    def copy(self):
+        return ProbeData(self.time.copy(), self.value.copy(), self.xz.copy())
+
+    def changed(self):
+        """
+        Flag each sample that differs from its predecessor in value or X/Z state, the first sample is never flagged.
+
+        :rtype: numpy.ndarray
+        """
+        changed = change_mask(self.value, self.xz)
+        changed[:1] = False
+        return changed
+
+    def compress(self):
+        """
+        Run-length compression: drop samples that repeat the value and X/Z state of their predecessor. The first and
+        the last sample are always kept, so the waveform keeps its time range and step semantics.
+
+        :return: compressed waveform, self if no sample is redundant
+        :rtype: ProbeData
+        """
+        keep = change_mask(self.value, self.xz)
+        keep[-1:] = True
+        if keep.all():
+            return self
+        return self.take(keep)
+
+    def take(self, idx):
+        """
+        Select samples by index or boolean mask.
+
+        :rtype: ProbeData
+        """
+        return ProbeData(self.time[idx], self.value[idx], self.xz[idx])
+
+
+class StepView():
+    """
+    Step representation of a waveform that does not copy its samples: each sample holds its value until the time of
+    the next sample. Measurements such as limit checks or value lookups can work on this view directly, while
+    materialize inserts the samples needed to preserve the stepping in a sampled waveform, see Analysis.preserve.
+    """
+    def __init__(self, wave):
+        """
+        :param wave: ProbeData object, or 2d numpy.ndarray holding time and values
+        """
+        if not isinstance(wave, ProbeData):
+            wave = ProbeData(np.asarray(wave[0]), np.asarray(wave[1]))
+
+        self.wave = wave
+        """ type(ProbeData) : underlying waveform, shared and not copied. """
+
+        self.changes = np.flatnonzero(wave.changed())
+        """ type(np.ndarray) : indices of the samples whose value or X/Z state differs from their predecessor. """
+
+    def __len__(self):
+        """
+        Number of samples of the materialized waveform.
+        """
+        return self.wave.num_samples + len(self.changes)
+
+    @property
+    def time(self):
+        return self.wave.time
+
+    @property
+    def value(self):
+        return self.wave.value
+
+    @property
+    def xz(self):
+        return self.wave.xz
+
+    def index_at(self, t):
+        """
+        :param t: time or array of times
+        :return: index of the sample that holds the value at each time, -1 for times before the first sample
+        """
+        return np.searchsorted(self.wave.time, t, side='right') - 1
+
+    def value_at(self, t):
+        """
+        :param t: time or array of times, must not be before the first sample
+        :return: value of the waveform at each time
+        """
+        idx = self.index_at(t)
+        if np.any(idx < 0):
+            raise Exception(f'Waveform is not defined before its first sample at {self.wave.time[0]}.')
+        return self.wave.value[idx]
+
+    def materialize(self):
+        """
+        Expand the steps into a sampled waveform: for each value change, a sample holding the previous value is
+        inserted at the time of the change. Each array is allocated once and filled by index.
+
+        :rtype: ProbeData
+        """
+        wave = self.wave
+        num_samples, num_changes = wave.num_samples, len(self.changes)
+
+        # position of each original sample, shifted by the number of samples inserted before it
+        pos = np.arange(num_samples)
+        if num_changes:
+            pos += np.cumsum(np.bincount(self.changes, minlength=num_samples))
+        # inserted samples directly precede the changed sample
+        ins = pos[self.changes] - 1
+
+        arrays = []
+        for arr, prev in ((wave.time, wave.time[self.changes]), (wave.value, wave.value[self.changes - 1]),
+                          (wave.xz, wave.xz[self.changes - 1])):
+            out = np.empty((num_samples + num_changes,) + arr.shape[1:], dtype=arr.dtype)
+            out[pos] = arr
+            out[ins] = prev
+            arrays.append(out)
+        return ProbeData(*arrays)
+
+
+def stack_runs(waves, dt=None, method='zoh'):
+    """
+    Combine the waveforms of one signal from several runs, e.g. as returned by Analysis.probe for a list of runs, into
+    arrays with one row per run. Without dt, all waveforms need the same number of samples, as is the case for runs
+    with the same stimulus and time base.
+
+    :param waves: dict mapping run ids to ProbeData objects
+    :param dt: if given, the waveforms are first resampled onto a common uniform grid with this time step, from the
+        latest first sample to the latest last sample of all runs
+    :param method: resampling method, 'zoh' or 'linear'
+    :return: run ids, and time, value and xz arrays with a leading run axis
+    :rtype: (list, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    if dt is not None:
+        # imported here, since resample depends on this module
+        from anasymod.utils.resample import resample
+        waves = resample(waves, dt, method=method)
+    run_nums = list(waves)
+    lens = {len(waves[run_num].time) for run_num in run_nums}
+    if len(lens) > 1:
+        raise Exception(f'Waveforms of runs {run_nums} have different numbers of samples ({sorted(lens)}) and cannot '
+                        f'be stacked.')
+    return (run_nums, np.stack([waves[run_num].time for run_num in run_nums]),
+            np.stack([waves[run_num].value for run_num in run_nums]),
+            np.stack([waves[run_num].xz for run_num in run_nums]))
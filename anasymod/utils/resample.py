@@ -0,0 +1,135 @@
+import numpy as np
+
+from anasymod.utils.probe_data import ProbeData
+
+__all__ = ["RESAMPLE_METHODS", "RESAMPLE_CHUNK", "uniform_grid", "resample", "iter_resample"]
+
+# supported resampling methods: zero-order hold and linear interpolation
+RESAMPLE_METHODS = ('zoh', 'linear')
+
+# number of grid points resampled at once when streaming
+RESAMPLE_CHUNK = 1 << 20
+
+
+def _as_probe_data(wave):
+    if isinstance(wave, ProbeData):
+        return wave
+    return ProbeData(np.asarray(wave[0]), np.asarray(wave[1]))
+
+
+def _grid_bounds(waves, t_start, t_stop):
+    """
+    By default, the grid starts once all waveforms are defined and ends with the last sample of any waveform.
+    """
+    if t_start is None:
+        t_start = max(wave.time[0] for wave in waves.values() if wave.num_samples)
+    if t_stop is None:
+        t_stop = max(wave.time[-1] for wave in waves.values() if wave.num_samples)
+    return t_start, t_stop
+
+
+def uniform_grid(t_start, t_stop, dt):
+    """
+    :return: number of points of a uniform grid from t_start to t_stop, t_stop included if it lies on the grid
+    :rtype: int
+    """
+    if dt <= 0:
+        raise Exception(f'Time step of resampling grid must be positive, got dt={dt}.')
+    if t_stop < t_start:
+        return 0
+    # tolerate rounding errors of t_stop - t_start, so that t_stop is on the grid if it is a multiple of dt
+    return int(np.floor((t_stop - t_start) / dt * (1 + 1e-12))) + 1
+
+
+class _Resampler():
+    """
+    Resampling state of one waveform. Samples that share their time with the next sample, e.g. cycles mapped to the
+    same emulation time, are dropped, since the value of the last of them is the one that is held.
+    """
+    def __init__(self, wave, method):
+        if wave.num_samples == 0:
+            raise Exception('Cannot resample a waveform without samples.')
+        last = np.ones(wave.num_samples, dtype=bool)
+        last[:-1] = wave.time[1:] != wave.time[:-1]
+        self.wave = wave if last.all() else wave.take(last)
+        self.method = method
+        if method == 'linear' and self.wave.value.ndim > 1:
+            raise Exception('Linear interpolation is not supported for signals wider than 64 bits.')
+
+    def __call__(self, grid):
+        wave = self.wave
+        # index of the sample holding the value at each grid point, the first sample is held back to the grid start
+        idx = np.searchsorted(wave.time, grid, side='right') - 1
+        np.maximum(idx, 0, out=idx)
+        if self.method == 'zoh':
+            value = wave.value[idx]
+        else:
+            value = np.interp(grid, wave.time, wave.value.astype(np.float64, copy=False))
+        return value, wave.xz[idx]
+
+
+def iter_resample(waves, dt, t_start=None, t_stop=None, method='zoh', chunk_size=RESAMPLE_CHUNK):
+    """
+    Resample event-based waveforms onto a shared uniform time grid, streamed in chunks of grid points, so grids that
+    do not fit into memory can be processed chunk by chunk.
+
+    :param waves: dict mapping names to ProbeData objects or 2d arrays holding time and values, all with the same
+        time basis, i.e. all in cycle counts or all in emulation time
+    :param dt: time step of the grid, in the time basis of the waveforms
+    :param t_start: first grid point, by default the latest first sample of all waveforms
+    :param t_stop: last grid point, by default the latest last sample of all waveforms
+    :param method: 'zoh' to hold the value of the last sample before each grid point, 'linear' to interpolate
+        linearly between samples, which returns float64 values
+    :param chunk_size: maximum number of grid points per chunk
+    :return: iterator over dicts mapping each name to a ProbeData object holding one chunk of the grid. All objects of
+        a chunk share the same time array. Grid points before the first sample of a waveform take the value of the
+        first sample, X/Z states are taken from the held sample.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise Exception(f'Resampling method {method} is not supported, use one of: {RESAMPLE_METHODS}')
+    waves = {name: _as_probe_data(wave) for name, wave in waves.items()}
+    if not waves:
+        return
+    t_start, t_stop = _grid_bounds(waves, t_start, t_stop)
+    num_points = uniform_grid(t_start, t_stop, dt)
+    resamplers = {name: _Resampler(wave, method) for name, wave in waves.items()}
+
+    for first in range(0, num_points, chunk_size):
+        # grid points are computed from their index, so rounding errors do not accumulate across chunks
+        grid = t_start + dt * np.arange(first, min(first + chunk_size, num_points), dtype=np.float64)
+        chunk = {}
+        for name, resampler in resamplers.items():
+            chunk[name] = ProbeData(grid, *resampler(grid))
+        yield chunk
+
+
+def resample(waves, dt, t_start=None, t_stop=None, method='zoh', chunk_size=RESAMPLE_CHUNK):
+    """
+    Resample event-based waveforms onto a shared uniform time grid, see iter_resample. The result arrays are allocated
+    once and filled chunk by chunk, so intermediate arrays only need memory for one chunk.
+
+    :return: dict mapping each name to a ProbeData object on the grid, all sharing the same time array
+    :rtype: dict[str, ProbeData]
+    """
+    waves = {name: _as_probe_data(wave) for name, wave in waves.items()}
+    if not waves:
+        return {}
+    t_start, t_stop = _grid_bounds(waves, t_start, t_stop)
+    num_points = uniform_grid(t_start, t_stop, dt)
+
+    time = t_start + dt * np.arange(num_points, dtype=np.float64)
+    results = {}
+    for name, wave in waves.items():
+        dtype = np.float64 if method == 'linear' else wave.value.dtype
+        results[name] = ProbeData(time, np.empty((num_points,) + wave.value.shape[1:], dtype=dtype),
+                                  np.empty(num_points, dtype=wave.xz.dtype))
+
+    first = 0
+    for chunk in iter_resample(waves, dt, t_start=t_start, t_stop=t_stop, method=method, chunk_size=chunk_size):
+        num_samples = 0
+        for name, data in chunk.items():
+            num_samples = data.num_samples
+            results[name].value[first:first + num_samples] = data.value
+            results[name].xz[first:first + num_samples] = data.xz
+        first += num_samples
+    return results
@@ -0,0 +1,147 @@
+import os
+import shutil
+import datetime
+
+import yaml
+
+from anasymod.files import mkdir_p
+
+__all__ = ["Run", "RunRegistry"]
+
+# name of the index file listing all stored runs
+INDEX_NAME = 'runs.yaml'
+
+
+class Run():
+    """
+    Results of one simulation or emulation run, as stored by RunRegistry.
+    """
+    def __init__(self, id, target, kind, result_path, params=None, created=None):
+        self.id = id
+        """ type(int) : unique number of the run. """
+
+        self.target = target
+        """ type(str) : name of the target that produced the results. """
+
+        self.kind = kind
+        """ type(str) : 'simulate' or 'emulate'. """
+
+        self.result_path = result_path
+        """ type(str) : path of the stored result file. """
+
+        self.params = params if params is not None else {}
+        """ type(dict) : parameters of the run, as provided by the user. """
+
+        self.created = created
+        """ type(str) : date and time the run was stored. """
+
+    def __repr__(self):
+        return f'Run(id={self.id}, target={self.target!r}, kind={self.kind!r}, params={self.params!r})'
+
+
+class RunRegistry():
+    """
+    Persistent store for the results of simulation and emulation runs. Each run gets a unique id and its converted
+    result file is kept in a directory of its own, so results of parameter or corner sweeps can be analyzed after
+    all runs finished, also from later Python sessions. Runs are listed in an index file in the root directory,
+    together with the id of the next run, so ids of removed runs are never given to new runs.
+    """
+    def __init__(self, root, max_runs=None):
+        """
+        :param root: directory the runs are stored in, must not be inside a directory that is cleaned by simulate
+        :param max_runs: maximum number of stored runs, the oldest runs are removed when a new run exceeds it; None
+            keeps all runs
+        """
+        self.root = root
+        self.max_runs = max_runs
+        self.index_path = os.path.join(root, INDEX_NAME)
+        self._runs = None
+        self._next_id = None
+
+    def record(self, target, kind, result_path, params=None):
+        """
+        Store the result file of a run by copying it into a directory of its own. The file is not hard-linked, since
+        result files are overwritten in place by subsequent runs. If more than max_runs runs are stored afterwards,
+        the oldest ones are removed.
+
+        :param target: name of the target that produced the results
+        :param kind: 'simulate' or 'emulate'
+        :param result_path: path to the converted result file
+        :param params: dict of parameters describing the run, e.g. the sweep point; values should be plain Python
+            types, so that they can be stored in the index file
+        :rtype: Run
+        """
+        if not os.path.isfile(result_path):
+            raise Exception(f'ERROR: Result file: {result_path} does not exist; cannot store run!')
+        params = dict(params or {})
+        try:
+            yaml.safe_dump(params)
+        except yaml.YAMLError:
+            raise Exception(f'Parameters of run could not be stored in run registry: {self.index_path}, only plain '
+                            f'Python types are supported.')
+
+        runs = self._load()
+        run_id = self._next_id
+        self._next_id += 1
+        run_dir = os.path.join(self.root, f'run_{run_id}')
+        mkdir_p(run_dir)
+        stored_path = os.path.join(run_dir, os.path.basename(result_path))
+        shutil.copy2(result_path, stored_path)
+
+        run = Run(id=run_id, target=target, kind=kind, result_path=stored_path, params=params,
+                  created=datetime.datetime.now().isoformat(timespec='seconds'))
+        runs[run_id] = run
+        if self.max_runs is not None:
+            for old_id in sorted(runs)[:max(len(runs) - max(self.max_runs, 1), 0)]:
+                shutil.rmtree(os.path.dirname(runs.pop(old_id).result_path), ignore_errors=True)
+        self._save()
+        return run
+
+    def runs(self, target=None):
+        """
+        :param target: only return runs of this target, all runs if None
+        :return: runs ordered by id
+        :rtype: list[Run]
+        """
+        return [run for _, run in sorted(self._load().items()) if target is None or run.target == target]
+
+    def get(self, run_id):
+        """
+        :rtype: Run
+        """
+        runs = self._load()
+        if run_id not in runs:
+            raise Exception(f'Run {run_id} is not stored in run registry: {self.index_path}')
+        return runs[run_id]
+
+    def remove(self, run_id):
+        """
+        Delete a run and its result files.
+        """
+        run = self.get(run_id)
+        shutil.rmtree(os.path.dirname(run.result_path), ignore_errors=True)
+        del self._runs[run_id]
+        self._save()
+
+    def _load(self):
+        if self._runs is None:
+            self._runs = {}
+            index = {}
+            if os.path.isfile(self.index_path):
+                with open(self.index_path, 'r') as f:
+                    index = yaml.safe_load(f) or {}
+            # index files of earlier versions only hold the list of runs
+            if isinstance(index, list):
+                index = dict(runs=index)
+            for entry in index.get('runs', []):
+                entry['result_path'] = os.path.join(self.root, entry['result_path'])
+                self._runs[entry['id']] = Run(**entry)
+            self._next_id = max(index.get('next_id', 1), max(self._runs, default=0) + 1)
+        return self._runs
+
+    def _save(self):
+        entries = [dict(id=run.id, target=run.target, kind=run.kind, created=run.created, params=run.params,
+                        result_path=os.path.relpath(run.result_path, self.root)) for run in self.runs()]
+        mkdir_p(self.root)
+        with open(self.index_path, 'w') as f:
+            yaml.safe_dump(dict(next_id=self._next_id, runs=entries), f, default_flow_style=False, sort_keys=False)
@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+import shutil
+import numpy as np
+
+from anasymod.utils.vcd_columnar import VCDData, VCDSignal, GrowableArray
+from anasymod.utils.vcd_index import VCDIndex
+
+__all__ = ["VCDCache"]
+
+# version of the on-disk layout, caches written with a different version are discarded
+CACHE_VERSION = 2
+
+# the content hash covers HASH_SAMPLES blocks of HASH_BLOCK_SIZE bytes spread evenly across the VCD file, including
+# its first and last block; files of up to HASH_SAMPLES * HASH_BLOCK_SIZE bytes are hashed completely
+HASH_BLOCK_SIZE = 64 * 1024
+HASH_SAMPLES = 64
+
+
+class VCDCache():
+    """
+    Binary sidecar cache for parsed VCD files. The cache is a directory next to the VCD file, which holds the header
+    information in meta.json and one set of .npy files per parsed signal. Signals are memory-mapped when loaded, so
+    only the data that is actually accessed is read from disk.
+
+    The cache is only used if it was created for a VCD file with the same path, size, modification time and content
+    hash. To keep validation cheap for large files, the content hash covers HASH_SAMPLES blocks spread across the
+    file, so a file larger than HASH_SAMPLES * HASH_BLOCK_SIZE bytes that is rewritten with the same size within the
+    resolution of its modification time is only detected if one of the sampled blocks changed. In case result files
+    are rewritten this way, the cache can be bypassed with the project option vcd_cache or removed with clear.
+    """
+    def __init__(self, vcd_path, cache_path=None):
+        """
+        :param vcd_path: path to the VCD file
+        :param cache_path: directory used to store the cache, default is <vcd_path>.cache
+        """
+        self.vcd_path = vcd_path
+        self.cache_path = cache_path if cache_path is not None else vcd_path + '.cache'
+        self._meta = None
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.cache_path, 'meta.json')
+
+    def key(self):
+        """
+        Identify the current state of the VCD file.
+
+        :rtype: dict
+        """
+        stat = os.stat(self.vcd_path)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.vcd_path, 'rb') as f:
+            if stat.st_size <= HASH_SAMPLES * HASH_BLOCK_SIZE:
+                digest.update(f.read())
+            else:
+                last = stat.st_size - HASH_BLOCK_SIZE
+                for k in range(HASH_SAMPLES):
+                    f.seek(k * last // (HASH_SAMPLES - 1))
+                    digest.update(f.read(HASH_BLOCK_SIZE))
+
+        return {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(self.vcd_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': digest.hexdigest(),
+        }
+
+    @property
+    def meta(self):
+        """
+        Meta information of a valid cache, None if there is no cache or it does not match the VCD file.
+
+        :rtype: dict
+        """
+        if self._meta is not None:
+            stat = os.stat(self.vcd_path)
+            key = self._meta['key']
+            if (key['size'], key['mtime']) == (stat.st_size, stat.st_mtime_ns):
+                return self._meta
+            self._meta = None
+
+        if os.path.isfile(self.meta_path):
+            try:
+                with open(self.meta_path, 'r') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if meta.get('key') == self.key():
+                self._meta = meta
+        return self._meta
+
+    def valid(self):
+        return self.meta is not None
+
+    def cached_codes(self):
+        """
+        :return: identifier codes, for which value changes are stored in the cache
+        :rtype: set[str]
+        """
+        if self.meta is None:
+            return set()
+        return {code for code, sig in self.meta['signals'].items() if sig['file'] is not None}
+
+    def load_header(self):
+        """
+        Create a VCDData object from the cached header, no value changes are loaded.
+
+        :return: VCDData object and byte offset of the VCD body
+        :rtype: (VCDData, int)
+        """
+        data = VCDData()
+        data.timescale = self.meta['timescale']
+        for code, sig in self.meta['signals'].items():
+            signal = VCDSignal(code=code, var_type=sig['var_type'], width=sig['width'])
+            signal.nets = sig['nets']
+            data.signals[code] = signal
+        return data, self.meta['offset']
+
+    def load(self, data: VCDData):
+        """
+        Memory-map the cached value changes for all signals in data.
+        """
+        for code, signal in data.signals.items():
+            name = self.meta['signals'][code]['file']
+            signal.set_columns(*(self._load_array(f'{name}.{col}.npy') for col in ('time', 'value', 'xz')))
+        data.timestamps = GrowableArray.from_array(self._load_array('timestamps.npy'))
+
+    def store_header(self, data: VCDData, offset):
+        """
+        Create a new cache holding the header information of all signals in data, but no value changes. An existing
+        cache is replaced.
+
+        :param offset: byte offset of the VCD body
+        """
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+        os.makedirs(self.cache_path, exist_ok=True)
+
+        meta = {'key': self.key(), 'offset': offset, 'timescale': data.timescale, 'next_file': 0, 'signals': {}}
+        for code, signal in data.signals.items():
+            meta['signals'][code] = {'nets': signal.nets, 'var_type': signal.var_type, 'width': signal.width,
+                                     'file': None}
+        self._write_meta(meta)
+
+    def store(self, data: VCDData):
+        """
+        Add the value changes of all signals in data to a cache created by store_header.
+
+        :param data: parsed VCD data, must contain all value changes of its signals
+        """
+        meta = self.meta
+        if not os.path.isfile(os.path.join(self.cache_path, 'timestamps.npy')):
+            np.save(os.path.join(self.cache_path, 'timestamps.npy'), data.timestamps.view())
+
+        for code, signal in data.signals.items():
+            entry = meta['signals'][code]
+            if entry['file'] is not None:
+                continue
+            name = f'sig{meta["next_file"]}'
+            for col, arr in (('time', signal.time), ('value', signal.value), ('xz', signal.xz)):
+                np.save(os.path.join(self.cache_path, f'{name}.{col}.npy'), arr)
+            entry['file'] = name
+            meta['next_file'] += 1
+
+        self._write_meta(meta)
+
+    def load_index(self):
+        """
+        :return: timestamp index stored in the cache, None if no index was stored yet
+        :rtype: VCDIndex
+        """
+        if not self.meta.get('index', False):
+            return None
+        return VCDIndex.load(os.path.join(self.cache_path, 'index.npz'))
+
+    def store_index(self, index: VCDIndex):
+        """
+        Add a timestamp index to a cache created by store_header.
+        """
+        meta = self.meta
+        index.save(os.path.join(self.cache_path, 'index.npz'))
+        meta['index'] = True
+        self._write_meta(meta)
+
+    def clear(self):
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+        self._meta = None
+
+    def _write_meta(self, meta):
+        # meta information is written last and replaced atomically, so an interrupted store leaves a consistent cache
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta = meta
+
+    def _load_array(self, name):
+        path = os.path.join(self.cache_path, name)
+        try:
+            return np.load(path, mmap_mode='r')
+        except ValueError:
+            # empty arrays can't be memory-mapped
+            return np.load(path)
@@ -0,0 +1,872 @@
+import numpy as np
+
+__all__ = ["GrowableArray", "VCDSignal", "VCDData", "VCDBodyDecoder",
+           "decode_binary", "decode_real", "decode_scalar"]
+
+# default number of bytes read from a VCD file at once
+BLOCK_SIZE = 1024 * 1024
+
+# states stored in the xz mask of a signal
+XZ_NONE = 0
+XZ_X = 1
+XZ_Z = 2
+
+# VCD variable types that carry floating point values
+REAL_VAR_TYPES = ('real', 'realtime')
+
+# lookup tables used to decode single bit value changes
+_SCALAR_VALUE = np.zeros(256, dtype=np.uint64)
+_SCALAR_VALUE[ord('1')] = 1
+_SCALAR_XZ = np.zeros(256, dtype=np.uint8)
+for _c in b'xX':
+    _SCALAR_XZ[_c] = XZ_X
+for _c in b'zZ':
+    _SCALAR_XZ[_c] = XZ_Z
+_SCALAR_CHARS = np.frombuffer(b'01xzXZ', dtype=np.uint8)
+
+# simulation keywords that may appear on their own line within the VCD body
+_BODY_KEYWORDS = {b'$dumpvars', b'$dumpall', b'$dumpon', b'$dumpoff', b'$end'}
+
+
+class GrowableArray():
+    """
+    Append-only numpy array with amortized constant time growth. Used to collect value changes of a signal without
+    storing individual Python objects per sample.
+    """
+    def __init__(self, dtype, shape=(), capacity=1024):
+        """
+        :param dtype: numpy datatype of stored elements
+        :param shape: shape of each element, e.g. (n,) to store a row of n bytes per sample
+        :param capacity: number of elements to allocate initially
+        """
+        self.shape = tuple(shape)
+        self._buf = np.empty((capacity,) + self.shape, dtype=dtype)
+        self._len = 0
+
+    @classmethod
+    def from_array(cls, arr):
+        """
+        Wrap an existing array, e.g. a memory-mapped one, without copying it. The data is only copied once further
+        elements are appended.
+        """
+        obj = cls.__new__(cls)
+        obj.shape = arr.shape[1:]
+        obj._buf = arr
+        obj._len = len(arr)
+        return obj
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def dtype(self):
+        return self._buf.dtype
+
+    def append(self, value):
+        self.extend(np.asarray([value], dtype=self._buf.dtype))
+
+    def extend(self, values):
+        """
+        Append all elements of values to the array, growing the buffer geometrically if needed.
+        """
+        values = np.asarray(values, dtype=self._buf.dtype)
+        n = self._len + len(values)
+        if n > len(self._buf):
+            capacity = max(n, 2 * len(self._buf))
+            buf = np.empty((capacity,) + self.shape, dtype=self._buf.dtype)
+            buf[:self._len] = self._buf[:self._len]
+            self._buf = buf
+        self._buf[self._len:n] = values
+        self._len = n
+
+    def view(self):
+        """
+        Return a view on all stored elements, no data is copied.
+        """
+        return self._buf[:self._len]
+
+    def compact(self):
+        """
+        Release memory that was reserved for future growth.
+        """
+        if len(self._buf) != self._len:
+            self._buf = self._buf[:self._len].copy()
+
+    def astype(self, dtype):
+        """
+        Convert stored elements to a different datatype in-place.
+        """
+        self._buf = self._buf.astype(dtype)
+
+
+class VCDSignal():
+    """
+    Columnar storage of all value changes for one VCD identifier code. Timestamps are stored as int64, values as
+    float64 for real signals, uint64 for vectors up to 64 bits and as packed bits (one row of big-endian bytes per
+    sample) for wider vectors. X and Z states are kept in a separate uint8 mask.
+    """
+    def __init__(self, code, var_type, width):
+        self.code = code
+        self.var_type = var_type
+        self.width = width
+        self.nets = []
+        """ :type : list[dict]"""
+
+        if var_type in REAL_VAR_TYPES:
+            self.kind = 'real'
+            self._value = GrowableArray(np.float64)
+        elif width > 64:
+            self.kind = 'packed'
+            self._value = GrowableArray(np.uint8, shape=((width + 7) // 8,))
+        else:
+            self.kind = 'uint'
+            self._value = GrowableArray(np.uint64)
+
+        self._time = GrowableArray(np.int64)
+        self._xz = GrowableArray(np.uint8)
+
+    def __len__(self):
+        return len(self._time)
+
+    @property
+    def name(self):
+        """
+        Full hierarchical name of the first net mapped to this identifier code.
+        """
+        net = self.nets[0]
+        return net['hier'] + '.' + net['name']
+
+    @property
+    def time(self):
+        return self._time.view()
+
+    @property
+    def value(self):
+        return self._value.view()
+
+    @property
+    def xz(self):
+        return self._xz.view()
+
+    def extend(self, time, value, xz):
+        self._time.extend(time)
+        self._value.extend(value)
+        self._xz.extend(xz)
+
+    def set_columns(self, time, value, xz):
+        """
+        Replace all value changes by the given arrays, which are used without copying.
+        """
+        self._time = GrowableArray.from_array(time)
+        self._value = GrowableArray.from_array(value)
+        self._xz = GrowableArray.from_array(xz)
+        if value.dtype == np.float64:
+            self.kind = 'real'
+
+    def compact(self):
+        for arr in (self._time, self._value, self._xz):
+            arr.compact()
+
+    def clear(self):
+        """
+        Remove all value changes, the datatype of the value storage is kept.
+        """
+        self._time = GrowableArray(np.int64)
+        self._value = GrowableArray(self._value.dtype, shape=self._value.shape)
+        self._xz = GrowableArray(np.uint8)
+
+    def promote_to_real(self):
+        """
+        Switch value storage to float64, e.g. if a signal that was not declared as real receives real value changes.
+        """
+        if self.kind == 'uint':
+            self._value.astype(np.float64)
+            self.kind = 'real'
+
+    def held(self, times):
+        """
+        Return value changes extended by an additional sample for each timestamp in times, at which the signal did
+        not change. The inserted samples hold the previous value, timestamps before the first value change are
+        ignored.
+
+        :param times: sorted int64 array of timestamps
+        :return: tuple of time, value and xz arrays
+        """
+        time = self.time
+        if len(time) == 0:
+            return time, self.value, self.xz
+
+        extra = times[times >= time[0]]
+        extra = extra[~np.isin(extra, time)]
+        if len(extra) == 0:
+            return time, self.value, self.xz
+
+        src = np.concatenate((np.arange(len(time)), np.searchsorted(time, extra, side='right') - 1))
+        merged_time = np.concatenate((time, extra))
+        order = np.argsort(merged_time, kind='stable')
+        src = src[order]
+        return merged_time[order], self.value[src], self.xz[src]
+
+    def window(self, t_start, t_stop=None, initial=None):
+        """
+        Return the value changes within [t_start, t_stop]. The value that is active at t_start is reported as a
+        sample at t_start, so the window starts with a defined value whenever it is known.
+
+        :param t_start: first timestamp of the window
+        :param t_stop: last timestamp of the window, None for no upper limit
+        :param initial: tuple of value and xz state active before the first stored value change, None if unknown
+        :return: tuple of time, value and xz arrays
+        """
+        time = self.time
+        lo = int(np.searchsorted(time, t_start, side='right'))
+        hi = len(time) if t_stop is None else int(np.searchsorted(time, t_stop, side='right'))
+        hi = max(hi, lo)
+
+        if lo > 0:
+            initial = (self.value[lo - 1], self.xz[lo - 1])
+        if initial is None:
+            return time[lo:hi], self.value[lo:hi], self.xz[lo:hi]
+
+        value = np.empty((hi - lo + 1,) + self.value.shape[1:], dtype=self.value.dtype)
+        value[0] = initial[0]
+        value[1:] = self.value[lo:hi]
+        return (np.concatenate(([t_start], time[lo:hi])).astype(np.int64), value,
+                np.concatenate(([initial[1]], self.xz[lo:hi])).astype(np.uint8))
+
+    def span(self, t_start, t_stop=None):
+        """
+        Return the value changes within [t_start, t_stop], extended by the last value change at or before t_start and
+        the first value change at or after t_stop. No sample is inserted, so the result holds actual value changes
+        only, e.g. the support points of the time probe around a window.
+
+        :param t_start: first timestamp of the span
+        :param t_stop: last timestamp of the span, None for no upper limit
+        :return: tuple of time, value and xz arrays
+        """
+        time = self.time
+        lo = max(int(np.searchsorted(time, t_start, side='right')) - 1, 0)
+        hi = len(time) if t_stop is None else min(int(np.searchsorted(time, t_stop, side='left')) + 1, len(time))
+        return time[lo:hi], self.value[lo:hi], self.xz[lo:hi]
+
+    def to_legacy(self, time=None, value=None, xz=None):
+        """
+        Convert value changes to the list of (cycle, value) tuples that ParseVCD.parse_vcd used to return. Vectors
+        are returned as binary strings with X and Z replaced by 0, reals as float, single bits as characters.
+        """
+        time = self.time if time is None else time
+        value = self.value if value is None else value
+        xz = self.xz if xz is None else xz
+
+        cycles = time.tolist()
+        if self.kind == 'real':
+            values = value.tolist()
+        elif self.kind == 'packed':
+            values = [format(int.from_bytes(row.tobytes(), 'big'), 'b') for row in value]
+        elif self.width == 1:
+            values = [('x' if s == XZ_X else 'z' if s == XZ_Z else '1' if v else '0')
+                      for v, s in zip(value.tolist(), xz.tolist())]
+        else:
+            values = [format(v, 'b') for v in value.tolist()]
+
+        return list(zip(cycles, values))
+
+
+class VCDData():
+    """
+    Container for the header information and the columnar value changes of a VCD file.
+    """
+    def __init__(self):
+        self.signals = {}
+        """ :type : dict[str, VCDSignal]"""
+
+        self.timescale = None
+        """ type(str) : timescale as stated in the VCD header, e.g. '1fs'. """
+
+        self.timestamps = GrowableArray(np.int64)
+        """ type(GrowableArray) : all timestamps found in the VCD body in order of appearance. """
+
+    @property
+    def end_time(self):
+        timestamps = self.timestamps.view()
+        return int(timestamps[-1]) if len(timestamps) else 0
+
+    @property
+    def empty(self):
+        """
+        True if neither timestamps nor value changes are stored.
+        """
+        return len(self.timestamps) == 0 and all(len(signal) == 0 for signal in self.signals.values())
+
+    def names(self):
+        """
+        Map each full hierarchical net name to its identifier code.
+
+        :rtype: dict[str, str]
+        """
+        names = {}
+        for code, signal in self.signals.items():
+            for net in signal.nets:
+                names[net['hier'] + '.' + net['name']] = code
+        return names
+
+    def signal(self, name):
+        """
+        Return the signal for a full hierarchical net name.
+
+        :rtype: VCDSignal
+        """
+        try:
+            return self.signals[self.names()[name]]
+        except KeyError:
+            raise KeyError(f'Signal:{name} was not found in VCD data.')
+
+    def compact(self):
+        for signal in self.signals.values():
+            signal.compact()
+        self.timestamps.compact()
+
+    def subset(self, sigs=None, codes=None):
+        """
+        Create a VCDData object sharing the signal objects selected by full hierarchical names and/or identifier
+        codes. Nets that don't match sigs are dropped from the selected signals.
+
+        :param sigs: list of full hierarchical signal names, all signals if empty or None
+        :param codes: identifier codes to select, all codes if None
+        :rtype: VCDData
+        """
+        usigs = set(sigs) if sigs else set()
+
+        data = VCDData()
+        data.timescale = self.timescale
+        data.timestamps = self.timestamps
+        for code, signal in self.signals.items():
+            if codes is not None and code not in codes:
+                continue
+            if usigs:
+                nets = [net for net in signal.nets if net['hier'] + '.' + net['name'] in usigs]
+                if not nets:
+                    continue
+                if len(nets) != len(signal.nets):
+                    sub = VCDSignal(code=code, var_type=signal.var_type, width=signal.width)
+                    sub.nets = nets
+                    sub.kind, sub._time, sub._value, sub._xz = signal.kind, signal._time, signal._value, signal._xz
+                    signal = sub
+            data.signals[code] = signal
+        return data
+
+    def window(self, t_start, t_stop=None, initial=None):
+        """
+        Create a VCDData object holding only the value changes within [t_start, t_stop], see VCDSignal.window.
+
+        :param initial: dict mapping identifier codes to the value and xz state active before the first stored
+            value change of a signal, e.g. taken from a checkpoint of a VCDIndex
+        :rtype: VCDData
+        """
+        if t_stop is not None and t_stop < t_start:
+            raise Exception(f'Window end:{t_stop} is smaller than window start:{t_start}.')
+        initial = initial if initial is not None else {}
+
+        data = VCDData()
+        data.timescale = self.timescale
+        timestamps = self.timestamps.view()
+        keep = timestamps >= t_start
+        if t_stop is not None:
+            keep &= timestamps <= t_stop
+        data.timestamps = GrowableArray.from_array(timestamps[keep])
+
+        for code, signal in self.signals.items():
+            sub = VCDSignal(code=code, var_type=signal.var_type, width=signal.width)
+            sub.nets = signal.nets
+            sub.set_columns(*signal.window(t_start, t_stop, initial=initial.get(code)))
+            data.signals[code] = sub
+        return data
+
+    def span(self, t_start, t_stop=None):
+        """
+        Create a VCDData object holding the value changes within [t_start, t_stop] together with the neighbouring
+        value changes of each signal, see VCDSignal.span. Timestamps are kept from the earliest selected value change
+        on, and up to the latest one or to the end if a signal does not change at or after t_stop.
+
+        :rtype: VCDData
+        """
+        data = VCDData()
+        data.timescale = self.timescale
+        t_first, t_last = t_start, t_stop
+        for code, signal in self.signals.items():
+            sub = VCDSignal(code=code, var_type=signal.var_type, width=signal.width)
+            sub.nets = signal.nets
+            sub.set_columns(*signal.span(t_start, t_stop))
+            data.signals[code] = sub
+            if len(sub):
+                t_first = min(t_first, int(sub.time[0]))
+            if t_last is not None:
+                t_last = max(t_last, int(sub.time[-1])) if len(sub) and sub.time[-1] >= t_stop else None
+
+        timestamps = self.timestamps.view()
+        keep = timestamps >= t_first
+        if t_last is not None:
+            keep &= timestamps <= t_last
+        data.timestamps = GrowableArray.from_array(timestamps[keep])
+        return data
+
+    def pop_before(self, time):
+        """
+        Remove all value changes and timestamps before time and return them as a new VCDData object.
+
+        :rtype: VCDData
+        """
+        data = VCDData()
+        data.timescale = self.timescale
+
+        timestamps = self.timestamps.view()
+        k = int(np.searchsorted(timestamps, time, side='left'))
+        data.timestamps = GrowableArray.from_array(timestamps[:k].copy())
+        self.timestamps = GrowableArray.from_array(timestamps[k:].copy())
+
+        for code, signal in self.signals.items():
+            n = int(np.searchsorted(signal.time, time, side='left'))
+            columns = (signal.time, signal.value, signal.xz)
+            sub = VCDSignal(code=code, var_type=signal.var_type, width=signal.width)
+            sub.nets = signal.nets
+            sub.set_columns(*(col[:n].copy() for col in columns))
+            signal.set_columns(*(col[n:].copy() for col in columns))
+            data.signals[code] = sub
+        return data
+
+    def to_legacy(self, update_data=False):
+        """
+        Convert to the nested dict returned by ParseVCD.parse_vcd. Every signal is held until the last timestamp. In
+        case update_data is set, each signal is held at all timestamps found in the VCD body.
+
+        :rtype: dict
+        """
+        hold_times = self._hold_times(update_data)
+        data = {}
+        for code, signal in self.signals.items():
+            time, value, xz = signal.held(hold_times)
+            data[code] = {'nets': signal.nets, 'cv': signal.to_legacy(time=time, value=value, xz=xz)}
+        return data
+
+    def columns(self, code, update_data=False):
+        """
+        Value changes of one signal with the same samples as returned by to_legacy, but as columnar arrays.
+
+        :param code: identifier code of the signal
+        :return: tuple of time, value and xz arrays
+        """
+        return self.signals[code].held(self._hold_times(update_data))
+
+    def _hold_times(self, update_data):
+        timestamps = self.timestamps.view()
+        if update_data:
+            return np.unique(timestamps[timestamps != 0])
+        end_time = self.end_time
+        return np.array([end_time] if end_time != 0 else [], dtype=np.int64)
+
+
+def decode_scalar(raw):
+    """
+    Decode single bit value changes.
+
+    :param raw: bytes object containing one character ('0', '1', 'x', 'z') per value change
+    :return: tuple of uint64 values and uint8 xz mask
+    """
+    codes = np.frombuffer(raw, dtype=np.uint8)
+    return _SCALAR_VALUE[codes], _SCALAR_XZ[codes]
+
+
+def _segments(raw):
+    """
+    Concatenate raw values into one character buffer.
+
+    :return: tuple of uint8 character buffer, start offset and length of each value
+    """
+    n = len(raw)
+    lens = np.fromiter(map(len, raw), dtype=np.int64, count=n)
+    if not lens.all():
+        raw = [v or b'0' for v in raw]
+        lens[lens == 0] = 1
+    starts = np.zeros(n, dtype=np.int64)
+    np.cumsum(lens[:-1], out=starts[1:])
+    return np.frombuffer(b''.join(raw), dtype=np.uint8), starts, lens
+
+
+def _gather(buf, starts, lens):
+    """
+    Copy the segments of buf given by starts and lens into one contiguous buffer.
+
+    :return: tuple of uint8 character buffer and start offset of each segment within it
+    """
+    new_starts = np.zeros(len(lens), dtype=np.int64)
+    np.cumsum(lens[:-1], out=new_starts[1:])
+    idx = np.arange(int(lens.sum())) + np.repeat(starts - new_starts, lens)
+    return buf[idx], new_starts
+
+
+def _decode_positional(chars, starts, lens, digit, base):
+    """
+    Convert each segment of chars to an integer, the weight of a digit is given by its distance to the end of the
+    segment. Supported bases are 2 and 256 (uint64 result, trailing 64 bits are kept) and 10 (int64 result, at most
+    18 digits).
+    """
+    power = np.repeat(starts + lens, lens) - 1 - np.arange(len(chars))
+    if base == 10:
+        contrib = digit.astype(np.int64) * (np.int64(10) ** np.minimum(power, 18))
+        return np.add.reduceat(contrib, starts, dtype=np.int64)
+
+    shift = power * {2: 1, 256: 8}[base]
+    digit = np.where(shift < 64, digit, 0).astype(np.uint64)
+    contrib = np.left_shift(digit, np.minimum(shift, 63).astype(np.uint64))
+    return np.add.reduceat(contrib, starts, dtype=np.uint64)
+
+
+def _xz_mask(chars, starts):
+    """
+    Flag each value that contains an X (or otherwise a Z) character.
+    """
+    lower = chars | 0x20
+    has_x = np.maximum.reduceat((lower == ord('x')).view(np.uint8), starts)
+    has_z = np.maximum.reduceat((lower == ord('z')).view(np.uint8), starts)
+    xz = np.where(has_z, XZ_Z, XZ_NONE).astype(np.uint8)
+    xz[has_x.astype(bool)] = XZ_X
+    return xz
+
+
+def _decode_packed(raw, width):
+    """
+    Decode binary vectors wider than 64 bits into packed big-endian bytes.
+    """
+    n = len(raw)
+    maxlen = max(max(len(v) for v in raw), 1)
+    chars = np.array(raw, dtype=f'S{maxlen}').view(np.uint8).reshape(n, maxlen)
+    lens = (chars != 0).sum(axis=1)
+
+    # right-align all values to width characters, shorter values are extended with '0' as defined for VCD
+    idx = np.arange(width)[None, :] - (width - lens)[:, None]
+    chars = np.take_along_axis(chars, np.clip(idx, 0, maxlen - 1), axis=1)
+    bits = (chars == ord('1')) & (idx >= 0)
+
+    pad = (-width) % 8
+    bits = np.pad(bits, ((0, 0), (pad, 0)))
+    return np.packbits(bits, axis=1)
+
+
+def decode_binary(raw, width):
+    """
+    Decode binary vector value changes, e.g. b'1010' or b'10x1'. X and Z bits are decoded as 0 and flagged in the xz
+    mask.
+
+    :param raw: list of bytes objects holding the binary digits of each value change
+    :param width: number of bits of the vector
+    :return: tuple of values and uint8 xz mask; values are uint64 for width <= 64, otherwise a uint8 matrix with
+        one row of big-endian bytes per value change
+    """
+    n = len(raw)
+    width = max(width, 1)
+    if n == 0:
+        if width > 64:
+            return np.empty((0, (width + 7) // 8), dtype=np.uint8), np.empty(0, dtype=np.uint8)
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8)
+
+    chars, starts, lens = _segments(raw)
+    xz = _xz_mask(chars, starts)
+
+    if width > 64:
+        return _decode_packed(raw, width), xz
+
+    return _decode_positional(chars, starts, lens, chars == ord('1'), base=2), xz
+
+
+def decode_real(raw):
+    """
+    Decode real value changes; values that can't be converted, e.g. X or Z are decoded as 0.0 and flagged in the xz
+    mask.
+
+    :param raw: list of bytes objects holding the textual representation of each value
+    :return: tuple of float64 values and uint8 xz mask
+    """
+    xz = np.zeros(len(raw), dtype=np.uint8)
+    try:
+        values = np.array(raw, dtype=bytes).astype(np.float64)
+    except ValueError:
+        values = np.empty(len(raw), dtype=np.float64)
+        for k, v in enumerate(raw):
+            try:
+                values[k] = float(v)
+            except ValueError:
+                values[k] = 0.0
+                xz[k] = XZ_X
+    return values, xz
+
+
+class VCDBodyDecoder():
+    """
+    Decoder for the value change section of a VCD file. The body is fed in blocks of arbitrary size; each block of
+    complete lines is tokenized and decoded in bulk and the value changes are appended to the columnar arrays of the
+    signals in the VCDData object.
+    """
+    def __init__(self, data: VCDData, time=0):
+        """
+        :param data: VCDData object created from the VCD header; only signals contained in data.signals are decoded
+        :param time: timestamp that is active before the first timestamp in the body
+        """
+        self.data = data
+        self.time = time
+        self._codes = {code.encode(): code for code in data.signals}
+        self._remainder = b''
+        self._in_comment = False
+
+        # identifier codes encoded as integers, used to group value changes in vectorized decoding
+        codes = sorted((int.from_bytes(raw, 'big'), code) for raw, code in self._codes.items() if len(raw) <= 8)
+        self._keys = (np.array([k for k, _ in codes], dtype=np.uint64), [code for _, code in codes])
+
+    def feed(self, block):
+        """
+        Decode all complete lines of block, an incomplete last line is kept until the next call.
+        """
+        block = self._remainder + block
+        cut = block.rfind(b'\n') + 1
+        self._remainder = block[cut:]
+        if cut:
+            self._decode(block[:cut])
+
+    def finish(self):
+        """
+        Decode any remaining input and release memory reserved for growth of the signal arrays.
+        """
+        if self._remainder:
+            self._decode(self._remainder + b'\n')
+            self._remainder = b''
+        self.data.compact()
+
+    def consume(self, file, block_size=BLOCK_SIZE, stop=None):
+        """
+        Feed file content from the current position until EOF or the byte offset stop is reached.
+        """
+        while True:
+            size = block_size if stop is None else min(block_size, stop - file.tell())
+            if size <= 0:
+                break
+            block = file.read(size)
+            if not block:
+                break
+            self.feed(block)
+
+    def _decode(self, text):
+        if self._in_comment or not self._decode_lines(text):
+            self._decode_tokens(text)
+
+    def _decode_lines(self, text):
+        """
+        Vectorized decoding of a block of complete lines, each holding exactly one timestamp, value change or
+        simulation keyword, which is the layout written by all common simulators.
+
+        :return: False if the block does not match this layout; nothing is decoded in that case
+        """
+        buf = np.frombuffer(text, dtype=np.uint8)
+        if (buf == 9).any():
+            return False
+
+        # locate lines, ignoring carriage returns and empty lines
+        ends = np.flatnonzero(buf == 10)
+        starts = np.empty(len(ends), dtype=np.int64)
+        starts[:1] = 0
+        starts[1:] = ends[:-1] + 1
+        ends[(ends > starts) & (buf[ends - 1] == 13)] -= 1
+        nonempty = ends > starts
+        starts, ends = starts[nonempty], ends[nonempty]
+        if len(starts) == 0:
+            return True
+
+        # count spaces per line and find the first one
+        spaces = np.flatnonzero(buf == 32)
+        first_space = np.searchsorted(spaces, starts)
+        num_spaces = np.searchsorted(spaces, ends) - first_space
+        split = spaces[np.minimum(first_space, len(spaces) - 1)] if len(spaces) else ends
+
+        first = buf[starts]
+        is_time = first == ord('#')
+        is_bin = (first == ord('b')) | (first == ord('B'))
+        is_real = (first == ord('r')) | (first == ord('R'))
+        is_scalar = np.isin(first, _SCALAR_CHARS)
+        is_keyword = first == ord('$')
+
+        valid = ((is_time | is_scalar) & (num_spaces == 0)) | (is_keyword & (num_spaces == 0)) | \
+                ((is_bin | is_real) & (num_spaces == 1) & (split > starts + 1))
+        if not valid.all():
+            return False
+        for k in np.flatnonzero(is_keyword):
+            if text[starts[k]:ends[k]] not in _BODY_KEYWORDS:
+                return False
+
+        # decode timestamps and assign the active timestamp to each line
+        t_starts, t_lens = starts[is_time] + 1, ends[is_time] - starts[is_time] - 1
+        if len(t_starts):
+            if (t_lens < 1).any() or (t_lens > 18).any():
+                return False
+            chars, seg_starts = _gather(buf, t_starts, t_lens)
+            digits = chars - ord('0')
+            if (digits > 9).any():
+                return False
+            timestamps = _decode_positional(chars, seg_starts, t_lens, digits, base=10)
+        else:
+            timestamps = np.empty(0, dtype=np.int64)
+        line_time = np.concatenate(([self.time], timestamps)).astype(np.int64)[np.cumsum(is_time)]
+
+        # identifier codes follow the value, encode them as integers to group value changes per signal
+        is_change = is_scalar | is_bin | is_real
+        change_lines = np.flatnonzero(is_change)
+        c_starts = np.where(is_scalar, starts + 1, split + 1)[change_lines]
+        c_lens = ends[change_lines] - c_starts
+        if (c_lens < 1).any() or (c_lens > 8).any():
+            return False
+
+        keys_sorted, key_codes = self._keys
+        if len(change_lines) and len(keys_sorted):
+            chars, seg_starts = _gather(buf, c_starts, c_lens)
+            keys = _decode_positional(chars, seg_starts, c_lens, chars, base=256)
+            pos = np.minimum(np.searchsorted(keys_sorted, keys), len(keys_sorted) - 1)
+            selected = keys_sorted[pos] == keys
+
+            signal_ids = pos[selected]
+            order = np.argsort(signal_ids, kind='stable')
+            change_lines, signal_ids = change_lines[selected][order], signal_ids[order]
+
+            # blocks may not contain any value change of the selected signals
+            bounds = np.flatnonzero(np.diff(signal_ids)) + 1
+            group_starts = np.concatenate(([0], bounds)).tolist() if len(signal_ids) else []
+            group_ends = np.concatenate((bounds, [len(change_lines)])).tolist()
+            for lo, hi in zip(group_starts, group_ends):
+                signal = self.data.signals[key_codes[signal_ids[lo]]]
+                self._flush_lines(signal, buf, text, change_lines[lo:hi], line_time, starts, split, is_scalar, is_real)
+
+        if len(timestamps):
+            self.time = int(timestamps[-1])
+            self.data.timestamps.extend(timestamps)
+        return True
+
+    def _flush_lines(self, signal: VCDSignal, buf, text, lines, line_time, starts, split, is_scalar, is_real):
+        """
+        Decode the value changes of one signal found by _decode_lines and append them to the signal.
+        """
+        n = len(lines)
+        scalar = is_scalar[lines]
+        real = is_real[lines]
+        binary = ~(scalar | real)
+
+        if real.any():
+            signal.promote_to_real()
+
+        value = np.zeros((n,) + signal.value.shape[1:], dtype=signal.value.dtype)
+        xz = np.zeros(n, dtype=np.uint8)
+
+        if scalar.any():
+            chars = buf[starts[lines[scalar]]]
+            xz[scalar] = _SCALAR_XZ[chars]
+            if signal.kind == 'packed':
+                value[scalar, -1] = _SCALAR_VALUE[chars]
+            else:
+                value[scalar] = _SCALAR_VALUE[chars]
+        if binary.any():
+            v_starts = starts[lines[binary]] + 1
+            v_ends = split[lines[binary]]
+            if signal.kind == 'packed':
+                raw = [text[a:b] for a, b in zip(v_starts.tolist(), v_ends.tolist())]
+                value[binary], xz[binary] = decode_binary(raw, signal.width)
+            else:
+                v_lens = v_ends - v_starts
+                chars, seg_starts = _gather(buf, v_starts, v_lens)
+                xz[binary] = _xz_mask(chars, seg_starts)
+                value[binary] = _decode_positional(chars, seg_starts, v_lens, chars == ord('1'), base=2)
+        if real.any():
+            v_starts = starts[lines[real]] + 1
+            v_ends = split[lines[real]]
+            raw = [text[a:b] for a, b in zip(v_starts.tolist(), v_ends.tolist())]
+            value[real], xz[real] = decode_real(raw)
+
+        signal.extend(line_time[lines], value, xz)
+
+    def _decode_tokens(self, text):
+        """
+        Decode a block token by token, used for blocks that don't follow the layout expected by _decode_lines.
+        """
+        # staging lists per identifier code: times and values of scalar, binary and real value changes
+        stage = {code: ([], [], [], [], [], []) for code in self._codes}
+        timestamps = []
+        time = self.time
+        in_comment = self._in_comment
+
+        tokens = iter(text.split())
+        for tok in tokens:
+            if in_comment:
+                if tok == b'$end':
+                    in_comment = False
+                continue
+
+            c = tok[0]
+            if c == 35:  # '#'
+                time = int(tok[1:])
+                timestamps.append(time)
+            elif c == 98 or c == 66:  # 'b', 'B'
+                st = stage.get(next(tokens))
+                if st is not None:
+                    st[2].append(time)
+                    st[3].append(tok[1:])
+            elif c == 114 or c == 82:  # 'r', 'R'
+                st = stage.get(next(tokens))
+                if st is not None:
+                    st[4].append(time)
+                    st[5].append(tok[1:])
+            elif c == 36:  # '$'
+                if tok == b'$comment':
+                    in_comment = True
+            else:
+                st = stage.get(tok[1:])
+                if st is not None:
+                    st[0].append(time)
+                    st[1].append(tok[:1])
+
+        self.time = time
+        self._in_comment = in_comment
+
+        if timestamps:
+            self.data.timestamps.extend(timestamps)
+        for code, st in stage.items():
+            if st[0] or st[2] or st[4]:
+                self._flush_tokens(self.data.signals[self._codes[code]], st)
+
+    def _flush_tokens(self, signal: VCDSignal, st):
+        """
+        Decode the value changes of one signal staged by _decode_tokens and append them to the signal.
+        """
+        t_scalar, v_scalar, t_bin, v_bin, t_real, v_real = st
+
+        if v_real:
+            signal.promote_to_real()
+
+        parts = []
+        if v_scalar:
+            value, xz = decode_scalar(b''.join(v_scalar))
+            if signal.kind == 'packed':
+                packed = np.zeros((len(value), signal.value.shape[1]), dtype=np.uint8)
+                packed[:, -1] = value
+                value = packed
+            parts.append((t_scalar, value, xz))
+        if v_bin:
+            value, xz = decode_binary(v_bin, signal.width)
+            parts.append((t_bin, value, xz))
+        if v_real:
+            value, xz = decode_real(v_real)
+            parts.append((t_real, value, xz))
+
+        if len(parts) == 1:
+            time, value, xz = parts[0]
+        else:
+            # signal changed with different value formats within one block, restore chronological order
+            time = np.concatenate([np.asarray(p[0], dtype=np.int64) for p in parts])
+            value = np.concatenate([np.asarray(p[1], dtype=signal.value.dtype) for p in parts])
+            xz = np.concatenate([p[2] for p in parts])
+            order = np.argsort(time, kind='stable')
+            time, value, xz = time[order], value[order], xz[order]
+
+        signal.extend(time, value, xz)
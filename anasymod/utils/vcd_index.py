@@ -0,0 +1,171 @@
+import re
+import numpy as np
+
+from anasymod.utils.vcd_columnar import VCDData, VCDSignal, VCDBodyDecoder, GrowableArray, BLOCK_SIZE
+from anasymod.utils.compression import open_file
+
+__all__ = ["VCDIndex"]
+
+# minimum distance in bytes between two checkpoints of the index
+INDEX_INTERVAL = 4 * 1024 * 1024
+
+# timestamp marker on its own line, used to place checkpoints
+_TIME_MARKER = re.compile(rb'\n(#(\d+))[ \t\r]*\n')
+
+
+class VCDIndex():
+    """
+    Sparse timestamp index of a VCD body. Each checkpoint holds the byte offset of a '#<time>' marker and a snapshot
+    of the value of every signal right before that marker. A time window can then be decoded by seeking to the last
+    checkpoint before the window, instead of scanning the VCD body from the start.
+    """
+    def __init__(self):
+        self.time = np.zeros(0, dtype=np.int64)
+        """ type(np.ndarray) : timestamp of each checkpoint, in ascending order. """
+
+        self.offset = np.zeros(0, dtype=np.int64)
+        """ type(np.ndarray) : byte offset of each checkpoint within the (decompressed) VCD file. """
+
+        self.snapshots = {}
+        """ type(dict) : per identifier code, a tuple of value, xz and known arrays with one entry per checkpoint;
+            known is False for checkpoints before the first value change of a signal. """
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def build(cls, vcd_path, data: VCDData, offset, interval=INDEX_INTERVAL):
+        """
+        Scan the VCD body once and place a checkpoint at the first timestamp marker after every interval bytes.
+        Value changes are only kept until the next checkpoint, so memory usage does not depend on the file size.
+
+        :param vcd_path: path to the VCD file
+        :param data: VCDData object created from the VCD header, it is not modified
+        :param offset: byte offset of the VCD body
+        :param interval: minimum distance in bytes between two checkpoints
+        :rtype: VCDIndex
+        """
+        scan = VCDData()
+        for code, signal in data.signals.items():
+            scan.signals[code] = VCDSignal(code=code, var_type=signal.var_type, width=signal.width)
+
+        snapshots = {code: (GrowableArray(signal.value.dtype, shape=signal.value.shape[1:]),
+                            GrowableArray(np.uint8), GrowableArray(bool)) for code, signal in scan.signals.items()}
+        state = {}
+        times = [0]
+        offsets = [offset]
+
+        def checkpoint():
+            for code, signal in scan.signals.items():
+                value, xz, known = snapshots[code]
+                if len(signal):
+                    state[code] = (signal.value[-1].copy(), signal.xz[-1])
+                    signal.clear()
+                if signal.kind == 'real' and value.dtype != np.float64:
+                    value.astype(np.float64)
+                if code in state:
+                    value.append(state[code][0])
+                    xz.append(state[code][1])
+                    known.append(True)
+                else:
+                    value.append(np.zeros(signal.value.shape[1:], dtype=value.dtype))
+                    xz.append(0)
+                    known.append(False)
+            scan.timestamps = GrowableArray(np.int64)
+
+        # first checkpoint is located at the start of the body, where no value is known yet
+        checkpoint()
+
+        decoder = VCDBodyDecoder(data=scan)
+        with open_file(vcd_path) as file:
+            file.seek(offset)
+            buf = b''
+            buf_pos = offset
+            next_checkpoint = offset + interval
+            while True:
+                block = file.read(BLOCK_SIZE)
+                if not block:
+                    break
+                buf += block
+
+                while True:
+                    m = _TIME_MARKER.search(buf, max(next_checkpoint - buf_pos - 1, 0))
+                    if m is None:
+                        break
+                    cut = m.start(1)
+                    decoder.feed(buf[:cut])
+                    buf, buf_pos = buf[cut:], buf_pos + cut
+                    next_checkpoint = buf_pos + interval
+                    # markers within a comment section are no valid entry points
+                    if not decoder._in_comment:
+                        checkpoint()
+                        times.append(int(m.group(2)))
+                        offsets.append(buf_pos)
+
+                # keep the last line, it may be the start of a marker continued in the next block
+                cut = buf.rfind(b'\n')
+                if cut > 0:
+                    decoder.feed(buf[:cut])
+                    buf, buf_pos = buf[cut:], buf_pos + cut
+
+        index = cls()
+        index.time = np.array(times, dtype=np.int64)
+        index.offset = np.array(offsets, dtype=np.int64)
+        index.snapshots = {code: tuple(arr.view() for arr in arrs) for code, arrs in snapshots.items()}
+        return index
+
+    def locate(self, t_start, t_stop=None):
+        """
+        Find the part of the VCD body that has to be decoded for the time window [t_start, t_stop].
+
+        :return: number of the checkpoint to start decoding from and the byte offset at which decoding can stop,
+            None if decoding has to continue until the end of the file
+        :rtype: (int, int)
+        """
+        k = max(int(np.searchsorted(self.time, t_start, side='right')) - 1, 0)
+        if t_stop is None:
+            return k, None
+        j = int(np.searchsorted(self.time, t_stop, side='right'))
+        return k, int(self.offset[j]) if j < len(self.offset) else None
+
+    def snapshot(self, k, codes=None):
+        """
+        Values of all signals right before checkpoint k.
+
+        :param codes: identifier codes to return, all codes if None
+        :return: dict mapping identifier codes to a tuple of value and xz state, signals without a known value are
+            not included
+        :rtype: dict
+        """
+        snapshot = {}
+        for code in (self.snapshots if codes is None else codes):
+            value, xz, known = self.snapshots[code]
+            if known[k]:
+                snapshot[code] = (value[k], xz[k])
+        return snapshot
+
+    def save(self, path):
+        """
+        Store the index as .npz file.
+        """
+        codes = list(self.snapshots)
+        arrays = {'time': self.time, 'offset': self.offset, 'codes': np.array(codes, dtype=str)}
+        for k, code in enumerate(codes):
+            arrays[f'value{k}'], arrays[f'xz{k}'], arrays[f'known{k}'] = self.snapshots[code]
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index stored by save.
+
+        :rtype: VCDIndex
+        """
+        index = cls()
+        with np.load(path) as arrays:
+            index.time = arrays['time']
+            index.offset = arrays['offset']
+            for k, code in enumerate(arrays['codes'].tolist()):
+                index.snapshots[code] = (arrays[f'value{k}'], arrays[f'xz{k}'], arrays[f'known{k}'])
+        return index
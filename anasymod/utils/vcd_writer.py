@@ -0,0 +1,303 @@
+import datetime
+import numpy as np
+
+from anasymod.utils.emu_time import merge_order
+
+__all__ = ["FastVCDWriter"]
+
+# number of value change lines joined into one write() call
+WRITE_CHUNK = 65536
+
+# timescale units accepted in VCD headers
+_TIMESCALE_UNITS = ('s', 'ms', 'us', 'ns', 'ps', 'fs')
+
+
+def _encode_identifier(v):
+    """
+    Encode a positive integer into a VCD identifier code, same as pyvcd does, so that both writers produce the same
+    identifier codes for the same order of registration.
+    """
+    encoded = ''
+    while v != 0:
+        v -= 1
+        encoded += chr((v % 94) + 33)
+        v //= 94
+    return encoded
+
+
+class _Variable():
+    """
+    VCD variable registered at a FastVCDWriter, together with the value changes collected for it.
+    """
+    def __init__(self, ident, var_type, size):
+        self.ident = ident
+        self.var_type = var_type
+        self.size = size
+        if var_type == 'real':
+            self.kind = 'real'
+            self.init = 0.0
+        elif size == 1:
+            self.kind = 'scalar'
+            self.init = 'x'
+        else:
+            self.kind = 'vector'
+            self.init = 'x'
+        self.columns = []
+
+    def format(self, values):
+        """
+        Format values of this variable as VCD value change lines, in the same notation as pyvcd.
+
+        :param values: list of values, float for real variables, int, bool, None or binary str for all others
+        :rtype: list
+        """
+        ident = self.ident
+        if self.kind == 'real':
+            for v in values:
+                if isinstance(v, str):
+                    raise Exception(f'Invalid real value ({v}) for VCD variable {ident}.')
+            return [f'r{v:.16g} {ident}' for v in values]
+        elif self.kind == 'scalar':
+            return [(v if isinstance(v, str) else 'z' if v is None else '1' if v else '0') + ident for v in values]
+
+        max_val = 1 << self.size
+        ints = [v for v in values if isinstance(v, int)]
+        if ints and (max(ints) >= max_val or -min(ints) > (max_val >> 1)):
+            raise Exception(f'Value not representable in {self.size} bits for VCD variable {ident}.')
+        suffix = ' ' + ident
+        return ['b' + (format(v if v >= 0 else v + max_val, 'b') if isinstance(v, int) else
+                       'z' if v is None else v) + suffix for v in values]
+
+
+class FastVCDWriter():
+    """
+    Bulk VCD writer working on columns of value changes. Instead of formatting and writing each value change on its
+    own, as pyvcd's VCDWriter does, the value changes of all variables are collected as time/value arrays, merged into
+    chronological order in one vectorized pass and written in large chunks. Registration of variables works the same
+    way as with pyvcd and the produced files are identical to the ones pyvcd writes for the same value changes.
+    """
+    def __init__(self, file, timescale='1 us', date=None, comment='', version='', scope_sep='.'):
+        """
+        :param file: text file object the VCD data is written to
+        :param timescale: timescale of the VCD file, e.g. '1 fs'
+        :param date: $date string of the VCD header, current date if None
+        :param comment: $comment string of the VCD header, omitted if empty
+        :param version: $version string of the VCD header, omitted if empty
+        :param scope_sep: separator for scopes given as strings
+        """
+        self._file = file
+        self._header_keywords = {
+            '$timescale': self._check_timescale(timescale),
+            '$date': str(datetime.datetime.now()) if date is None else date,
+            '$comment': comment,
+            '$version': version,
+        }
+        self._scope_sep = scope_sep
+        self._scope_vars = {}
+        self._vars = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # don't write a VCD file from partially collected data
+        if exc_type is None:
+            self.close()
+        else:
+            self._closed = True
+
+    def register_var(self, scope, name, var_type, size=None):
+        """
+        Register a new VCD variable, all variables have to be registered before close is called.
+
+        :param scope: hierarchical scope of the variable, either a str using scope_sep or a sequence of str
+        :param name: name of the variable
+        :param var_type: VCD variable type, e.g. 'reg', 'wire' or 'real'
+        :param size: width of the variable in bits, may be None for real and integer variables
+        :return: variable handle to be used with change_columns
+        """
+        if self._closed:
+            raise Exception('Cannot register VCD variables after the writer was closed.')
+        if var_type in ('event', 'string'):
+            raise Exception(f'VCD variable type {var_type} is not supported by FastVCDWriter.')
+        scope = tuple(scope.split(self._scope_sep)) if isinstance(scope, str) else tuple(scope)
+        if size is None:
+            if var_type in ('integer', 'real', 'realtime'):
+                size = 64
+            else:
+                raise Exception(f'Must supply size for VCD variable type {var_type}.')
+
+        names = [n for n, _ in self._scope_vars.get(scope, [])]
+        if name in names:
+            raise Exception(f'Duplicate VCD variable {name} in scope {self._scope_sep.join(scope)}.')
+
+        var = _Variable(ident=_encode_identifier(len(self._vars) + 1), var_type=var_type, size=int(size))
+        self._vars.append(var)
+        self._scope_vars.setdefault(scope, []).append((name, var))
+        return var
+
+    def change_columns(self, var, times, values):
+        """
+        Add value changes of a variable. This method may be called several times for the same variable, value changes
+        with equal timestamps are written in the order they were added.
+
+        :param var: variable handle returned by register_var
+        :param times: int array of timestamps, not necessarily sorted
+        :param values: value of each change, as list or numpy array
+        """
+        if self._closed:
+            raise Exception('Cannot change VCD values after the writer was closed.')
+        times = np.asarray(times, dtype=np.int64)
+        if len(times) != len(values):
+            raise Exception(f'Number of timestamps and values of VCD variable {var.ident} differ.')
+        if len(times) and times.min() < 0:
+            raise Exception(f'Negative timestamp for VCD variable {var.ident}.')
+        var.columns.append((times, values))
+
+    def close(self, timestamp=None):
+        """
+        Write the VCD header, the initial values and all collected value changes to the output file.
+
+        :param timestamp: optional final timestamp appended to the VCD file
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        write = self._file.write
+        write('\n'.join(self._gen_header()) + '\n')
+
+        times, lines, dump = [], [], []
+        for var, initial, t, v in self._value_changes():
+            dump.append(var.format([initial])[0])
+            if len(t):
+                times.append(t)
+                lines.append(var.format(v))
+        if self._vars:
+            write('#0\n$dumpvars\n' + '\n'.join(dump) + '\n$end\n')
+
+        # merge value changes of all variables into chronological order
+        stream_idx, event_idx = merge_order(times)
+        offsets = np.cumsum([0] + [len(t) for t in times])[:-1]
+        flat = offsets[stream_idx] + event_idx if len(stream_idx) else event_idx
+        all_lines = np.empty(len(flat), dtype=object)
+        all_lines[:] = [line for ls in lines for line in ls]
+        all_lines = all_lines[flat]
+        all_times = np.concatenate(times)[flat] if times else np.zeros(0, dtype=np.int64)
+
+        # prepend timestamp markers to the first value change of each timestamp
+        first = np.flatnonzero(np.diff(all_times, prepend=0) != 0)
+        all_lines[first] = [f'#{t}\n{line}' for t, line in zip(all_times[first].tolist(), all_lines[first].tolist())]
+
+        for k in range(0, len(all_lines), WRITE_CHUNK):
+            write('\n'.join(all_lines[k:k + WRITE_CHUNK].tolist()) + '\n')
+
+        last = int(all_times[-1]) if len(all_times) else 0
+        if timestamp is not None:
+            if timestamp < last:
+                raise Exception(f'Out of order final timestamp: {timestamp}')
+            if timestamp > last:
+                write(f'#{int(timestamp)}\n')
+        self._file.flush()
+
+    def _value_changes(self):
+        """
+        Sort the value changes of each variable, drop changes that don't alter the value and determine the value at
+        time 0, which goes into the $dumpvars section.
+
+        :return: generator yielding the variable, its value at time 0, the int64 array of timestamps after time 0 and
+            the list of values at these timestamps for each variable in order of registration
+        """
+        for var in self._vars:
+            t, v = self._collect(var)
+            keep = self._changed(var, v)
+            at_zero = int(np.searchsorted(t, 0, side='right'))
+            keep[:at_zero] = False
+            yield var, v[at_zero - 1] if at_zero else var.init, t[keep], [v[k] for k in np.flatnonzero(keep).tolist()]
+
+    @staticmethod
+    def _collect(var):
+        """
+        Concatenate all value changes of a variable in chronological order; changes with equal timestamp keep the
+        order in which they were added.
+
+        :return: int64 array of timestamps and list of values
+        :rtype: (numpy.ndarray, list)
+        """
+        times = [t for t, _ in var.columns]
+        values = [v.tolist() if isinstance(v, np.ndarray) else list(v) for _, v in var.columns]
+        var.columns = []
+        if not times:
+            return np.zeros(0, dtype=np.int64), []
+        t = np.concatenate(times)
+        v = [x for vs in values for x in vs]
+        if len(t) > 1 and (np.diff(t) < 0).any():
+            order = np.argsort(t, kind='stable')
+            t = t[order]
+            v = [v[k] for k in order.tolist()]
+        return t, v
+
+    @staticmethod
+    def _changed(var, values):
+        """
+        Flag value changes that differ from the previous value of the variable, starting from its initial value.
+
+        :rtype: numpy.ndarray
+        """
+        keep = np.ones(len(values), dtype=bool)
+        if not values:
+            return keep
+        arr = np.asarray(values)
+        if arr.dtype.kind in 'biuf':
+            keep[1:] = arr[1:] != arr[:-1]
+        else:
+            keep[1:] = [a != b for a, b in zip(values[1:], values[:-1])]
+        keep[0] = values[0] != var.init
+        return keep
+
+    def _gen_header(self):
+        for keyword, value in sorted(self._header_keywords.items()):
+            if not value:
+                continue
+            lines = value.split('\n')
+            if len(lines) == 1:
+                yield f'{keyword} {lines[0]} $end'
+            else:
+                yield keyword
+                for line in lines:
+                    yield '\t' + line
+                yield '$end'
+
+        prev_scope = ()
+        for scope in sorted(self._scope_vars):
+            # leave the scopes not shared with the previous one and enter the new ones
+            common = 0
+            while common < min(len(prev_scope), len(scope)) and prev_scope[common] == scope[common]:
+                common += 1
+            for _ in prev_scope[common:]:
+                yield '$upscope $end'
+            for name in scope[common:]:
+                yield f'$scope module {name} $end'
+            for name, var in self._scope_vars[scope]:
+                yield f'$var {var.var_type} {var.size} {var.ident} {name} $end'
+            prev_scope = scope
+
+        for _ in prev_scope:
+            yield '$upscope $end'
+        yield '$enddefinitions $end'
+
+    @staticmethod
+    def _check_timescale(timescale):
+        """
+        Normalize a timescale given as str, e.g. '1fs' or '1 fs', or as tuple of magnitude and unit to '1 fs'.
+        """
+        if isinstance(timescale, (list, tuple)):
+            mag, unit = timescale
+        else:
+            text = str(timescale).strip()
+            digits = len(text) - len(text.lstrip('0123456789'))
+            mag, unit = (text[:digits] or '1'), text[digits:].strip()
+        if int(mag) < 1 or unit not in _TIMESCALE_UNITS:
+            raise Exception(f'Invalid VCD timescale {timescale}.')
+        return f'{int(mag)} {unit}'
@@ -5,7 +5,7 @@ from anasymod.util import call
 
 class GtkWaveViewer(Viewer):
     def view(self, result_file=None):
-        vcd_path = result_file if result_file is not None else self.target.cfg.vcd_path
+        vcd_path = result_file if result_file is not None else self.target.result_path
 
         # build command
         if os.path.isfile(vcd_path):
@@ -13,7 +13,15 @@ except:
 
 import datetime
 
+from contextlib import contextmanager
 from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.compression import open_file
+from anasymod.utils.fixed_point import to_float
+from anasymod.utils.emu_time import emu_time_offset, valid_emu_time, map_to_emu_time, merge_order
+from anasymod.utils.vcd_writer import FastVCDWriter
+from anasymod.utils.fst import is_fst, FSTWriter
+from anasymod.utils.ila_csv import ILAData
+from anasymod.utils.probe_data import change_mask
 from anasymod.enums import ResultFileTypes
 
 class ConvertWaveform():
@@ -23,17 +31,24 @@ class ConvertWaveform():
     """
     def __init__(self, str_cfg, result_type_raw, result_path_raw, result_path,
                  float_type=True, emu_time_scaled=True, debug=False,
-                 dt_scale=1e-15):
+                 dt_scale=1e-15, processes=1, writer='fast'):
         """
 
         :param str_cfg: structure config object used in current project.
         :param result_type_raw: filetype of result file to be converted
-        :param result_path_raw: path to raw result file
-        :param result_path: path to converted result file
+        :param result_path_raw: path to raw result file; raw VCD files ending with .gz, .zst or .xz are decompressed
+                        while reading
+        :param result_path: path to converted result file; if it ends with .gz, .zst or .xz, the file is written
+                        compressed, if it ends with .fst, the file is written in GTKWave's FST format
+                        using the fstapi bindings of the pylibfst package
         :param float_type: flag to indicate if real signal's data type is fixed-point or floating point
         :param emu_time_scaled: flag to indicate, if signals shall be displayed over cycle count or time
         :param debug: if debug flag is set to true, all signals from result file will be kept, even if they are not a
                         specified probe; keep in mind, that for those signals no fixed to float conversion can be done
+        :param processes: number of worker processes used to decode a raw VCD result file, 0 selects the number of
+                        CPU cores
+        :param writer: VCD writer backend, 'fast' writes all value changes in bulk, 'pyvcd' writes them one by one
+                        using pyvcd's VCDWriter; FST files are always written in bulk
         """
 
         # defaults
@@ -47,20 +62,11 @@ class ConvertWaveform():
         reg_widths = {}
 
         if result_type_raw == ResultFileTypes.CSV:
-            # read CSV file
-            with open(self.result_path_raw, 'r') as f:
-                first_line = f.readline()
-
-            # split up the first line into comma-delimited names
-            signals = first_line.split(',')
+            # read all columns of the CSV file in a single pass
+            self.ila_data = ILAData.read(self.result_path_raw)
 
-            # account for whitespace
-            signals = [signal.strip() for signal in signals]
-
-            # strip off the signal indices and add to a lookup table
-            for k, signal in enumerate(signals):
-                if '[' in signal:
-                    signal = signal[:signal.index('[')]
+            # add the signal names without indices to a lookup table
+            for k, signal in enumerate(self.ila_data.names):
                 self.signal_lookup[signal] = k
 
             # print keys
@@ -72,15 +78,13 @@ class ConvertWaveform():
                     # add to set of probes with "real" data type
                     real_signals.add(name)
 
-                    # get unscaled data and apply scaling factor
-                    probe_data[name] = (2 ** int(analog_signal.exponent)) * self.get_csv_col(name)
+                    # get unscaled data, values that were not dumped as signed numbers are interpreted as two's
+                    # complement numbers of the probe's width, signed values within that width are kept as they are
+                    values = self.get_csv_col(name)
 
-                    # convert data to native Python float type (rather than numpy float)
+                    # apply scaling factor and convert data to native Python float type (rather than numpy float)
                     # this is required for PyVCD
-                    try:
-                        probe_data[name] = [float(x) for x in probe_data[name]]
-                    except:
-                        probe_data[name] = [float(probe_data[name])]
+                    probe_data[name] = to_float(values, analog_signal.width, analog_signal.exponent).tolist()
 
             for digital_signal in scfg.digital_probes + [scfg.dec_cmp] + [scfg.time_probe]:
                 name = 'trace_port_gen_i/' + digital_signal.name
@@ -88,322 +92,260 @@ class ConvertWaveform():
                     # define width for this probe
                     reg_widths[name] = int(digital_signal.width)
 
-                    # get unscaled data
-                    probe_data[name] = self.get_csv_col(name)
-
-                    # convert data to native Python int type (rather than numpy int)
-                    # this is required for PyVCD
-                    try:
-                        probe_data[name] = [int(x) for x in probe_data[name]]
-                    except ValueError:
-                        print(f'ValueError encountered when converting probe_data[{name}].')
-                        print(f'Contents of probe_data[{name}]:')
-                        print(f'{probe_data}')
-                        print(f'Contents of CSV file {self.result_path_raw}:')
-                        print(open(self.result_path_raw, 'r').read())
-                        raise
+                    # get unscaled data as native Python int type (rather than numpy int) this is required for PyVCD
+                    probe_data[name] = self.ila_data.to_ints(name)
 
             # Write data to VCD file
-            with open(result_path, 'w') as vcd:
-                timescale = self.get_pyvcd_timescale(dt_scale)
-                with VCDWriter(vcd, timescale=timescale, date=str(datetime.datetime.today())) as writer:
-                    # register all of the signals that will be written to VCD
-                    reg = {}
+            with self.open_writer(result_path, dt_scale, writer) as vcd_writer:
+                # register all of the signals that will be written to VCD
+                reg = {}
+                for sig, scaled_data in probe_data.items():
+                    # determine signal scope and name
+                    signal_split = sig.split('/')
+                    vcd_scope = '.'.join(signal_split[:-1])
+                    vcd_name = signal_split[-1]
+
+                    # determine signal type and size
+                    if sig in real_signals:
+                        vcd_var_type = 'real'
+                        vcd_size = None
+                    elif sig in reg_widths:
+                        vcd_var_type = 'reg'
+                        vcd_size = reg_widths[sig]
+                    else:
+                        raise Exception('Unknown signal type.')
+
+                    # register the signal
+                    reg[sig] = vcd_writer.register_var(scope=vcd_scope, name=vcd_name,
+                                                                var_type=vcd_var_type,
+                                                                size=vcd_size)
+
+                timestamps = probe_data['trace_port_gen_i/' + scfg.time_probe.name]
+                if emu_time_scaled:
+                    # drop all rows from the first decreasing timestamp on, since that means wrapping has
+                    # occurred
+                    wrapped = np.flatnonzero(np.diff(timestamps) < 0)
+                    num_rows = int(wrapped[0]) + 1 if len(wrapped) else len(timestamps)
+                    chg_vals = np.asarray(timestamps[:num_rows], dtype=np.int64)
+                else:
+                    num_rows = len(timestamps)
+                    chg_vals = np.arange(num_rows)
+
+                # run-length compression: ILA captures hold one row per sample, even if a signal is constant
+                # for many cycles, only rows at which a signal changes are passed on to the VCD writer
+                changes = {sig: np.flatnonzero(change_mask(np.asarray(scaled_data[:num_rows])))
+                           for sig, scaled_data in probe_data.items()}
+
+                if isinstance(vcd_writer, FastVCDWriter):
                     for sig, scaled_data in probe_data.items():
-                        # determine signal scope and name
-                        signal_split = sig.split('/')
-                        vcd_scope = '.'.join(signal_split[:-1])
-                        vcd_name = signal_split[-1]
-
-                        # determine signal type and size
-                        if sig in real_signals:
-                            vcd_var_type = 'real'
-                            vcd_size = None
-                        elif sig in reg_widths:
-                            vcd_var_type = 'reg'
-                            vcd_size = reg_widths[sig]
-                        else:
-                            raise Exception('Unknown signal type.')
-
-                        # register the signal
-                        reg[sig] = writer.register_var(scope=vcd_scope, name=vcd_name,
-                                                                    var_type=vcd_var_type,
-                                                                    size=vcd_size)
-
-                    # iterate over all timesteps
-                    prev_timestep = float('-inf')
-                    for k, timestamp in enumerate(probe_data['trace_port_gen_i/' + scfg.time_probe.name]):
-                        # break if the current timestep is less than the previous one, since that means
-                        # wrapping has occurred.  (only if emu_time_scaled is True, meaning that
-                        # we're using emu_time on the x axis, not cycle number)
-                        if emu_time_scaled and (timestamp < prev_timestep):
-                            break
-                        prev_timestep = timestamp
-
+                        rows = changes[sig]
+                        vcd_writer.change_columns(reg[sig], chg_vals[rows], [scaled_data[k] for k in rows.tolist()])
+                else:
+                    # iterate over all timesteps at which at least one signal changes, in the order of the rows
+                    # and signals of the CSV file
+                    sigs = list(probe_data)
+                    row_sig = np.concatenate([changes[sig] for sig in sigs] + [np.zeros(0, dtype=np.int64)])
+                    sig_idx = np.repeat(np.arange(len(sigs)), [len(changes[sig]) for sig in sigs])
+                    order = np.lexsort((sig_idx, row_sig))
+                    for k, s in zip(row_sig[order].tolist(), sig_idx[order].tolist()):
                         # Set the x-axis value according to emu_time_scaled: True means use
                         # emu_time, and False means use the cycle number
-                        if emu_time_scaled:
-                            chg_val = timestamp
-                        else:
-                            chg_val = k
-
-                        # iterate over all signals and log their change at this timestamp
-                        for sig, scaled_data in probe_data.items():
-                            writer.change(reg[sig], chg_val, scaled_data[k])
+                        vcd_writer.change(reg[sigs[s]], int(chg_vals[k]), probe_data[sigs[s]][k])
 
         elif result_type_raw == ResultFileTypes.VCD:
             vcd_file_name = result_path_raw
-            vcd_handle = ParseVCD(vcd_file_name)
-            signal_dict = vcd_handle.parse_vcd(update_data=False)
+            vcd_handle = ParseVCD(vcd_file_name, processes=processes)
+            vcd_data = vcd_handle.parse_columnar()
+            signal_names = vcd_data.names()
 
             # print signal names
-            signal_names = [(signal_dict[key]["nets"][0]["hier"] + '.' + signal_dict[key]["nets"][0]["name"], key) for key in signal_dict.keys()]
-            print(f'Signals in result file: {[sig_name[0] for sig_name in signal_names]}')
+            print(f'Signals in result file: {list(signal_names)}')
 
             for analog_signal in scfg.analog_probes:
                 analog_signal_path = 'top.trace_port_gen_i' + '.' + analog_signal.name
-                if analog_signal_path in [sig[0] for sig in signal_names]:
+                if analog_signal_path in signal_names:
                     # add to set of probes with "real" data type
                     real_signals.add(analog_signal_path)
 
-                    probe_data[analog_signal_path] = {}
-                    probe_data[analog_signal_path]['index'] = 0
-
                     # get the signal identifier from analog_signal used in VCD file
-                    signal_identifier = signal_names[[y[0] for y in signal_names].index(analog_signal_path)][1]
-                    data = []
-                    for c,v in signal_dict[signal_identifier]['cv']:
-                        if not isinstance(v, float):
-                            for k in range(analog_signal.width - len(v)): # extend binary to full width, some simulators don't do that by default and remove leading zeros in VCD file
-                                v = '0' + v
-                            if v[0] == '1': # check if number is negative and if so calculate the two's complement
-                                v = -1 * (int((''.join('1' if x == '0' else '0' for x in v)), 2) + 1)
-                            else:
-                                v = int(v, 2)
-                        if not float_type:
-                            v = 2 ** int(analog_signal.exponent) * v
-                        data.append((c, v))
-                    probe_data[analog_signal_path]['data'] = np.asarray(data)
-
-                    # convert data to native Python float type (rather than numpy float) this is required for PyVCD
-                    probe_data[analog_signal_path]['data'] = [(int(c), float(v)) for c, v in probe_data[analog_signal_path]['data']]
+                    signal_identifier = signal_names[analog_signal_path]
+                    cycles, values, _ = vcd_data.columns(signal_identifier)
+                    if vcd_data.signals[signal_identifier].kind == 'real':
+                        values = values.astype(np.float64)
+                    else:
+                        # interpret the bits as two's complement number of the probe's width, leading zeros that
+                        # simulators may strip in the VCD file are implied by the columnar storage
+                        values = to_float(values, analog_signal.width)
+                    if not float_type:
+                        values = values * 2.0 ** int(analog_signal.exponent)
+
+                    probe_data[analog_signal_path] = (cycles, values)
 
             for digital_signal in scfg.digital_probes + [scfg.dec_cmp] + [scfg.time_probe]:
                 digital_signal_path = 'top.trace_port_gen_i' + '.' + digital_signal.name
-                if digital_signal_path in [sig[0] for sig in signal_names]:
+                if digital_signal_path in signal_names:
                     # define width for this probe
                     reg_widths[digital_signal_path] = int(digital_signal.width)
 
-                    probe_data[digital_signal_path] = {}
-                    probe_data[digital_signal_path]['index'] = 0
-
-                    # get unscaled data
-                    probe_data[digital_signal_path]['data'] = np.asarray([(c, v) for c,v in signal_dict[signal_names[[y[0] for y in signal_names].index(digital_signal_path)][1]]['cv']])
-
-                    # convert data to native Python int type (rather than numpy int) this is required for PyVCD
-                    data = []
-                    for c, v in probe_data[digital_signal_path]['data']:
-                        try:
-                            data.append((int(c), int(v, 2)))
-                        except: # In case of an x or z value, a 0 will be added; this is necessary for PYVCD
-                            data.append((int(c), int(0)))
-
-                    probe_data[digital_signal_path]['data'] = data
+                    # get unscaled data, X and Z states are written as 0
+                    signal_identifier = signal_names[digital_signal_path]
+                    probe_data[digital_signal_path] = self.writer_columns(vcd_data.signals[signal_identifier],
+                                                                          *vcd_data.columns(signal_identifier))
 
             # Write data to VCD file
 
-            with open(result_path, 'w') as vcd:
-                timescale = self.get_pyvcd_timescale(dt_scale)
-                with VCDWriter(vcd, timescale=timescale, date=str(datetime.datetime.today())) as writer:
-                    # register all of the signals that will be written to VCD
-                    reg = {}
-                    for sig, scaled_data in probe_data.items():
-                        # determine signal scope and name
-                        signal_split = sig.split('.')
-                        vcd_scope = '.'.join(signal_split[:-1])
-                        vcd_name = signal_split[-1]
-
-                        # determine signal type and size
-                        if sig in real_signals:
-                            vcd_var_type = 'real'
-                            vcd_size = None
-                        elif sig in reg_widths:
-                            vcd_var_type = 'reg'
-                            vcd_size = reg_widths[sig]
-                        else:
-                            raise Exception('Unknown signal type.')
-
-                        # register the signal
-                        reg[sig] = writer.register_var(scope=vcd_scope, name=vcd_name,
-                                                                    var_type=vcd_var_type,
-                                                                    size=vcd_size)
-
-                    prev_timestep = float('-inf')
-                    # Add all other signals in case debug flag is set
-                    if debug:
-                        for signal in signal_names:
-                            if not signal[0] in probe_data.keys(): # signal was not listed yet
-                                var_type = signal_dict[signal[1]]['nets'][0]['type']
-                                if var_type != 'parameter':
-                                    name = signal_dict[signal[1]]['nets'][0]['name']
-                                    scope = signal_dict[signal[1]]['nets'][0]['hier']
-                                    path = scope + '.' + name
-                                    size = signal_dict[signal[1]]['nets'][0]['size']
-
-                                    # register the signal
-                                    reg[path] = writer.register_var(scope=scope, name=name, var_type=var_type, size=int(size))
-
+            with self.open_writer(result_path, dt_scale, writer) as vcd_writer:
+                # register all of the signals that will be written to VCD
+                reg = {}
+                for sig in probe_data.keys():
+                    # determine signal scope and name
+                    signal_split = sig.split('.')
+                    vcd_scope = '.'.join(signal_split[:-1])
+                    vcd_name = signal_split[-1]
+
+                    # determine signal type and size
+                    if sig in real_signals:
+                        vcd_var_type = 'real'
+                        vcd_size = None
+                    elif sig in reg_widths:
+                        vcd_var_type = 'reg'
+                        vcd_size = reg_widths[sig]
+                    else:
+                        raise Exception('Unknown signal type.')
+
+                    # register the signal
+                    reg[sig] = vcd_writer.register_var(scope=vcd_scope, name=vcd_name,
+                                                                var_type=vcd_var_type,
+                                                                size=vcd_size)
+
+                # collect one stream of value changes per signal, probes first, followed by debug signals
+                streams = [(sig, cycles, values) for sig, (cycles, values) in probe_data.items()]
+
+                # Add all other signals in case debug flag is set
+                if debug:
+                    for path, code in signal_names.items():
+                        signal = vcd_data.signals[code]
+                        var_type = signal.nets[0]['type']
+                        if path not in probe_data and var_type != 'parameter': # signal was not listed yet
+                            name = signal.nets[0]['name']
+                            scope = signal.nets[0]['hier']
+                            size = signal.nets[0]['size']
+
+                            # register the signal
+                            reg[path] = vcd_writer.register_var(scope=scope, name=name, var_type=var_type, size=int(size))
+                            streams.append((path, *self.writer_columns(signal, *vcd_data.columns(code))))
+
+                cycles = [np.asarray(c, dtype=np.int64) for _, c, _ in streams]
+                events = [np.arange(len(c)) for c in cycles]
+
+                #############################
+                # Represent signals over time
+                #############################
+
+                if emu_time_scaled:
                     # time probe path
                     time_path = 'top.trace_port_gen_i' + '.' + scfg.time_probe.name
+                    emu_cycles = np.asarray(probe_data[time_path][0], dtype=np.int64)
+                    emu_times = np.asarray(probe_data[time_path][1], dtype=np.int64)
+
+                    # calculate emu_time offset and drop samples after wrapping has occurred
+                    offset = emu_time_offset(emu_cycles, emu_times)
+                    num_valid = valid_emu_time(emu_times)
+                    emu_cycles, emu_times = emu_cycles[:num_valid], emu_times[:num_valid]
+
+                    # map the cycle counts of all signals to interpolated emu_time in one pass per signal, changes
+                    # after the last emu_time sample are dropped
+                    times = []
+                    for k in range(len(streams)):
+                        mapped, valid = map_to_emu_time(cycles[k], emu_cycles, emu_times, offset=offset)
+                        times.append(mapped[valid])
+                        events[k] = events[k][valid]
+
+                ####################################
+                # Represent signals over cycle count
+                ####################################
+
+                else:
+                    times = cycles
+
+                # Register events of all signals in chronological order
+                if isinstance(vcd_writer, FastVCDWriter):
+                    # the fast writer merges the streams itself and takes the value columns as they are
+                    for s, (sig_name, _, values) in enumerate(streams):
+                        vcd_writer.change_columns(reg[sig_name], times[s], values[events[s]])
+                else:
+                    # convert data to native Python types (rather than numpy types) this is required for PyVCD
+                    values = [data[events[s]].tolist() for s, (_, _, data) in enumerate(streams)]
+                    stream_idx, event_idx = merge_order(times)
+                    for s, k in zip(stream_idx.tolist(), event_idx.tolist()):
+                        vcd_writer.change(reg[streams[s][0]], int(times[s][k]), values[s][k])
 
-                    # calculate emu_time offset
-                    offset = 0
-                    for idx, (cycle_count, timestamp) in enumerate(probe_data[time_path]['data']):
-                        # break if the current timestep is less than the previous one, since that means
-                        # wrapping has occurred
-                        if timestamp < prev_timestep:
-                            break
-                        prev_timestep = timestamp
-
-                        if timestamp > 0:
-                            break
-
-                        offset = cycle_count
-
-                    #############################
-                    # Represent signals over time
-                    #############################
-
-                    if emu_time_scaled:
-                        # Add an index to all signals in signal dict, in case debug option was selected:
-                        if debug:
-                            for sig in signal_dict.keys():
-                                signal_dict[sig]['index'] = 0
-
-                        for idx, (cycle_count, timestamp) in enumerate(probe_data[time_path]['data']):
-                            # break if timestamp is less than zero since it means that wrapping has occurred
-                            if timestamp < 0:
-                                break
-
-                            # store all available signals in list, any signal, that is no longer in the list will be skipped
-                            # signals, where the cycle_count is nop longer between current and next cycle count of the time
-                            # signal will be removed from the list
-                            sigs_in_interval = []
-                            for sig in probe_data.keys():
-                                sigs_in_interval.append((sig, None))
-
-                            # Add all other signals in case debug flag is set
-                            if debug:
-                                for signal in signal_names:
-                                    if not signal[0] in probe_data.keys() and not signal_dict[signal[1]]['nets'][0]['type'] == 'parameter':  # signal was not listed yet
-                                        sigs_in_interval.append((signal[0], signal[1]))
-
-                            # list of all activities within time interval
-                            timestep_events = []
-
-                            # As soon as all signals are no longer in the interval, timestep will advance
-                            while sigs_in_interval:
-                                for sig in sigs_in_interval:
-                                    if sig[0] in probe_data.keys():
-                                        sig_tuple = probe_data[sig[0]]['data'][probe_data[sig[0]]['index']]
-                                    else: # debug signals
-                                        sig_tuple = signal_dict[sig[1]]['cv'][signal_dict[sig[1]]['index']]
-
-                                    if cycle_count == sig_tuple[0]:
-                                        timestep_events.append([sig, timestamp, sig_tuple[1]])
-
-                                        if sig[0] in probe_data.keys():
-                                            probe_data[sig[0]]['index'] += 1
-                                        else:
-                                            signal_dict[sig[1]]['index'] += 1
-
-                                        # This signal no longer needs to be observed
-                                        sigs_in_interval.remove(sig)
-                                    else:
-                                        try: # Check if time signal is already at the end
-                                            next_timestamp = probe_data[time_path]['data'][idx + 1][0]
-                                        except: # Time signal has finished the end, finish conversion
-                                            sigs_in_interval = []
-                                            break
-                                        if round(next_timestamp - offset) > sig_tuple[0]:
-                                            # Note: There is always an offset between cycle count and timestamp  -> substract offset
-                                            # The cycle count from data signal does not have a match with emu_time signal's cycle count
-                                            # -> we need to apply interpolation in order to assign the timestamp properly
-                                            cycles_in_dt = probe_data[time_path]['data'][idx+1][0] - cycle_count
-                                            dt = probe_data[time_path]['data'][idx+1][1] - timestamp
-                                            interp_timestamp = int(dt/cycles_in_dt * (sig_tuple[0] - cycle_count + offset) + timestamp)
-
-                                            timestep_events.append([sig, interp_timestamp, sig_tuple[1]])
-
-                                            if sig[0] in probe_data.keys():
-                                                probe_data[sig[0]]['index'] += 1
-                                            else:
-                                                signal_dict[sig[1]]['index'] += 1
-                                        else:
-                                            # This signal no longer needs to be observed
-                                            sigs_in_interval.remove(sig)
-
-                            # Register events in time interval in chronological order
-                            timestep_events = sorted(timestep_events, key=self.sort_timestamp)
-                            for [name, timestamp, value] in timestep_events:
-                                writer.change(reg[name[0]], timestamp, value)
-
-                    ####################################
-                    # Represent signals over cycle count
-                    ####################################
-
-                    else:
-                        time_events = []  # store all events from result file
-                        for signal in probe_data.keys():
-                            for sig_tuple in probe_data[signal]['data']:
-                                time_events.append([signal, sig_tuple[0], sig_tuple[1]])
 
-                        # Add all other signals in case debug flag is set
-                        if debug:
-                            for signal in signal_names:
-                                if not signal[0] in probe_data.keys() and not signal_dict[signal[1]]['nets'][0]['type'] == 'parameter':  # signal was not listed yet
-                                    name = signal_dict[signal[1]]['nets'][0]['name']
-                                    hier = signal_dict[signal[1]]['nets'][0]['hier']
-                                    path = hier + '.' + name
-                                    for sig_tuple in signal_dict[signal[1]]['cv']:
-                                        time_events.append([path, sig_tuple[0], sig_tuple[1]])
 
-                        # Register events in chronological order
-                        time_events = sorted(time_events, key=self.sort_timestamp)
-                        for [sig_name, timestamp, value] in time_events:
-                            writer.change(reg[sig_name], timestamp, value)
+        else:
+            raise Exception(f'ERROR: No supported Result file format selected:{result_type_raw}')
 
+    def get_csv_col(self, name):
+        """
+        Getting unscaled data from csv file column, the CSV file was read beforehand by ILAData.read
+        :return: typed numpy array, see ILAData.columns
+        """
+        return self.ila_data.columns[name]
 
+    def writer_columns(self, signal, time, value, xz):
+        """
+        Convert the columns of a signal parsed from a VCD file to value columns both VCD writers accept. X and Z
+        states are written as 0, vectors wider than 64 bits as Python ints.
+
+        :param signal: VCDSignal the columns belong to
+        :param time: int64 array of cycle counts
+        :param value: value array, see VCDSignal
+        :param xz: uint8 X/Z mask
+        :return: cycle counts and values
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        if signal.kind == 'real':
+            return time, value
+        if signal.kind == 'packed':
+            ints = np.empty(len(value), dtype=object)
+            ints[:] = [int.from_bytes(row.tobytes(), 'big') for row in value]
+            return time, np.where(xz == 0, ints, 0)
+        return time, np.where(xz == 0, value, np.uint64(0))
+
+    @contextmanager
+    def open_writer(self, result_path, dt_scale, writer):
+        """
+        Open the converted result file and create the writer for it, an FSTWriter for FST files and the selected VCD
+        writer otherwise.
 
+        :param result_path: path to converted result file
+        :param dt_scale: timescale of the result file in seconds
+        :param writer: 'fast' for FastVCDWriter, 'pyvcd' for pyvcd's VCDWriter
+        """
+        if is_fst(result_path):
+            with FSTWriter(result_path, timescale=self.get_pyvcd_timescale(dt_scale),
+                           date=str(datetime.datetime.today())) as fst_writer:
+                yield fst_writer
         else:
-            raise Exception(f'ERROR: No supported Result file format selected:{result_type_raw}')
+            with open_file(result_path, 'w') as vcd:
+                with self.get_vcd_writer(vcd, dt_scale, writer) as vcd_writer:
+                    yield vcd_writer
 
-    def get_csv_col(self, name):
+    def get_vcd_writer(self, file, dt_scale, writer):
         """
-        Getting unscaled data from csv file column
-        :return:
+        Create the VCD writer used to write the converted result file.
+
+        :param file: text file object to write to
+        :param dt_scale: timescale of the VCD file in seconds
+        :param writer: 'fast' for FastVCDWriter, 'pyvcd' for pyvcd's VCDWriter
         """
-        # have to preview the first few lines
-        with open(self.result_path_raw, 'r') as f:
-            first_line = f.readline()
-            second_line = f.readline()
-
-        # determine how many lines to skip
-        if second_line.startswith('Radix'):
-            skip_header=2
+        timescale = self.get_pyvcd_timescale(dt_scale)
+        if writer == 'fast':
+            return FastVCDWriter(file, timescale=timescale, date=str(datetime.datetime.today()))
+        elif writer == 'pyvcd':
+            return VCDWriter(file, timescale=timescale, date=str(datetime.datetime.today()))
         else:
-            skip_header=1
-
-        # call a NumPy routine to read from the CSV file
-        return np.genfromtxt(
-            self.result_path_raw,
-            delimiter=',',
-            usecols=self.signal_lookup[name],
-            skip_header=skip_header
-        )
-
-    def sort_timestamp(self, element):
-        return element[1]
+            raise Exception(f'ERROR: No supported VCD writer selected:{writer}')
 
     def get_pyvcd_timescale(self, val):
         return si_format(val, precision=0) + 's'
\ No newline at end of file
@@ -42,6 +42,10 @@ setup(
         ]
     },
     install_requires=install_requires,
+    extras_require={
+        'fst': ['pylibfst'],
+        'zstd': ['zstandard']
+    },
     license='BSD 3-Clause "New" or "Revised" License',
     url=f'https://github.com/sgherbst/{name}',
     author='Gabriel Rutsch, Steven Herbst, Shivani Saravanan',
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from anasymod.utils.emu_time import emu_time_offset, valid_emu_time, map_to_emu_time, merge_order
+
+
+def reference_map(cycles, emu_cycles, emu_times, offset):
+    """
+    Map each cycle count on its own, following the rules documented for map_to_emu_time.
+    """
+    n = len(emu_cycles)
+    mapped, valid = [], []
+    for c in cycles:
+        if c in emu_cycles:
+            mapped.append(emu_times[emu_cycles.index(c)])
+            valid.append(True)
+            continue
+        i = min(max(sum(1 for e in emu_cycles if e - offset <= c) - 1, 0), n - 1)
+        if i == n - 1:
+            mapped.append(emu_times[i])
+            valid.append(False)
+            continue
+        slope = (emu_times[i + 1] - emu_times[i]) / (emu_cycles[i + 1] - emu_cycles[i])
+        mapped.append(int(slope * (c - emu_cycles[i] + offset) + emu_times[i]))
+        valid.append(True)
+    return mapped, valid
+
+
+def test_map_to_emu_time_example():
+    emu_cycles = [0, 10, 20]
+    emu_times = [0, 1000, 3000]
+    mapped, valid = map_to_emu_time([0, 5, 10, 15, 20, 25], emu_cycles, emu_times)
+    assert mapped.tolist() == [0, 500, 1000, 2000, 3000, 3000]
+    assert valid.tolist() == [True, True, True, True, True, False]
+
+
+@pytest.mark.parametrize('offset', [0, 1, 3])
+def test_map_to_emu_time_reference(offset):
+    rng = np.random.default_rng(offset)
+    emu_cycles = np.unique(rng.integers(0, 2000, size=150)).tolist()
+    emu_times = np.cumsum(rng.integers(1, 10000, size=len(emu_cycles))).tolist()
+    cycles = np.sort(rng.integers(0, 2100, size=1000)).tolist()
+
+    mapped, valid = map_to_emu_time(cycles, emu_cycles, emu_times, offset=offset)
+    expected_mapped, expected_valid = reference_map(cycles, emu_cycles, emu_times, offset)
+    assert valid.tolist() == expected_valid
+    assert mapped[valid].tolist() == np.asarray(expected_mapped)[expected_valid].tolist()
+    # without offset, mapped times of sorted cycle counts must not go back in time, otherwise pyvcd would refuse them
+    if offset == 0:
+        assert np.all(np.diff(mapped[valid]) >= 0)
+
+
+def test_map_to_emu_time_empty():
+    mapped, valid = map_to_emu_time([1, 2], [], [])
+    assert mapped.tolist() == [0, 0]
+    assert not valid.any()
+
+
+def test_emu_time_offset():
+    assert emu_time_offset([0, 1, 2, 3, 4], [0, 0, 0, 10, 20]) == 2
+    assert emu_time_offset([5, 6, 7], [10, 20, 30]) == 0
+    assert emu_time_offset([0, 1, 2], [0, 0, 0]) == 2
+
+
+def test_valid_emu_time():
+    assert valid_emu_time([0, 10, 20, -5, 10]) == 3
+    assert valid_emu_time([0, 10, 20]) == 3
+
+
+def test_merge_order():
+    a = [0, 2, 2, 5]
+    b = [1, 2, 6]
+    c = []
+    stream, index = merge_order([a, b, c])
+    assert list(zip(stream.tolist(), index.tolist())) == [(0, 0), (1, 0), (0, 1), (0, 2), (1, 1), (0, 3), (1, 2)]
+
+    rng = np.random.default_rng(0)
+    streams = [np.sort(rng.integers(0, 100, size=n)) for n in (50, 0, 80, 1)]
+    stream, index = merge_order(streams)
+    times = [int(streams[s][i]) for s, i in zip(stream.tolist(), index.tolist())]
+    assert times == sorted(times)
+    assert sorted(zip(stream.tolist(), index.tolist())) == [(s, i) for s in range(4) for i in range(len(streams[s]))]
+
+    stream, index = merge_order([[], []])
+    assert len(stream) == len(index) == 0
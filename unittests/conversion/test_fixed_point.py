@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from anasymod.utils.fixed_point import to_signed, to_float
+
+
+def reference_signed(v, width):
+    v &= (1 << width) - 1
+    return v - (1 << width) if v >> (width - 1) else v
+
+
+@pytest.mark.parametrize('width', [1, 8, 17, 63, 64])
+def test_to_signed(width):
+    rng = np.random.default_rng(width)
+    values = rng.integers(0, 2 ** 63, size=200, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    expected = [reference_signed(int(v), width) for v in values.tolist()]
+    assert to_signed(values, width).tolist() == expected
+
+
+def test_to_signed_wide():
+    width = 80
+    ints = [0, 1, (1 << 79), (1 << 80) - 1, 12345678901234567890123]
+    values = np.array([list(v.to_bytes(10, 'big')) for v in ints], dtype=np.uint8)
+    assert to_signed(values, width).tolist() == [reference_signed(v, width) for v in ints]
+
+
+def test_signed_values_unchanged():
+    # values that were already decoded as signed numbers within the width keep their value
+    values = np.array([-128, -1, 0, 1, 127], dtype=np.int64)
+    assert to_signed(values, 8).tolist() == values.tolist()
+    wide = np.empty(3, dtype=object)
+    wide[:] = [-(1 << 70), -1, (1 << 70)]
+    assert to_signed(wide, 72).tolist() == wide.tolist()
+
+
+def test_to_float():
+    values = np.array([0, 1, 0x7FFF, 0x8000, 0xFFFF], dtype=np.uint64)
+    np.testing.assert_array_equal(to_float(values, 16), [0.0, 1.0, 32767.0, -32768.0, -1.0])
+    np.testing.assert_array_equal(to_float(values, 16, exponent=-4),
+                                  [0.0, 0.0625, 32767 / 16, -2048.0, -0.0625])
+    assert to_float(values, 16).dtype == np.float64
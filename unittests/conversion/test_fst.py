@@ -0,0 +1,108 @@
+import io
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD, ProbeFST
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.fst import FSTWriter, ParseFST
+from anasymod.utils.vcd_writer import FastVCDWriter
+from unittests.vcd_utils import SIGNALS, random_vcd_text, probe_target, columns_to_tuples
+
+pytest.importorskip('pylibfst')
+
+
+def vcd_changes(text):
+    """
+    Collect the value changes of a VCD file written by random_vcd_text as arguments of FastVCDWriter.change_columns,
+    vectors are passed as strings of binary digits to keep X and Z bits.
+    """
+    changes = {code: ([], []) for _, code, _, _ in SIGNALS}
+    t = 0
+    for line in text.split('$enddefinitions $end', 1)[1].split('\n'):
+        if not line or line.startswith('$'):
+            continue
+        if line.startswith('#'):
+            t = int(line[1:])
+            continue
+        if line[0] in 'br':
+            value, code = line[1:].split()
+            value = float(value) if line[0] == 'r' else value
+        else:
+            value, code = line[0], line[1:]
+        changes[code][0].append(t)
+        changes[code][1].append(value)
+    return changes
+
+
+def write_changes(writer, text):
+    with writer:
+        for name, code, var_type, width in SIGNALS:
+            scope, _, var_name = name.rpartition('.')
+            var = writer.register_var(scope, var_name, var_type, size=None if var_type == 'real' else width)
+            writer.change_columns(var, *vcd_changes(text)[code])
+
+
+@pytest.fixture
+def results(tmp_path):
+    """
+    Write the same value changes to a VCD file with FastVCDWriter and to an FST file with FSTWriter.
+    """
+    text = random_vcd_text(n=2000)
+    vcd_path = tmp_path / 'a.vcd'
+    fst_path = str(tmp_path / 'a.fst')
+    with open(vcd_path, 'w') as f:
+        write_changes(FastVCDWriter(f, timescale='1 fs', date='today'), text)
+    write_changes(FSTWriter(fst_path, timescale='1 fs', date='today'), text)
+    return str(vcd_path), fst_path
+
+
+def test_fst_matches_vcd(results):
+    vcd_path, fst_path = results
+    expected = ParseVCD(vcd_path).parse_columnar()
+    data = ParseFST(fst_path).parse_columnar()
+
+    assert sorted(ParseFST(fst_path).list_sigs()) == sorted(ParseVCD(vcd_path).list_sigs())
+    assert data.timescale == '1fs'
+    for name, _, _, _ in SIGNALS:
+        signal, ref = data.signal(name), expected.signal(name)
+        assert signal.kind == ref.kind
+        assert columns_to_tuples(signal.time, signal.value, signal.xz) == \
+            columns_to_tuples(ref.time, ref.value, ref.xz), name
+
+
+def test_select_and_window(results):
+    vcd_path, fst_path = results
+    names = [SIGNALS[1][0], SIGNALS[4][0]]
+    data = ParseFST(fst_path).parse_window(t_start=1000, t_stop=2000, sigs=names)
+    expected = ParseVCD(vcd_path).parse_window(t_start=1000, t_stop=2000, sigs=names)
+    assert sorted(data.names()) == sorted(names)
+    for name in names:
+        code, ref_code = data.names()[name], expected.names()[name]
+        assert columns_to_tuples(*data.columns(code)) == columns_to_tuples(*expected.columns(ref_code)), name
+
+
+def test_real_values_exact(tmp_path):
+    path = str(tmp_path / 'r.fst')
+    values = [0.1, 1 / 3, -2.5e-17, 123456.789012345678]
+    writer = FSTWriter(path, timescale='1 ps')
+    var = writer.register_var('top', 'r', 'real')
+    writer.change_columns(var, [1, 2, 3, 4], values)
+    writer.close(timestamp=10)
+    signal = ParseFST(path).parse_columnar().signal('top.r')
+    assert signal.value.tolist() == [0.0] + values
+
+
+def test_probe_fst(results):
+    vcd_path, fst_path = results
+    vcd_probe = ProbeVCD(probe_target(vcd_path))
+    target = probe_target(vcd_path)
+    target.cfg.fst_path = fst_path
+    fst_probe = ProbeFST(target)
+
+    name = SIGNALS[1][0]
+    for kwargs in [dict(emu_time=False), dict(emu_time=True), dict(emu_time=True, t_start=500, t_stop=900)]:
+        expected = vcd_probe._probe(name, **kwargs)
+        data = fst_probe._probe(name, **kwargs)
+        np.testing.assert_array_equal(data.time, expected.time)
+        np.testing.assert_array_equal(data.value, expected.value)
+        np.testing.assert_array_equal(data.xz, expected.xz)
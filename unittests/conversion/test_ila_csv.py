@@ -0,0 +1,102 @@
+import random
+import numpy as np
+import pytest
+
+from anasymod.utils.ila_csv import ILAData, decode_digits, decode_decimal
+
+# columns of the generated CSV files: name with bit index range, radix and width
+COLUMNS = [
+    ('Sample in Buffer', 'UNSIGNED', 32),
+    ('trace_port_gen_i/emu_time[39:0]', 'UNSIGNED', 40),
+    ('trace_port_gen_i/v_out[15:0]', 'SIGNED', 16),
+    ('trace_port_gen_i/hex_sig[18:0]', 'HEX', 19),
+    ('trace_port_gen_i/bin_sig[4:0]', 'BINARY', 5),
+    ('trace_port_gen_i/oct_sig[7:0]', 'OCTAL', 8),
+    ('trace_port_gen_i/clk', 'BINARY', 1),
+    ('trace_port_gen_i/wide_hex[79:0]', 'HEX', 80),
+    ('trace_port_gen_i/wide_signed[71:0]', 'SIGNED', 72),
+]
+
+
+def format_value(value, radix, width):
+    if radix == 'SIGNED':
+        return str(value - (1 << width) if value >> (width - 1) else value)
+    if radix == 'UNSIGNED':
+        return str(value)
+    fmt = {'HEX': 'x', 'BINARY': 'b', 'OCTAL': 'o'}[radix]
+    digits = {'HEX': 4, 'BINARY': 1, 'OCTAL': 3}[radix]
+    return format(value, fmt).zfill(-(-width // digits))
+
+
+def write_ila_csv(path, n=300, seed=0, radix_row=True):
+    """
+    Write an ILA CSV file in the format of Vivado's write_hw_ila_data with random values.
+
+    :return: dict mapping each column name without bit index range to the list of its unsigned values
+    """
+    rng = random.Random(seed)
+    values = {name: [rng.getrandbits(width) for _ in range(n)] for name, _, width in COLUMNS}
+    with open(path, 'w') as f:
+        f.write(','.join(name for name, _, _ in COLUMNS) + '\n')
+        if radix_row:
+            f.write('Radix - ' + ','.join(radix for _, radix, _ in COLUMNS) + '\n')
+        for k in range(n):
+            f.write(','.join(format_value(values[name][k], radix, width) for name, radix, width in COLUMNS) + '\n')
+    return {name.split('[')[0]: v for name, v in values.items()}
+
+
+@pytest.mark.parametrize('chunk_rows', [7, 65536])
+def test_read_all_radix_formats(tmp_path, chunk_rows):
+    expected = write_ila_csv(tmp_path / 'ila.csv')
+    data = ILAData.read(str(tmp_path / 'ila.csv'), chunk_rows=chunk_rows)
+
+    assert data.names == list(expected)
+    for name, radix, width in COLUMNS:
+        # columns without bit index range, e.g. the sample index, are assumed to be single bits
+        assert data.widths[name.split('[')[0]] == (width if '[' in name else 1)
+        name = name.split('[')[0]
+        assert data.radix[name] == radix
+        values = expected[name]
+        if radix == 'SIGNED' and width <= 64:
+            assert data.columns[name].dtype == np.int64
+            values = [v - (1 << width) if v >> (width - 1) else v for v in values]
+        elif width > 64:
+            assert data.columns[name].shape == (len(values), (width + 7) // 8)
+        else:
+            assert data.columns[name].dtype == np.uint64
+        assert data.to_ints(name) == values, name
+
+
+def test_read_without_radix_row(tmp_path):
+    path = tmp_path / 'ila.csv'
+    with open(path, 'w') as f:
+        f.write('Sample in Buffer,trace_port_gen_i/v_out[7:0]\n')
+        f.write('0,-5\n1,127\n2,-128\n')
+    data = ILAData.read(str(path))
+    assert data.radix['trace_port_gen_i/v_out'] is None
+    assert data.columns['trace_port_gen_i/v_out'].tolist() == [-5, 127, -128]
+
+
+def test_unsupported_radix(tmp_path):
+    path = tmp_path / 'ila.csv'
+    with open(path, 'w') as f:
+        f.write('a[3:0]\nRadix - ASCII\nx\n')
+    with pytest.raises(Exception):
+        ILAData.read(str(path))
+
+
+def test_decode_digits():
+    raw = [b'1f', b'F', b'0', b'123', b'x1']
+    assert decode_digits(raw, 8, 'HEX').tolist() == [0x1f, 0xf, 0, 0x23, 0x1]
+    assert decode_digits([b'101', b'1', b'11111'], 3, 'BINARY').tolist() == [5, 1, 7]
+    assert decode_digits([b'777', b'10'], 9, 'OCTAL').tolist() == [511, 8]
+    assert decode_digits([], 8, 'HEX').shape == (0,)
+    wide = decode_digits([b'1' + b'0' * 19], 80, 'HEX')
+    assert int.from_bytes(wide[0].tobytes(), 'big') == 1 << 76
+
+
+def test_decode_decimal():
+    assert decode_decimal(['-1', '5'], 8).tolist() == [-1, 5]
+    assert decode_decimal([b'18446744073709551615'], 64, signed=False).tolist() == [2 ** 64 - 1]
+    wide = decode_decimal(['-1'], 72)
+    assert int.from_bytes(wide[0].tobytes(), 'big') == (1 << 72) - 1
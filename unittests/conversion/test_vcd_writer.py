@@ -0,0 +1,75 @@
+import io
+import random
+import pytest
+
+from anasymod.utils.vcd_writer import FastVCDWriter
+
+vcd_writer = pytest.importorskip('vcd.writer')
+
+VARS = [
+    ('top.trace_port_gen_i', 'v_out', 'real', None),
+    ('top.trace_port_gen_i', 'clk', 'wire', 1),
+    ('top.trace_port_gen_i', 'count', 'reg', 16),
+    ('top.trace_port_gen_i.sub', 'wide', 'reg', 80),
+]
+
+
+def random_changes(seed=0, n=500):
+    """
+    Create value changes of the variables in VARS, including repeated values and several changes at one timestamp.
+    """
+    rng = random.Random(seed)
+    changes = []
+    for k, (_, _, var_type, size) in enumerate(VARS):
+        t = 0
+        for _ in range(n):
+            t += rng.choice([0, 1, 1, 3])
+            if var_type == 'real':
+                value = rng.choice([0.0, 1.5, rng.uniform(-1e3, 1e3)])
+            elif size == 1:
+                value = rng.choice([0, 1, True, 'x'])
+            else:
+                value = rng.choice([0, 1, rng.getrandbits(size), -rng.getrandbits(size - 1)])
+            changes.append((t, k, value))
+    return changes
+
+
+def write_pyvcd(changes):
+    f = io.StringIO()
+    with vcd_writer.VCDWriter(f, timescale='1 fs', date='today') as writer:
+        handles = [writer.register_var(scope, name, var_type, size=size) for scope, name, var_type, size in VARS]
+        for t, k, value in sorted(changes, key=lambda c: c[0]):
+            writer.change(handles[k], t, value)
+    return f.getvalue()
+
+
+def write_fast(changes):
+    f = io.StringIO()
+    with FastVCDWriter(f, timescale='1 fs', date='today') as writer:
+        handles = [writer.register_var(scope, name, var_type, size=size) for scope, name, var_type, size in VARS]
+        for k, handle in enumerate(handles):
+            own = [(t, value) for t, j, value in changes if j == k]
+            writer.change_columns(handle, [t for t, _ in own], [value for _, value in own])
+    return f.getvalue()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_same_output_as_pyvcd(seed):
+    changes = random_changes(seed=seed)
+    assert write_fast(changes) == write_pyvcd(changes)
+
+
+def test_out_of_range_value():
+    f = io.StringIO()
+    writer = FastVCDWriter(f)
+    var = writer.register_var('top', 'count', 'reg', size=4)
+    writer.change_columns(var, [0, 1], [1, 16])
+    with pytest.raises(Exception):
+        writer.close()
+
+
+def test_duplicate_variable():
+    writer = FastVCDWriter(io.StringIO())
+    writer.register_var('top', 'count', 'reg', size=4)
+    with pytest.raises(Exception):
+        writer.register_var('top', 'count', 'reg', size=4)
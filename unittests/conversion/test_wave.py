@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from anasymod.enums import ResultFileTypes
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.wave import ConvertWaveform
+from unittests.vcd_utils import TIME_PROBE, DT, write_random_vcd
+
+pytest.importorskip('vcd')
+
+SCFG = SimpleNamespace(analog_probes=[SimpleNamespace(name='v_out', width=16, exponent=-8)],
+                       digital_probes=[SimpleNamespace(name='clk', width=1), SimpleNamespace(name='wide', width=80)],
+                       dec_cmp=SimpleNamespace(name='dec_cmp', width=1),
+                       time_probe=SimpleNamespace(name='emu_time', width=64))
+
+
+def convert(tmp_path, raw, writer, **kwargs):
+    path = tmp_path / f'{writer}.vcd'
+    ConvertWaveform(SCFG, ResultFileTypes.VCD, raw, str(path), writer=writer, **kwargs)
+    # drop the $date section, which differs between the writers
+    return path.read_text().split('$end', 1)[1]
+
+
+@pytest.mark.parametrize('emu_time_scaled', [False, True])
+@pytest.mark.parametrize('debug', [False, True])
+def test_vcd_to_vcd(tmp_path, emu_time_scaled, debug):
+    raw = write_random_vcd(tmp_path / 'raw.vcd', n=500)
+    text = convert(tmp_path, raw, 'fast', float_type=False, emu_time_scaled=emu_time_scaled, debug=debug)
+    assert text == convert(tmp_path, raw, 'pyvcd', float_type=False, emu_time_scaled=emu_time_scaled, debug=debug)
+
+    src = ParseVCD(raw).parse_columnar()
+    out = ParseVCD(str(tmp_path / 'fast.vcd')).parse_columnar()
+    assert ('top.trace_port_gen_i.r_sig' in out.names()) == debug
+
+    # X and Z states of digital probes are written as 0, wide vectors are kept
+    clk = out.signal('top.trace_port_gen_i.clk')
+    assert not clk.xz.any()
+    assert set(clk.value.tolist()) <= {0, 1}
+    wide_src, wide_out = src.signal('top.trace_port_gen_i.wide'), out.signal('top.trace_port_gen_i.wide')
+    np.testing.assert_array_equal(np.unique(wide_out.value, axis=0), np.unique(wide_src.value, axis=0))
+
+    # analog probes are scaled by their fixed-point exponent
+    v_out = out.signal('top.trace_port_gen_i.v_out')
+    assert v_out.kind == 'real'
+    assert np.all(v_out.value * 2 ** 8 == np.round(v_out.value * 2 ** 8))
+
+    # the timestamps are emulation times or cycle counts
+    time_probe = src.signal(TIME_PROBE)
+    scale = DT if emu_time_scaled else 1
+    assert out.signal(TIME_PROBE).time[-1] == time_probe.time[-1] * scale
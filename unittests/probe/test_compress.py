@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import Probe
+from anasymod.utils.probe_data import ProbeData, StepView, change_mask
+
+
+def random_wave(n, seed=0, wide=False):
+    rng = np.random.default_rng(seed)
+    time = np.cumsum(rng.integers(1, 5, n))
+    if wide:
+        value = rng.integers(0, 2, (n, 10)).astype(np.uint8)
+    else:
+        value = rng.integers(0, 3, n).astype(np.uint64)
+    xz = (rng.random(n) < 0.1).astype(np.uint8)
+    return ProbeData(time, value, xz)
+
+
+def test_change_mask():
+    assert change_mask(np.array([1, 1, 2, 2, 1])).tolist() == [True, False, True, False, True]
+    assert change_mask(np.array([1, 1, 1]), np.array([0, 1, 1], dtype=np.uint8)).tolist() == [True, True, False]
+    # packed values of wide vectors differ if any of their bytes differs
+    packed = np.array([[0, 1], [0, 1], [1, 1]], dtype=np.uint8)
+    assert change_mask(packed).tolist() == [True, False, True]
+    assert change_mask(np.array([])).tolist() == []
+
+
+@pytest.mark.parametrize('wide', [False, True])
+def test_step_semantics_preserved(wide):
+    wave = random_wave(1000, wide=wide)
+    compressed = wave.compress()
+    assert compressed.num_samples < wave.num_samples
+    assert (compressed.time[0], compressed.time[-1]) == (wave.time[0], wave.time[-1])
+
+    # the compressed waveform holds the same value and X/Z state at every sample time of the original one
+    steps = StepView(compressed)
+    np.testing.assert_array_equal(steps.value_at(wave.time), wave.value)
+    np.testing.assert_array_equal(steps.xz[steps.index_at(wave.time)], wave.xz)
+
+    # compression is idempotent
+    assert compressed.compress() is compressed
+
+
+def test_probe_compress_array():
+    compressed = Probe._compress(None, np.array([[0, 1, 2, 3, 4], [1.0, 1.0, 2.0, 2.0, 2.0]]))
+    assert isinstance(compressed, ProbeData)
+    assert compressed.time.tolist() == [0, 2, 4]
+    assert compressed.value.tolist() == [1.0, 2.0, 2.0]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.decimate import MinMaxPyramid, minmax_indices, lttb_indices
+from unittests.vcd_utils import write_random_vcd, probe_target
+
+V_OUT = 'top.trace_port_gen_i.v_out'
+
+
+@pytest.fixture
+def value():
+    return np.random.default_rng(0).standard_normal(100000)
+
+
+@pytest.mark.parametrize('lo, hi', [(0, None), (123, 45678), (99000, 99990), (500, 520)])
+@pytest.mark.parametrize('max_points', [6, 100, 1000])
+def test_minmax_keeps_extrema(value, lo, hi, max_points):
+    pyramid = MinMaxPyramid(value)
+    idx = pyramid.indices(value, max_points, lo=lo, hi=hi)
+    hi = len(value) if hi is None else hi
+    assert len(idx) <= max_points
+    assert np.all(np.diff(idx) > 0)
+    assert idx[0] == lo and idx[-1] == hi - 1
+    # the extrema of the window are always part of the decimation
+    assert lo + np.argmin(value[lo:hi]) in idx
+    assert lo + np.argmax(value[lo:hi]) in idx
+
+
+def test_minmax_indices(value):
+    idx = minmax_indices(value, 1000, lo=100, hi=90000)
+    assert len(idx) <= 1000
+    assert idx[0] == 100 and idx[-1] == 89999
+    assert 100 + np.argmax(value[100:90000]) in idx
+
+
+def test_pyramid_nbytes(value):
+    pyramid = MinMaxPyramid(value)
+    # the pyramid does not keep the sample values, its size only covers the bucket indices
+    assert not hasattr(pyramid, 'value')
+    assert pyramid.nbytes == sum(imin.nbytes + imax.nbytes for imin, imax in pyramid.levels)
+    assert pyramid.nbytes < 2.5 * len(value)
+    with pytest.raises(Exception):
+        pyramid.indices(value[:-1], 100)
+
+
+def test_lttb(value):
+    time = np.arange(len(value))
+    idx = lttb_indices(time, value, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(value) - 1
+    assert np.all(np.diff(idx) > 0)
+    np.testing.assert_array_equal(lttb_indices(time, value, 500, lo=10, hi=300), np.arange(10, 300))
+
+
+def test_probe_decimate(tmp_path):
+    probe = ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=5000)))
+    full = probe._probe(V_OUT, emu_time=False)
+    for method in ('minmax', 'lttb'):
+        wave = probe._decimate(V_OUT, max_points=100, method=method)
+        assert wave.num_samples <= 100
+        # decimated samples are a subset of the full-resolution samples
+        idx = np.searchsorted(full.time, wave.time)
+        np.testing.assert_array_equal(full.value[idx], wave.value)
+
+    window = probe._decimate(V_OUT, max_points=50, t_start=1000, t_stop=2000)
+    assert window.time[0] <= 1000 and window.time[-1] <= 2000
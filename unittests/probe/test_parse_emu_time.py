@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.probe_data import ProbeData
+from unittests.vcd_utils import write_random_vcd, probe_target
+
+V_OUT = 'top.trace_port_gen_i.v_out'
+
+
+def reference_parse_emu_time(data, emu_time):
+    """
+    Loop based mapping of the former implementation: each sample gets the time of the first time probe sample at or
+    after its cycle count, samples after the last time probe sample keep their cycle count.
+    """
+    time = data[0].astype(np.float64)
+    t = 0
+    for i in range(len(time)):
+        while data[0][i] > emu_time[0][t]:
+            t += 1
+            if t >= len(emu_time[0]):
+                break
+        if t >= len(emu_time[0]):
+            break
+        time[i] = emu_time[1][t]
+    return time
+
+
+@pytest.fixture
+def probe(tmp_path):
+    return ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=1000)))
+
+
+def random_waves(seed):
+    rng = np.random.default_rng(seed)
+    emu_cycles = np.unique(rng.integers(0, 1000, size=100))
+    emu_time = ProbeData(emu_cycles, np.cumsum(rng.random(len(emu_cycles))))
+    cycles = np.sort(rng.integers(0, 1100, size=300))
+    data = ProbeData(cycles, rng.integers(0, 10, size=len(cycles)).astype(np.uint64))
+    return data, emu_time
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_reference(probe, seed):
+    data, emu_time = random_waves(seed)
+    mapped = probe.parse_emu_time(data=data, emu_time=emu_time)
+    np.testing.assert_array_equal(mapped.time, reference_parse_emu_time(data, emu_time))
+    assert mapped.value is data.value
+    assert not mapped.time.flags.writeable
+
+
+def test_interpolate(probe):
+    emu_time = ProbeData(np.array([10, 20, 40]), np.array([1.0, 2.0, 4.0]))
+    data = ProbeData(np.array([0, 10, 15, 30, 40, 50]), np.zeros(6))
+    assert probe.parse_emu_time(data=data, emu_time=emu_time).time.tolist() == [1.0, 1.0, 2.0, 4.0, 4.0, 50.0]
+    assert probe.parse_emu_time(data=data, emu_time=emu_time, interpolate=True).time.tolist() == \
+        [1.0, 1.0, 1.5, 3.0, 4.0, 50.0]
+
+
+def test_memoized(probe):
+    first = probe._probe(V_OUT, emu_time=True)
+    assert probe._probe(V_OUT, emu_time=True) is first
+    interpolated = probe._probe(V_OUT, emu_time=True, interpolate=True)
+    assert interpolated is not first
+    assert probe._probe(V_OUT, emu_time=True, interpolate=True) is interpolated
+
+    # the memoized variants are dropped together with the waveform
+    probe.discardloadedsimdatafiles()
+    again = probe._probe(V_OUT, emu_time=True)
+    assert again is not first
+    np.testing.assert_array_equal(again.time, first.time)
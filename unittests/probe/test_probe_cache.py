@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.probe_cache import ProbeCache, ANY, data_size
+from anasymod.utils.probe_data import ProbeData
+from unittests.vcd_utils import write_random_vcd, probe_target
+
+
+def wave(n):
+    return ProbeData(np.arange(n, dtype=np.int64), np.zeros(n), np.zeros(n, dtype=np.uint8))
+
+
+def test_lru_eviction():
+    size = data_size(wave(100))
+    cache = ProbeCache(max_bytes=3 * size)
+    for k in range(3):
+        cache.put('sim', None, f's{k}', wave(100))
+    assert cache.nbytes == 3 * size
+
+    # s0 becomes the most recently used entry, so s1 is evicted first
+    assert cache.get('sim', None, 's0') is not None
+    cache.put('sim', None, 's3', wave(100))
+    assert ('sim', None, 's1') not in cache
+    assert all(('sim', None, s) in cache for s in ('s0', 's2', 's3'))
+    assert cache.evictions == 1
+    assert cache.nbytes == 3 * size
+
+    # entries larger than the whole budget are not cached and don't evict others
+    cache.put('sim', None, 'big', wave(1000))
+    assert ('sim', None, 'big') not in cache
+    assert len(cache) == 3
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['entries'], stats['max_bytes']) == (1, 3, 3 * size)
+
+
+def test_replace_and_variants():
+    cache = ProbeCache()
+    cache.put('sim', None, 's', wave(10))
+    cache.put('sim', None, 's', wave(20))
+    cache.put('sim', None, 's', wave(20), variant='emu_time')
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * data_size(wave(20))
+    assert cache.get('sim', None, 'x') is None
+    assert cache.misses == 1
+
+
+def test_discard():
+    cache = ProbeCache()
+    for target in ('sim', 'fpga'):
+        for run in (None, 1, 2):
+            cache.put(target, run, 's', wave(10))
+            cache.put(target, run, 's', wave(10), variant='emu_time')
+    assert cache.discard(target='sim', run=1) == 2
+    assert cache.runs('sim') == sorted([None, 2], key=str)
+    assert cache.discard(signal='s', run=None) == 4
+    assert cache.discard(target=ANY) == 6
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_disabled():
+    cache = ProbeCache(max_bytes=0)
+    cache.put('sim', None, 's', wave(10))
+    assert len(cache) == 0
+
+
+def test_threads():
+    cache = ProbeCache(max_bytes=50 * data_size(wave(10)))
+
+    def worker(k):
+        for i in range(200):
+            cache.put('sim', k, f's{i}', wave(10))
+            cache.get('sim', k, f's{i // 2}')
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) == 50
+    assert cache.nbytes == 50 * data_size(wave(10))
+
+
+def test_probe_budget(tmp_path):
+    # probes share the cache and respect its budget
+    cache = ProbeCache(max_bytes=20000)
+    probe = ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=2000)), cache=cache)
+    names = ['top.trace_port_gen_i.v_out', 'top.trace_port_gen_i.clk', 'top.trace_port_gen_i.wide']
+    first = probe._probe(names, emu_time=False)
+    assert cache.nbytes <= 20000
+    assert cache.evictions > 0
+    again = probe._probe(names, emu_time=False)
+    for name in names:
+        np.testing.assert_array_equal(again[name].value, first[name].value)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.probe_data import ProbeData
+from unittests.vcd_utils import SIGNALS, DT, random_vcd_text, write_random_vcd, parse_reference, probe_target
+
+
+@pytest.fixture
+def probe(tmp_path):
+    return ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=500)))
+
+
+def test_typed_arrays(probe):
+    data = probe._probe([name for name, _, _, _ in SIGNALS], emu_time=False)
+    dtypes = {
+        'emu_time': np.float64,
+        'v_out': np.uint64,
+        'clk': np.uint64,
+        'r_sig': np.float64,
+        'wide': np.uint8,
+    }
+    for name, _, _, width in SIGNALS:
+        wave = data[name]
+        assert isinstance(wave, ProbeData)
+        assert wave.time.dtype == np.int64
+        assert wave.value.dtype == dtypes[name.split('.')[-1]], name
+        assert wave.xz.dtype == np.uint8
+        assert not wave.time.flags.writeable
+    assert data['top.trace_port_gen_i.wide'].value.shape[1] == 10
+
+
+def test_values_match_reference(probe):
+    reference = parse_reference(random_vcd_text(n=500))
+    for name, code, _, _ in SIGNALS[1:]:
+        wave = probe._probe(name, emu_time=False)
+        changes = reference[code]
+        # run-length compression keeps every sample that differs from its predecessor
+        samples = dict((t, (v, xz)) for t, v, xz in changes)
+        for t, v, xz in zip(wave.time.tolist(), np.asarray(wave).tolist()[1], wave.xz.tolist()):
+            if t in samples:
+                assert (v, xz) == samples[t], name
+
+    time_probe = probe._probe(SIGNALS[0][0], emu_time=False)
+    # the time probe is converted to seconds and never compressed
+    assert len(time_probe.time) == len(reference[SIGNALS[0][1]]) + 1
+    np.testing.assert_allclose(time_probe.value[1:-1], time_probe.time[1:-1] * DT * 1e-12)
+
+
+def test_legacy_interface():
+    data = ProbeData(np.array([0, 1, 2]), np.array([1.0, 2.0, 2.0]))
+    time, value = data
+    assert time is data[0] and value is data[1]
+    assert data.shape == (2, 3)
+    np.testing.assert_array_equal(np.asarray(data), [[0, 1, 2], [1.0, 2.0, 2.0]])
+    assert data.nbytes == data.time.nbytes + data.value.nbytes + data.xz.nbytes
+
+    wide = ProbeData(np.array([0, 5]), np.array([[0, 1], [1, 0]], dtype=np.uint8))
+    assert np.asarray(wide).tolist() == [[0, 5], [1, 256]]
+
+
+def test_compress():
+    data = ProbeData(np.arange(6), np.array([1, 1, 2, 2, 2, 3]), np.array([0, 0, 0, 1, 1, 0], dtype=np.uint8))
+    compressed = data.compress()
+    assert compressed.time.tolist() == [0, 2, 3, 5]
+    assert compressed.value.tolist() == [1, 2, 2, 3]
+    # the last sample is kept, so the waveform keeps its time range
+    data = ProbeData(np.arange(4), np.array([1.0, 1.0, 1.0, 1.0]))
+    assert data.compress().time.tolist() == [0, 3]
+    unchanged = ProbeData(np.arange(3), np.array([1, 2, 3]))
+    assert unchanged.compress() is unchanged
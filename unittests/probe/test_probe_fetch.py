@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.VCD_parser import ParseVCD
+from unittests.vcd_utils import SIGNALS, TIME_PROBE, write_random_vcd, probe_target
+
+V_OUT = 'top.trace_port_gen_i.v_out'
+CLK = 'top.trace_port_gen_i.clk'
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """
+    Record the identifier codes of each decoding pass over the VCD body.
+    """
+    passes = []
+    decode_body = ParseVCD._decode_body
+
+    def recording(self, data, *args, **kwargs):
+        passes.append(sorted(data.signals))
+        return decode_body(self, data, *args, **kwargs)
+
+    monkeypatch.setattr(ParseVCD, '_decode_body', recording)
+    return passes
+
+
+@pytest.fixture
+def probe(tmp_path):
+    return ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=1000)))
+
+
+def test_only_requested_signals_decoded(probe, decoded):
+    probe._probe(V_OUT, emu_time=False)
+    assert decoded == [['"']]
+
+    # the time probe is decoded along with the data signal, cached signals are not decoded again
+    probe._probe([V_OUT, CLK], emu_time=True)
+    assert decoded == [['"'], ['!', '#']]
+
+    probe._probe([V_OUT, CLK, TIME_PROBE], emu_time=False)
+    assert len(decoded) == 2
+
+
+def test_batch_matches_single(probe, tmp_path):
+    names = [name for name, _, _, _ in SIGNALS]
+    batch = probe._probe(names, emu_time=True)
+    single = ProbeVCD(probe_target(probe.target.cfg.vcd_path, name='other'))
+    for name in names:
+        expected = single._probe(name, emu_time=True, cache=False)
+        np.testing.assert_array_equal(batch[name].time, expected.time)
+        np.testing.assert_array_equal(batch[name].value, expected.value)
+        np.testing.assert_array_equal(batch[name].xz, expected.xz)
+
+
+def test_unknown_signal(probe, decoded):
+    with pytest.raises(ValueError):
+        probe._probe([V_OUT, 'top.trace_port_gen_i.missing'], emu_time=False)
+    assert decoded == []
+
+
+def test_update_data_per_signal(probe):
+    vcd_handle = probe.setup_data_access()
+    data = probe.fetch_simdata(vcd_handle, sigs=[V_OUT, CLK], update_data=[CLK])
+    timestamps = ParseVCD(probe.target.cfg.vcd_path).parse_columnar().timestamps.view()
+    # the held signal gets a sample at every timestamp, the other one only at its value changes
+    assert set(timestamps[timestamps != 0].tolist()) <= set(data[CLK].time.tolist())
+    assert len(data[V_OUT].time) < len(data[CLK].time)
+
+
+def test_sparse_signal_window(tmp_path):
+    # a signal that changes only once, so most blocks contain no value change of it
+    path = tmp_path / 'sparse.vcd'
+    text = open(write_random_vcd(tmp_path / 'a.vcd', n=3000)).read()
+    head, body = text.split('$enddefinitions $end\n')
+    head = head.replace('$upscope $end\n$upscope $end\n', '$var wire 1 & sparse $end\n$upscope $end\n$upscope $end\n')
+    pos = body.index('\n#', len(body) // 2) + 1
+    body = body[:pos] + body[pos:].replace('\n', '\n1&\n', 1)
+    path.write_text(head + '$enddefinitions $end\n' + body)
+
+    parser = ParseVCD(str(path))
+    parser.build_index(interval=1024)
+    window = parser.parse_window(t_start=100, t_stop=8000, sigs=['top.trace_port_gen_i.sparse'])
+    full = ParseVCD(str(path)).parse_columnar(sigs=['top.trace_port_gen_i.sparse']).window(100, 8000)
+    assert window.signals['&'].value.tolist()[-1] == 1
+    np.testing.assert_array_equal(window.signals['&'].value, full.signals['&'].value)
+    np.testing.assert_array_equal(window.signals['&'].time, full.signals['&'].time)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from anasymod.probe import ProbeVCD
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.probe_data import StepView
+from unittests.vcd_utils import write_random_vcd, probe_target
+
+V_OUT = 'top.trace_port_gen_i.v_out'
+WINDOWS = [(100, 2000), (1007, 1007), (0, 50), (3000, None), (None, 400)]
+
+
+@pytest.fixture
+def probe(tmp_path):
+    return ProbeVCD(probe_target(write_random_vcd(tmp_path / 'a.vcd', n=2000)))
+
+
+@pytest.mark.parametrize('t_start, t_stop', WINDOWS)
+@pytest.mark.parametrize('interpolate', [False, True])
+def test_window_matches_full_probe(probe, t_start, t_stop, interpolate):
+    full = probe._probe(V_OUT, emu_time=False)
+    full_emu = probe._probe(V_OUT, emu_time=True, interpolate=interpolate)
+    window = probe._probe(V_OUT, emu_time=False, t_start=t_start, t_stop=t_stop)
+    window_emu = probe._probe(V_OUT, emu_time=True, interpolate=interpolate, t_start=t_start, t_stop=t_stop)
+
+    lo = 0 if t_start is None else t_start
+    hi = np.inf if t_stop is None else t_stop
+    assert np.all((window.time >= lo) & (window.time <= hi))
+
+    # each sample of the window holds the value of the full waveform at its cycle count
+    np.testing.assert_array_equal(window.value, StepView(full).value_at(window.time))
+    np.testing.assert_array_equal(window_emu.value, window.value)
+
+    # all value changes within the window are contained in it and are mapped to the same emulation time
+    inside = (full.time > lo) & (full.time <= hi)
+    idx = np.searchsorted(window.time, full.time[inside])
+    np.testing.assert_array_equal(window.time[idx], full.time[inside])
+    np.testing.assert_array_equal(window_emu.time[idx], full_emu.time[inside])
+
+
+def test_window_does_not_depend_on_cache(probe):
+    window = probe._probe(V_OUT, emu_time=True, t_start=1000, t_stop=1200)
+    probe.discardloadedsimdatafiles()
+    uncached = probe._probe(V_OUT, emu_time=True, t_start=1000, t_stop=1200, cache=False)
+    np.testing.assert_array_equal(window.time, uncached.time)
+    np.testing.assert_array_equal(window.value, uncached.value)
+
+
+@pytest.mark.parametrize('t_start, t_stop', WINDOWS)
+@pytest.mark.parametrize('interpolate', [False, True])
+def test_window_maps_time_probe_span(tmp_path, monkeypatch, t_start, t_stop, interpolate):
+    path = write_random_vcd(tmp_path / 'a.vcd', n=2000)
+    full_emu = ProbeVCD(probe_target(path))._probe(V_OUT, emu_time=True, interpolate=interpolate, t_start=t_start,
+                                                   t_stop=t_stop, cache=False)
+
+    # with the time probe not cached, only the value changes around the window are decoded for the mapping
+    probe = ProbeVCD(probe_target(path))
+    probe.setup_data_access().build_index(interval=1024)
+    monkeypatch.setattr(ParseVCD, 'parse_columnar', None)
+    window_emu = probe._probe(V_OUT, emu_time=True, interpolate=interpolate, t_start=t_start, t_stop=t_stop)
+    np.testing.assert_array_equal(window_emu.time, full_emu.time)
+    np.testing.assert_array_equal(window_emu.value, full_emu.value)
+    assert len(probe.cache) == 0
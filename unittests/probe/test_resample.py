@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from anasymod.utils.probe_data import ProbeData
+from anasymod.utils.resample import uniform_grid, resample, iter_resample
+
+
+@pytest.fixture
+def waves():
+    return {'a': ProbeData(np.array([0.0, 1.0, 2.5, 4.0]), np.array([1, 2, 3, 4], dtype=np.uint64),
+                           np.array([0, 0, 1, 0], dtype=np.uint8)),
+            'b': ProbeData(np.array([0.5, 3.0, 5.0]), np.array([10.0, 20.0, 30.0]))}
+
+
+def test_uniform_grid():
+    assert uniform_grid(0, 10, 1) == 11
+    assert uniform_grid(0, 10.5, 1) == 11
+    # t_stop is on the grid despite rounding errors of t_stop - t_start
+    assert uniform_grid(0.1, 0.7, 0.1) == 7
+    assert uniform_grid(5, 4, 1) == 0
+    with pytest.raises(Exception):
+        uniform_grid(0, 1, 0)
+
+
+def test_zoh(waves):
+    result = resample(waves, 1.0)
+    # the grid starts once all waveforms are defined and ends with the last sample
+    np.testing.assert_array_equal(result['a'].time, [0.5, 1.5, 2.5, 3.5, 4.5])
+    assert result['a'].time is result['b'].time
+    assert result['a'].value.tolist() == [1, 2, 3, 3, 4]
+    assert result['a'].value.dtype == np.uint64
+    assert result['a'].xz.tolist() == [0, 0, 1, 1, 0]
+    assert result['b'].value.tolist() == [10.0, 10.0, 10.0, 20.0, 20.0]
+
+
+def test_linear(waves):
+    result = resample(waves, 0.5, t_start=1.0, t_stop=3.0, method='linear')
+    np.testing.assert_allclose(result['a'].value, [2.0, 2 + 1 / 3, 2 + 2 / 3, 3.0, 3 + 1 / 3])
+    np.testing.assert_allclose(result['b'].value, [12.0, 14.0, 16.0, 18.0, 20.0])
+
+
+def test_duplicate_times():
+    # of several samples at the same time, the last one is held
+    wave = ProbeData(np.array([0.0, 1.0, 1.0, 2.0]), np.array([1, 2, 3, 4]))
+    assert resample({'w': wave}, 1.0)['w'].value.tolist() == [1, 3, 4]
+
+
+@pytest.mark.parametrize('method', ['zoh', 'linear'])
+def test_chunks_match_full(method):
+    rng = np.random.default_rng(0)
+    wave = ProbeData(np.cumsum(rng.random(1000)), rng.standard_normal(1000))
+    full = resample({'w': wave}, 0.1, method=method)['w']
+    chunks = list(iter_resample({'w': wave}, 0.1, method=method, chunk_size=333))
+    assert all(chunk['w'].num_samples <= 333 for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate([chunk['w'].time for chunk in chunks]), full.time)
+    np.testing.assert_array_equal(np.concatenate([chunk['w'].value for chunk in chunks]), full.value)
+    np.testing.assert_array_equal(resample({'w': wave}, 0.1, method=method, chunk_size=333)['w'].value, full.value)
+
+
+def test_errors(waves):
+    with pytest.raises(Exception):
+        resample(waves, 1.0, method='cubic')
+    wide = ProbeData(np.array([0, 1]), np.zeros((2, 10), dtype=np.uint8))
+    with pytest.raises(Exception):
+        resample({'w': wide}, 1.0, method='linear')
+    assert resample({'w': wide}, 1.0)['w'].value.shape == (2, 10)
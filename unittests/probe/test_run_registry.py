@@ -0,0 +1,106 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import yaml
+
+from anasymod.analysis import Analysis
+from anasymod.probe import ProbeVCD
+from anasymod.utils.probe_data import ProbeData, stack_runs
+from anasymod.utils.run_registry import RunRegistry
+from unittests.vcd_utils import write_random_vcd, probe_target
+
+
+def write_result(path, text):
+    with open(path, 'w') as f:
+        f.write(text)
+    return str(path)
+
+
+def test_record_and_reload(tmp_path):
+    result = write_result(tmp_path / 'result.vcd', 'first')
+    registry = RunRegistry(root=str(tmp_path / 'runs'))
+    run = registry.record(target='sim', kind='simulate', result_path=result, params={'gain': 1.5})
+
+    # the result file is copied, so overwriting it does not change the stored run
+    write_result(result, 'second')
+    with open(run.result_path) as f:
+        assert f.read() == 'first'
+
+    # the index is read back by a new registry, e.g. in a later Python session
+    reloaded = RunRegistry(root=str(tmp_path / 'runs')).get(run.id)
+    assert reloaded.result_path == run.result_path
+    assert (reloaded.target, reloaded.kind, reloaded.params) == ('sim', 'simulate', {'gain': 1.5})
+
+
+def test_max_runs(tmp_path):
+    result = write_result(tmp_path / 'result.vcd', '')
+    registry = RunRegistry(root=str(tmp_path / 'runs'), max_runs=2)
+    runs = [registry.record(target='sim', kind='simulate', result_path=result, params={'k': k}) for k in range(4)]
+
+    # only the two latest runs are kept, the directories of older runs are deleted
+    assert [run.id for run in registry.runs()] == [3, 4]
+    assert not os.path.exists(os.path.dirname(runs[0].result_path))
+    assert not os.path.exists(os.path.dirname(runs[1].result_path))
+    assert os.path.isfile(runs[3].result_path)
+    assert [run.id for run in RunRegistry(root=str(tmp_path / 'runs')).runs()] == [3, 4]
+
+
+def test_ids_not_reused(tmp_path):
+    result = write_result(tmp_path / 'result.vcd', '')
+    registry = RunRegistry(root=str(tmp_path / 'runs'))
+    for _ in range(2):
+        registry.record(target='sim', kind='simulate', result_path=result)
+    registry.remove(2)
+    assert registry.record(target='sim', kind='simulate', result_path=result).id == 3
+
+    # the next id is stored in the index, also if the latest run was removed
+    registry.remove(3)
+    reloaded = RunRegistry(root=str(tmp_path / 'runs'))
+    assert reloaded.record(target='sim', kind='simulate', result_path=result).id == 4
+    with open(reloaded.index_path) as f:
+        assert yaml.safe_load(f)['next_id'] == 5
+
+
+def test_list_index(tmp_path):
+    # index files of earlier versions only list the runs
+    result = write_result(tmp_path / 'result.vcd', '')
+    registry = RunRegistry(root=str(tmp_path / 'runs'))
+    for _ in range(3):
+        registry.record(target='sim', kind='simulate', result_path=result)
+    with open(registry.index_path) as f:
+        entries = yaml.safe_load(f)['runs']
+    with open(registry.index_path, 'w') as f:
+        yaml.safe_dump(entries, f)
+    reloaded = RunRegistry(root=str(tmp_path / 'runs'))
+    assert [run.id for run in reloaded.runs()] == [1, 2, 3]
+    assert reloaded.record(target='sim', kind='simulate', result_path=result).id == 4
+
+
+def test_remove_run_discards_cache(tmp_path):
+    registry = RunRegistry(root=str(tmp_path / 'runs'))
+    for k in range(2):
+        registry.record(target='sim', kind='simulate', result_path=write_random_vcd(tmp_path / 'a.vcd', seed=k))
+    probe = ProbeVCD(probe_target(tmp_path / 'a.vcd'), runs=registry)
+    probe._data_valid = True
+    for run_num in (1, 2):
+        probe._probe('top.trace_port_gen_i.v_out', emu_time=True, run_num=run_num)
+
+    # stand-in for the Analysis object holding the registry, the probe cache and the target
+    analysis = SimpleNamespace(runs=registry, probe_cache=probe.cache,
+                               sim=SimpleNamespace(probes={'prb_icarus': probe}))
+    analysis._discard_run = lambda run: Analysis._discard_run(analysis, run)
+    Analysis.remove_run(analysis, 1)
+    assert probe.cache.runs('sim') == [2]
+    assert list(probe.vcd_handle) == ['sim_run2']
+    assert [run.id for run in registry.runs()] == [2]
+
+
+def test_stack_runs_resampled():
+    waves = {1: ProbeData(np.array([0, 10, 30]), np.array([1, 2, 3]), np.zeros(3, dtype=np.uint8)),
+             2: ProbeData(np.array([0, 20]), np.array([5, 6]), np.zeros(2, dtype=np.uint8))}
+    run_nums, time, value, xz = stack_runs(waves, dt=10)
+    assert run_nums == [1, 2]
+    np.testing.assert_array_equal(time, [[0, 10, 20, 30]] * 2)
+    np.testing.assert_array_equal(value, [[1, 2, 2, 3], [5, 5, 6, 6]])
+    assert xz.shape == (2, 4)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from anasymod.utils.probe_data import ProbeData, StepView
+
+
+def preserve_reference(wave):
+    """
+    Former loop-based Analysis.preserve: for each value change, a sample holding the previous value is inserted at the
+    time of the change.
+    """
+    time, value, xz = [], [], []
+    for k in range(wave.num_samples):
+        if k > 0 and (np.any(wave.value[k] != wave.value[k - 1]) or wave.xz[k] != wave.xz[k - 1]):
+            time.append(wave.time[k])
+            value.append(wave.value[k - 1])
+            xz.append(wave.xz[k - 1])
+        time.append(wave.time[k])
+        value.append(wave.value[k])
+        xz.append(wave.xz[k])
+    return time, value, xz
+
+
+@pytest.mark.parametrize('wide', [False, True])
+def test_materialize_matches_reference(wide):
+    rng = np.random.default_rng(1)
+    n = 500
+    value = rng.integers(0, 2, (n, 3)).astype(np.uint8) if wide else rng.random(n).round(1)
+    wave = ProbeData(np.cumsum(rng.integers(1, 4, n)), value, (rng.random(n) < 0.1).astype(np.uint8))
+
+    steps = StepView(wave)
+    materialized = steps.materialize()
+    time, value, xz = preserve_reference(wave)
+    assert len(steps) == materialized.num_samples == len(time)
+    np.testing.assert_array_equal(materialized.time, time)
+    np.testing.assert_array_equal(materialized.value, np.array(value))
+    np.testing.assert_array_equal(materialized.xz, xz)
+    assert materialized.value.dtype == wave.value.dtype
+
+
+def test_view_shares_samples():
+    wave = ProbeData(np.array([0, 10, 20]), np.array([1.0, 2.0, 2.0]))
+    steps = StepView(wave)
+    assert steps.time is wave.time and steps.value is wave.value
+    assert steps.changes.tolist() == [1]
+    assert StepView(np.array([[0, 10, 20], [1.0, 2.0, 2.0]])).changes.tolist() == [1]
+
+
+def test_value_at():
+    steps = StepView(ProbeData(np.array([0, 10, 20]), np.array([1.0, 2.0, 3.0])))
+    assert steps.value_at(np.array([0, 5, 10, 19, 20, 100])).tolist() == [1.0, 1.0, 2.0, 2.0, 3.0, 3.0]
+    assert steps.value_at(15) == 2.0
+    assert steps.index_at(-1) == -1
+    with pytest.raises(Exception):
+        steps.value_at(np.array([-1, 5]))
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from anasymod.sim_ctrl.async_ctrlapi import AsyncCtrlApi
+from anasymod.sim_ctrl.ctrlapi import CtrlApi
+
+
+class FakeCtrlApi(CtrlApi):
+    """
+    Control interface of a board without hardware: each write takes delay seconds and is logged together with the
+    thread it ran on.
+    """
+    def __init__(self, delay=0.0):
+        super().__init__(cwd=None, pcfg=None, scfg=None, prompt='', debug=False)
+        self.delay = delay
+        self.params = {}
+        self.log = []
+        self.converted = threading.Event()
+
+    def set_param(self, name, value, timeout=30):
+        self.set_params({name: value}, timeout=timeout)
+
+    def set_params(self, params, timeout=30):
+        if self._pending_params is not None:
+            self._pending_params.update(params)
+            return
+        time.sleep(self.delay)
+        self.params.update(params)
+        self.log.append((dict(params), threading.current_thread().name))
+
+    def get_param(self, name, timeout=30):
+        return self.params[name]
+
+    def convert_trace(self, result_path_raw, result_path):
+        # blocks until the test has seen a command of the board finish in the meantime
+        assert self.converted.wait(timeout=10)
+        return result_path
+
+    def __del__(self):
+        pass
+
+
+def test_boards_run_concurrently():
+    async def main():
+        ctrls = [AsyncCtrlApi(FakeCtrlApi(delay=0.2)) for _ in range(4)]
+        start = time.perf_counter()
+        await asyncio.gather(*(ctrl.set_param(name='a_in', value=k) for k, ctrl in enumerate(ctrls)))
+        elapsed = time.perf_counter() - start
+        for ctrl in ctrls:
+            ctrl.close()
+        return ctrls, elapsed
+
+    ctrls, elapsed = asyncio.run(main())
+    assert [ctrl.ctrl.params for ctrl in ctrls] == [{'a_in': k} for k in range(4)]
+    assert elapsed < 0.6
+
+
+def test_commands_of_board_in_order():
+    async def main():
+        async with AsyncCtrlApi(FakeCtrlApi(delay=0.001)) as ctrl:
+            await asyncio.gather(*(ctrl.set_param(name='a_in', value=k) for k in range(20)))
+            return ctrl.ctrl.log, await ctrl.get_param(name='a_in')
+
+    log, value = asyncio.run(main())
+    assert [params['a_in'] for params, _ in log] == list(range(20))
+    assert value == 19
+    # all commands of a board run on its own worker thread
+    assert {thread for _, thread in log} == {log[0][1]}
+    assert log[0][1].startswith('anasymod_ctrl')
+
+
+def test_transaction():
+    async def main():
+        async with AsyncCtrlApi(FakeCtrlApi()) as ctrl:
+            async with ctrl.transaction():
+                await ctrl.set_param(name='a_in', value=1.5)
+                await ctrl.set_param(name='mode_in', value=2)
+                assert ctrl.ctrl.log == []
+            with pytest.raises(ValueError):
+                async with ctrl.transaction():
+                    await ctrl.set_param(name='a_in', value=0)
+                    raise ValueError()
+            return ctrl.ctrl
+
+    ctrl = asyncio.run(main())
+    assert [params for params, _ in ctrl.log] == [{'a_in': 1.5, 'mode_in': 2}]
+    assert ctrl._pending_params is None
+
+
+def test_convert_does_not_block_commands():
+    async def main():
+        async with AsyncCtrlApi(FakeCtrlApi()) as ctrl:
+            convert = asyncio.ensure_future(ctrl.convert_trace(result_path_raw='raw.csv', result_path='out.vcd'))
+            await ctrl.set_param(name='a_in', value=1)
+            ctrl.ctrl.converted.set()
+            return await convert
+
+    assert asyncio.run(main()) == 'out.vcd'
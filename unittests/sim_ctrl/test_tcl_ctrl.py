@@ -0,0 +1,103 @@
+import shutil
+import socket
+import struct
+import subprocess
+import threading
+
+import pytest
+
+from anasymod.sim_ctrl.tcl_ctrl import TclCtrlClient, TclError, STATUS_OK, STATUS_TCL_ERROR
+from anasymod.templates.tcl_ctrl_server import TemplTCL_CTRL_SERVER
+
+
+def recv_exact(conn, size):
+    buf = b''
+    while len(buf) < size:
+        chunk = conn.recv(size - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+@pytest.fixture
+def server():
+    """
+    Local stand-in for the control server: replies with the upper-cased script, scripts starting with 'error' fail
+    and scripts starting with 'hang' are never answered.
+    """
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1)
+    requests = []
+
+    def serve():
+        conn, _ = sock.accept()
+        with conn:
+            while True:
+                header = recv_exact(conn, 4)
+                if header is None:
+                    return
+                script = recv_exact(conn, struct.unpack('>I', header)[0]).decode('utf-8')
+                requests.append(script)
+                if script.startswith('hang'):
+                    continue
+                status = STATUS_TCL_ERROR if script.startswith('error') else STATUS_OK
+                result = script.upper().encode('utf-8')
+                # split the response, so the client has to reassemble it
+                conn.sendall(struct.pack('>BI', status, len(result)))
+                conn.sendall(result)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield sock.getsockname()[1], requests
+    sock.close()
+
+
+def test_eval(server):
+    port, requests = server
+    client = TclCtrlClient(port=port)
+    assert client.eval('set a 1') == 'SET A 1'
+    assert client.eval('puts ä' + 'x' * 100000) == 'PUTS Ä' + 'X' * 100000
+    with pytest.raises(TclError) as err:
+        client.eval('error foo')
+    assert err.value.status == STATUS_TCL_ERROR
+    assert str(err.value) == 'ERROR FOO'
+    # the connection stays usable after an error reported by the server
+    assert client.eval('ok') == 'OK'
+    assert requests[0] == 'set a 1'
+    client.close()
+
+
+def test_timeout_closes_connection(server):
+    port, _ = server
+    client = TclCtrlClient(port=port)
+    with pytest.raises(Exception):
+        client.eval('hang', timeout=0.2)
+    assert client.sock is None
+    with pytest.raises(Exception):
+        client.eval('set a 1')
+
+
+@pytest.mark.skipif(shutil.which('tclsh') is None, reason='tclsh is not installed')
+def test_tcl_server(tmp_path):
+    script = tmp_path / 'server.tcl'
+    script.write_text(TemplTCL_CTRL_SERVER().render() +
+                      'puts [lindex [fconfigure $::anasymod_ctrl::server -sockname] 2]\n'
+                      'flush stdout\n'
+                      'vwait ::anasymod_ctrl::done\n')
+    proc = subprocess.Popen(['tclsh', str(script)], stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        client = TclCtrlClient(port=int(proc.stdout.readline()))
+        assert client.eval('set a 3; expr {$a * 2}') == '6'
+        assert client.eval('set a') == '3'
+        with pytest.raises(TclError) as err:
+            client.eval('no_such_command')
+        assert err.value.status == STATUS_TCL_ERROR
+        assert 'no_such_command' in str(err.value)
+        client.eval('set ::anasymod_ctrl::done 1')
+        client.close()
+        proc.wait(timeout=10)
+    finally:
+        proc.kill()
+        proc.stdout.close()
@@ -0,0 +1,237 @@
+import shutil
+import struct
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from anasymod.sim_ctrl.ctrlapi import CtrlApi
+from anasymod.sim_ctrl.uart_protocol import UARTFrameError, select_protocol, crc8, encode_request, decode_response, \
+    RESPONSE_HEADER_SIZE, OP_SET, OP_GET, OP_EXIT, MAX_BURST, SYNC_REQUEST, SYNC_RESPONSE, STATUS_OK, STATUS_CRC, \
+    STATUS_OPCODE, STATUS_ADDR, STATUS_COUNT
+from anasymod.sim_ctrl.uart_zynq_ctrlapi import UARTCtrlApi
+from anasymod.structures.uart_zynq_firmware_appcode import UartZynqFirmwareAppCode
+
+
+def response(status, seq, values=()):
+    body = bytes((status, seq, len(values))) + struct.pack(f'<{len(values)}I', *values)
+    return bytes((SYNC_RESPONSE,)) + body + bytes((crc8(body),))
+
+
+def split_responses(data):
+    frames = []
+    while data:
+        size = RESPONSE_HEADER_SIZE + 4 * data[3] + 1
+        frames.append(data[:size])
+        data = data[size:]
+    return frames
+
+
+def test_crc8():
+    # check value of CRC-8 with polynomial 0x07 and initial value 0
+    assert crc8(b'123456789') == 0xF4
+    assert crc8(b'56789', crc=crc8(b'1234')) == 0xF4
+
+
+def test_encode_request():
+    frame = encode_request(OP_SET, 258, [1, 7], [5, -1])
+    assert frame[:4] == bytes((SYNC_REQUEST, OP_SET, 2, 2))
+    assert frame[4:14] == struct.pack('<BIBI', 1, 5, 7, 0xFFFFFFFF)
+    assert frame[-1] == crc8(frame[1:-1])
+    assert encode_request(OP_GET, 0, [3, 4])[4:6] == bytes((3, 4))
+    with pytest.raises(UARTFrameError):
+        encode_request(OP_GET, 0, list(range(MAX_BURST + 1)))
+
+
+def test_decode_response():
+    assert decode_response(response(STATUS_OK, 5, [1, 0xFFFFFFFF]), seq=5) == [1, 0xFFFFFFFF]
+    assert decode_response(response(STATUS_OK, 0, []), seq=256) == []
+
+    corrupted = bytearray(response(STATUS_OK, 5, [1]))
+    corrupted[4] ^= 1
+    for frame, seq in [(bytes(corrupted), 5), (response(STATUS_OK, 5, [1]), 6), (response(STATUS_ADDR, 5), 5),
+                       (response(STATUS_OK, 5, [1])[:-2], 5), (b'\x00' * 6, 5)]:
+        with pytest.raises(UARTFrameError):
+            decode_response(frame, seq=seq)
+
+
+class FakeSerial():
+    """
+    Serial port answering each request with the responses given, None simulates a lost response.
+    """
+    def __init__(self, responses):
+        self.responses = responses
+        self.rx = b''
+        self.written = b''
+        self.timeout = 1.0
+        self.timeouts = []
+
+    def write(self, data):
+        self.written += data
+        for _ in range(data.count(SYNC_REQUEST)):
+            self.rx += self.responses.pop(0) or b''
+
+    def flush(self):
+        pass
+
+    def read(self, size):
+        self.timeouts.append(self.timeout)
+        data, self.rx = self.rx[:size], self.rx[size:]
+        return data
+
+    def reset_input_buffer(self):
+        self.rx = b''
+
+
+class FakeUARTCtrlApi(UARTCtrlApi):
+    def __init__(self, ctrl_handler):
+        CtrlApi.__init__(self, cwd=None, pcfg=None, scfg=None, prompt='', debug=False)
+        self.ctrl_handler = ctrl_handler
+        self.protocol = 'binary'
+        self.i_addrs = {'a_in': 0, 'b_in': 1}
+        self.o_addrs = {'a_out': 0, 'b_out': 1}
+        self._seq = 0
+
+    def __del__(self):
+        pass
+
+
+class QuietUARTCtrlApi(UARTCtrlApi):
+    def __del__(self):
+        pass
+
+
+class FakeLinePort():
+    """
+    Serial port of firmware speaking the ascii protocol, each command is answered with the line given.
+    """
+    def __init__(self, answer=b'0\n'):
+        self.answer = answer
+        self.written = b''
+
+    def write(self, data):
+        self.written += data
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        return self.answer
+
+
+def test_select_protocol():
+    assert select_protocol(None) == 'binary'
+    assert select_protocol(None, custom_firmware=True) == 'ascii'
+    assert select_protocol('binary', custom_firmware=True) == 'binary'
+    assert select_protocol('ascii') == 'ascii'
+    with pytest.raises(Exception):
+        select_protocol('json')
+
+
+@pytest.mark.parametrize('uart_protocol, custom_firmware, protocol', [(None, False, 'binary'), (None, True, 'ascii'),
+                                                                      ('binary', True, 'binary'),
+                                                                      ('ascii', False, 'ascii')])
+def test_ctrlapi_protocol(uart_protocol, custom_firmware, protocol):
+    pcfg = SimpleNamespace(cfg=SimpleNamespace(uart_protocol=uart_protocol), cfg_file=None,
+                           board=SimpleNamespace(uart_zynq_vid=0, uart_zynq_pid=0, uart_suffix=''))
+    scfg = SimpleNamespace(analog_ctrl_inputs=[SimpleNamespace(name='a_in', i_addr=0)], digital_ctrl_inputs=[],
+                           analog_ctrl_outputs=[], digital_ctrl_outputs=[])
+    ctrl = QuietUARTCtrlApi(result_path_raw=None, result_type_raw=None, result_path=None, prj_cfg=pcfg, scfg=scfg,
+                            content=None, project_root=None, ltxfile_path=None, top_module='top',
+                            custom_firmware=custom_firmware)
+    assert ctrl.protocol == protocol
+
+    # custom firmware, such as unittests/custom_firmware/main.c, is sent one text command per register
+    if protocol == 'ascii':
+        ctrl.ctrl_handler = FakeLinePort()
+        ctrl.set_param('a_in', 3)
+        assert ctrl.ctrl_handler.written == b'SET_a_in 3\n'
+
+
+def test_transact():
+    port = FakeSerial([response(STATUS_OK, 0), response(STATUS_OK, 1, [3, 4])])
+    ctrl = FakeUARTCtrlApi(port)
+    ctrl.set_params({'a_in': 1, 'b_in': 2})
+    assert port.written == encode_request(OP_SET, 0, [0, 1], [1, 2])
+    assert ctrl.get_params(['a_out', 'b_out']) == {'a_out': 3, 'b_out': 4}
+    # the remaining time of the timeout is applied to each read, the timeout of the port is restored afterwards
+    assert all(0 < timeout <= 30 for timeout in port.timeouts)
+    assert port.timeout == 1.0
+
+
+def test_transact_lost_response():
+    port = FakeSerial([None, response(STATUS_OK, 1)])
+    ctrl = FakeUARTCtrlApi(port)
+    with pytest.raises(UARTFrameError) as err:
+        ctrl.set_params({'a_in': 1}, timeout=0.5)
+    assert 'timed out' in str(err.value)
+    assert port.timeout == 1.0
+    ctrl.set_params({'a_in': 1})
+
+
+@pytest.fixture(scope='module')
+def firmware(tmp_path_factory):
+    """
+    Build the firmware generated for the binary protocol for the host, with stubs of the Xilinx functions that read
+    the UART from stdin and write it to stdout. Getters return the value of the setter with the same address.
+    """
+    if shutil.which('gcc') is None:
+        pytest.skip('gcc is not installed')
+    tmp_path = tmp_path_factory.mktemp('firmware')
+    scfg = SimpleNamespace(analog_ctrl_inputs=[SimpleNamespace(name='a_in', i_addr=0)],
+                           digital_ctrl_inputs=[SimpleNamespace(name='b_in', i_addr=1)],
+                           analog_ctrl_outputs=[SimpleNamespace(name='a_out', o_addr=0)],
+                           digital_ctrl_outputs=[SimpleNamespace(name='b_out', o_addr=1)])
+    (tmp_path / 'main.c').write_text(UartZynqFirmwareAppCode(scfg=scfg).src_text)
+    (tmp_path / 'xil_printf.h').write_text('#define xil_printf printf\n')
+    (tmp_path / 'gpio_funcs.h').write_text('''
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+typedef uint8_t u8;
+typedef uint32_t u32;
+#define XST_FAILURE 1
+static u32 regs[2];
+static int init_GPIO(void) { return 0; }
+static char inbyte(void) { int c = getchar(); if (c == EOF) exit(0); return (char)c; }
+static void outbyte(char c) { putchar(c); }
+static void set_a_in(u32 value) { regs[0] = value; }
+static void set_b_in(u32 value) { regs[1] = value; }
+static u32 get_a_out(void) { return regs[0]; }
+static u32 get_b_out(void) { return regs[1]; }
+''')
+    exe = tmp_path / 'firmware'
+    subprocess.run(['gcc', '-o', str(exe), str(tmp_path / 'main.c'), '-I', str(tmp_path)], check=True)
+    return str(exe)
+
+
+def run_firmware(firmware, data):
+    return split_responses(subprocess.run([firmware], input=data, stdout=subprocess.PIPE, check=True,
+                                          timeout=30).stdout)
+
+
+def test_firmware(firmware):
+    requests = [encode_request(OP_SET, 0, [0, 1], [7, 0xDEADBEEF]),
+                encode_request(OP_GET, 1, [1, 0, 1]),
+                encode_request(OP_SET, 2, [0, 5], [1, 2]),
+                encode_request(OP_GET, 3, [0]),
+                encode_request(0x7F, 4, [0])]
+    frames = run_firmware(firmware, b''.join(requests))
+    assert decode_response(frames[0], seq=0) == []
+    assert decode_response(frames[1], seq=1) == [0xDEADBEEF, 7, 0xDEADBEEF]
+    # no register is written if one of the addresses is unknown
+    assert frames[2] == response(STATUS_ADDR, 2)
+    assert decode_response(frames[3], seq=3) == [7]
+    assert frames[4] == response(STATUS_OPCODE, 4)
+
+
+def test_firmware_errors(firmware):
+    corrupted = bytearray(encode_request(OP_SET, 0, [0], [1]))
+    corrupted[-1] ^= 0xFF
+    # frames addressing too many registers are drained, so their entries are not taken as start of a request
+    body = bytes((OP_SET, 1, MAX_BURST + 1)) + struct.pack('<BI', 0, SYNC_REQUEST) * (MAX_BURST + 1)
+    oversized = bytes((SYNC_REQUEST,)) + body + bytes((crc8(body),))
+    frames = run_firmware(firmware, bytes(corrupted) + oversized + encode_request(OP_GET, 2, [0]) +
+                          encode_request(OP_EXIT, 3, []) + encode_request(OP_GET, 4, [0]))
+    assert frames == [response(STATUS_CRC, 0), response(STATUS_COUNT, 1), response(STATUS_OK, 2, [0]),
+                      response(STATUS_OK, 3)]
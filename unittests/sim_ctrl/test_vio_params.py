@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import pytest
+
+from anasymod.sim_ctrl.ctrlapi import CtrlApi
+from anasymod.sim_ctrl.datatypes import AnalogCtrlInput, AnalogCtrlOutput
+from anasymod.sim_ctrl.vio_ctrlapi import VIOCtrlApi
+
+
+class FakeVIOCtrlApi(VIOCtrlApi):
+    """
+    VIOCtrlApi that records the lines sent to the Vivado TCL interpreter instead of launching Vivado.
+    """
+    def __init__(self, response=''):
+        scfg = SimpleNamespace(reset_ctrl=SimpleNamespace(name='emu_rst'),
+                               emu_time_vio=SimpleNamespace(name='emu_time_vio'))
+        CtrlApi.__init__(self, cwd=None, pcfg=None, scfg=scfg, prompt='Vivado% ', debug=False)
+        self.analog_ctrl_inputs = {'a_in': AnalogCtrlInput(abspath='tb.a_in', name='a_in', width=16, exponent=-8)}
+        self.analog_ctrl_outputs = {'a_out': AnalogCtrlOutput(abspath='tb.a_out', name='a_out', width=16,
+                                                              exponent=-8)}
+        self.response = response
+        self.lines = []
+
+    def sendline(self, line, timeout=float('inf')):
+        self.lines.append(line)
+        return self.response
+
+    def __del__(self):
+        pass
+
+
+def test_set_params_single_round_trip():
+    ctrl = FakeVIOCtrlApi()
+    ctrl.set_params({'a_in': 1.5, 'mode_in': 2})
+    assert ctrl.lines == ['startgroup; set_property OUTPUT_VALUE 384 $a_in; set_property OUTPUT_VALUE 2 $mode_in; '
+                          'commit_hw_vio [list $a_in $mode_in]; endgroup']
+    ctrl.set_params({})
+    assert len(ctrl.lines) == 1
+
+
+def test_get_params():
+    ctrl = FakeVIOCtrlApi(response='list ...\n256 7')
+    assert ctrl.get_params(['a_out', 'mode_out']) == {'a_out': 1.0, 'mode_out': '7'}
+    assert ctrl.lines == ['refresh_hw_vio $vio_0_i; list [get_property INPUT_VALUE $a_out] '
+                          '[get_property INPUT_VALUE $mode_out]']
+    with pytest.raises(Exception):
+        ctrl.get_params(['a_out'])
+
+
+def test_get_emu_time_int():
+    ctrl = FakeVIOCtrlApi(response='12345')
+    assert ctrl.get_emu_time_int() == 12345
+    assert len(ctrl.lines) == 1
+
+
+def test_transaction():
+    ctrl = FakeVIOCtrlApi()
+    with ctrl.transaction():
+        ctrl.set_param(name='a_in', value=1.0)
+        ctrl.set_reset(1)
+        # nested transactions are merged into the outermost one
+        with ctrl.transaction():
+            ctrl.set_param(name='a_in', value=2.0)
+        assert ctrl.lines == []
+    assert ctrl.lines == ['startgroup; set_property OUTPUT_VALUE 512 $a_in; set_property OUTPUT_VALUE 1 $emu_rst; '
+                          'commit_hw_vio [list $a_in $emu_rst]; endgroup']
+
+
+def test_transaction_discarded_on_error():
+    ctrl = FakeVIOCtrlApi()
+    with pytest.raises(ValueError):
+        with ctrl.transaction():
+            ctrl.set_param(name='a_in', value=1.0)
+            raise ValueError()
+    assert ctrl.lines == []
+    # parameters are written directly again once the transaction is closed
+    ctrl.set_param(name='a_in', value=1.0)
+    assert len(ctrl.lines) == 1
@@ -0,0 +1,95 @@
+import shutil
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from anasymod.sim_ctrl import ctrlapi
+from anasymod.sim_ctrl.ctrlapi import CtrlApi, WAIT_POLL_MIN, WAIT_POLL_MAX
+from anasymod.sim_ctrl.vio_ctrlapi import VIOCtrlApi
+
+
+class FakeCtrlApi(CtrlApi):
+    """
+    Control interface whose emulation time advances by step with each poll.
+    """
+    def __init__(self, step):
+        super().__init__(cwd=None, pcfg=None, scfg=None, prompt='', debug=False)
+        self.step = step
+        self.t_emu = 0
+        self.polls = 0
+
+    def get_emu_time_int(self, timeout=30):
+        self.polls += 1
+        self.t_emu += self.step
+        return self.t_emu
+
+    def __del__(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ctrlapi.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_backoff(sleeps):
+    ctrl = FakeCtrlApi(step=1)
+    assert ctrl.wait_emu_time_int(12) == 12
+    assert ctrl.polls == 12
+    # the poll interval doubles from WAIT_POLL_MIN until it is capped at max_poll_interval
+    assert sleeps[:3] == [WAIT_POLL_MIN, 2 * WAIT_POLL_MIN, 4 * WAIT_POLL_MIN]
+    assert max(sleeps) == WAIT_POLL_MAX
+    assert sleeps[-1] == WAIT_POLL_MAX
+
+    sleeps.clear()
+    FakeCtrlApi(step=1).wait_emu_time_int(5, max_poll_interval=2 * WAIT_POLL_MIN)
+    assert sleeps == [WAIT_POLL_MIN] + 3 * [2 * WAIT_POLL_MIN]
+
+
+def test_reached_without_waiting(sleeps):
+    ctrl = FakeCtrlApi(step=100)
+    assert ctrl.wait_emu_time_int(50) == 100
+    assert sleeps == []
+
+
+def test_timeout():
+    ctrl = FakeCtrlApi(step=0)
+    with pytest.raises(Exception) as err:
+        ctrl.wait_emu_time_int(1, timeout=0.05, max_poll_interval=0.01)
+    assert 'did not reach time 1' in str(err.value)
+    assert ctrl.polls > 1
+
+
+class TclshVIOCtrlApi(VIOCtrlApi):
+    """
+    VIOCtrlApi that evaluates its commands in tclsh, with stubs of the Vivado commands for a VIO whose emulation time
+    advances by 10 with each refresh.
+    """
+    STUBS = ('set vio_0_i vio; set emu_time_vio probe; set ::refreshes 0; '
+             'proc refresh_hw_vio {vio} { incr ::refreshes }; '
+             'proc get_property {prop obj} { expr {10 * $::refreshes} }; ')
+
+    def __init__(self):
+        scfg = SimpleNamespace(emu_time_vio=SimpleNamespace(name='emu_time_vio'))
+        CtrlApi.__init__(self, cwd=None, pcfg=None, scfg=scfg, prompt='', debug=False)
+
+    def sendline(self, line, timeout=float('inf')):
+        # unlike the interactive interpreter, tclsh does not print the result of a script
+        script = self.STUBS + line + '\nputs $_t\n'
+        return subprocess.run(['tclsh'], input=script, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+                              timeout=30).stdout
+
+    def __del__(self):
+        pass
+
+
+@pytest.mark.skipif(shutil.which('tclsh') is None, reason='tclsh is not installed')
+def test_vio_wait_in_tcl():
+    ctrl = TclshVIOCtrlApi()
+    assert ctrl.wait_emu_time_int(45) == 50
+    with pytest.raises(Exception) as err:
+        ctrl.wait_emu_time_int(10 ** 9, timeout=0.2)
+    assert 'did not reach time' in str(err.value)
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.vcd_cache import VCDCache, HASH_BLOCK_SIZE, HASH_SAMPLES
+from unittests.vcd_utils import random_vcd_text, write_random_vcd, columns_to_tuples
+
+V_OUT = 'top.trace_port_gen_i.v_out'
+CLK = 'top.trace_port_gen_i.clk'
+
+
+def probe(path, sig, cache=True):
+    signal = ParseVCD(path, cache=cache).parse_columnar(sigs=[sig]).signal(sig)
+    return columns_to_tuples(signal.time, signal.value, signal.xz)
+
+
+def rewrite_keeping_stat(path, text):
+    """
+    Rewrite a file with text of the same size and restore its modification time, as happens when a simulation is
+    rerun within the resolution of the file system's modification time.
+    """
+    stat = os.stat(path)
+    assert len(text.encode()) == stat.st_size
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_cached_signals_are_loaded(tmp_path):
+    path = write_random_vcd(tmp_path / 'a.vcd')
+    expected = probe(path, V_OUT, cache=False)
+    assert probe(path, V_OUT) == expected
+
+    # the cache is filled incrementally and memory-mapped by later sessions
+    cache = VCDCache(path)
+    assert cache.valid()
+    assert len(cache.cached_codes()) == 1
+    probe(path, CLK)
+    assert len(VCDCache(path).cached_codes()) == 2
+
+    data = ParseVCD(path, cache=True).parse_columnar(sigs=[V_OUT])
+    assert isinstance(data.signal(V_OUT).value, np.memmap)
+    assert columns_to_tuples(*(getattr(data.signal(V_OUT), col) for col in ('time', 'value', 'xz'))) == expected
+
+
+def test_invalidated_by_new_results(tmp_path):
+    path = write_random_vcd(tmp_path / 'a.vcd', seed=0)
+    probe(path, V_OUT)
+    write_random_vcd(path, seed=1)
+    assert probe(path, V_OUT) == probe(path, V_OUT, cache=False)
+
+
+def test_invalidated_by_same_size_rewrite(tmp_path):
+    path = write_random_vcd(tmp_path / 'a.vcd')
+    before = probe(path, V_OUT)
+
+    # change the last bit of a value of v_out in the middle of the file
+    text = random_vcd_text()
+    pos = text.index(' "\n', len(text) // 2) - 1
+    text = text[:pos] + ('1' if text[pos] == '0' else '0') + text[pos + 1:]
+    rewrite_keeping_stat(path, text)
+
+    after = probe(path, V_OUT)
+    assert after != before
+    assert after == probe(path, V_OUT, cache=False)
+
+
+def test_sampled_hash_of_large_files(tmp_path):
+    path = str(tmp_path / 'a.vcd')
+    size = 2 * HASH_SAMPLES * HASH_BLOCK_SIZE
+    with open(path, 'wb') as f:
+        f.write(b'0' * size)
+    key = VCDCache(path).key()
+
+    # a block in the middle of the file is part of the hash
+    pos = (HASH_SAMPLES // 2) * (size - HASH_BLOCK_SIZE) // (HASH_SAMPLES - 1) + 10
+    with open(path, 'r+b') as f:
+        f.seek(pos)
+        f.write(b'1')
+    assert VCDCache(path).key()['hash'] != key['hash']
@@ -0,0 +1,72 @@
+import numpy as np
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.vcd_columnar import decode_binary, decode_scalar, XZ_X, XZ_Z
+from unittests.vcd_utils import SIGNALS, random_vcd_text, write_random_vcd, parse_reference, columns_to_tuples
+
+
+def check_against_reference(data, text):
+    reference = parse_reference(text)
+    for name, code, _, _ in SIGNALS:
+        signal = data.signals[code]
+        assert signal.name == name
+        assert columns_to_tuples(signal.time, signal.value, signal.xz) == reference[code], name
+
+
+def test_columnar_matches_reference(tmp_path):
+    path = write_random_vcd(tmp_path / 'a.vcd', n=3000)
+    check_against_reference(ParseVCD(path).parse_columnar(), random_vcd_text(n=3000))
+
+
+def test_block_boundaries(tmp_path):
+    # lines split across blocks are completed by the next block
+    path = write_random_vcd(tmp_path / 'a.vcd', n=500, seed=1)
+    check_against_reference(ParseVCD(path).parse_columnar(block_size=37), random_vcd_text(n=500, seed=1))
+
+
+def test_token_fallback(tmp_path):
+    # several value changes per line and tabs are not decoded line by line, but by the token based decoder
+    text = random_vcd_text(n=500, seed=2)
+    header, body = text.split('$enddefinitions $end', 1)
+    body = body.replace('\n#', '\n\t#').replace('\n', ' ').replace(' \t#', '\n#')
+    path = tmp_path / 'a.vcd'
+    path.write_text(header + '$enddefinitions $end' + body + '\n')
+    check_against_reference(ParseVCD(str(path)).parse_columnar(), text)
+
+
+def test_selected_signals(tmp_path):
+    path = write_random_vcd(tmp_path / 'a.vcd', n=500)
+    data = ParseVCD(path).parse_columnar(sigs=['top.trace_port_gen_i.v_out'])
+    assert list(data.signals) == ['"']
+    reference = parse_reference(random_vcd_text(n=500))
+    signal = data.signals['"']
+    assert columns_to_tuples(signal.time, signal.value, signal.xz) == reference['"']
+
+
+def test_parse_vcd_legacy_format(tmp_path):
+    path = tmp_path / 'a.vcd'
+    path.write_text('$timescale 1fs $end\n$scope module top $end\n$var wire 1 ! clk $end\n'
+                    '$var reg 4 " cnt [3:0] $end\n$var real 1 # r $end\n$upscope $end\n$enddefinitions $end\n'
+                    '#0\n$dumpvars\n0!\nb0 "\nr0 #\n$end\n#5\n1!\nb101 "\n#10\nx!\nr1.5 #\n#20\n')
+    legacy = ParseVCD(str(path)).parse_vcd()
+    assert legacy['!']['nets'] == [{'type': 'wire', 'name': 'clk', 'size': '1', 'hier': 'top'}]
+    # as before, every signal is held until the last timestamp
+    assert legacy['!']['cv'] == [(0, '0'), (5, '1'), (10, 'x'), (20, 'x')]
+    assert legacy['"']['cv'] == [(0, '0'), (5, '101'), (20, '101')]
+    assert legacy['#']['cv'] == [(0, 0.0), (10, 1.5), (20, 1.5)]
+
+
+def test_decode_binary():
+    value, xz = decode_binary([b'0', b'101', b'1x1', b'z', b'1' * 64], width=64)
+    assert value.tolist() == [0, 5, 5, 0, 2 ** 64 - 1]
+    assert xz.tolist() == [0, 0, XZ_X, XZ_Z, 0]
+
+    value, xz = decode_binary([b'1' + b'0' * 70], width=72)
+    assert int.from_bytes(value[0].tobytes(), 'big') == 2 ** 70
+
+
+def test_decode_scalar():
+    value, xz = decode_scalar(b'01xZ')
+    assert value.tolist() == [0, 1, 0, 0]
+    assert xz.tolist() == [0, 0, XZ_X, XZ_Z]
+    assert value.dtype == np.uint64
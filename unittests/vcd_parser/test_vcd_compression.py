@@ -0,0 +1,57 @@
+import gzip
+import lzma
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.compression import open_file, compression_of
+from unittests.vcd_utils import SIGNALS, random_vcd_text, write_random_vcd, columns_to_tuples
+
+
+def write_compressed(path, text):
+    with open_file(str(path), 'w') as f:
+        f.write(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('ext', ['.gz', '.xz', '.zst'])
+def test_compressed_matches_plain(tmp_path, ext):
+    if ext == '.zst':
+        pytest.importorskip('zstandard')
+    text = random_vcd_text(n=3000)
+    expected = ParseVCD(write_random_vcd(tmp_path / 'a.vcd', n=3000)).parse_columnar()
+    path = write_compressed(tmp_path / f'a.vcd{ext}', text)
+
+    # compressed files are always decoded in a single process
+    data = ParseVCD(path, processes=4).parse_columnar()
+    for _, code, _, _ in SIGNALS:
+        assert columns_to_tuples(*data.columns(code)) == columns_to_tuples(*expected.columns(code)), code
+
+    # windowed access seeks within the decompressed stream
+    window = ParseVCD(path).parse_window(t_start=2000, t_stop=3000)
+    expected_window = expected.window(2000, 3000)
+    for _, code, _, _ in SIGNALS:
+        assert columns_to_tuples(*window.columns(code)) == columns_to_tuples(*expected_window.columns(code)), code
+
+
+def test_stdlib_formats(tmp_path):
+    # files written by open_file can be read by the standard library and vice versa
+    text = random_vcd_text(n=100)
+    write_compressed(tmp_path / 'a.vcd.gz', text)
+    assert gzip.open(tmp_path / 'a.vcd.gz', 'rt').read() == text
+    with lzma.open(tmp_path / 'b.vcd.xz', 'wt') as f:
+        f.write(text)
+    with open_file(str(tmp_path / 'b.vcd.xz'), 'r') as f:
+        assert f.read() == text
+
+
+def test_compression_of():
+    assert compression_of('a.vcd') is None
+    assert compression_of('a.vcd.gz') == '.gz'
+    assert compression_of('a.VCD.XZ') == '.xz'
+    assert compression_of('a.vcd.zst') == '.zst'
+
+
+def test_follow_rejects_compressed(tmp_path):
+    path = write_compressed(tmp_path / 'a.vcd.gz', random_vcd_text(n=10))
+    with pytest.raises(Exception):
+        next(ParseVCD(path).follow())
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from anasymod.utils.VCD_parser import ParseVCD
+from unittests.vcd_utils import SIGNALS, random_vcd_text, columns_to_tuples
+
+
+def append_in_pieces(path, text, pieces, delay):
+    """
+    Write text to path in pieces, splitting it within lines, as a running simulation would do.
+    """
+    step = len(text) // pieces + 1
+    for k in range(0, len(text), step):
+        with open(path, 'a') as f:
+            f.write(text[k:k + step])
+        time.sleep(delay)
+
+
+def test_follow_growing_file(tmp_path):
+    path = str(tmp_path / 'a.vcd')
+    text = random_vcd_text(n=3000)
+    writer = threading.Thread(target=append_in_pieces, args=(path, text, 20, 0.02))
+    writer.start()
+    try:
+        chunks = list(ParseVCD(path).follow(poll_interval=0.005, idle_timeout=0.5, block_size=4096))
+    finally:
+        writer.join()
+
+    assert len(chunks) > 1
+    expected = ParseVCD(path).parse_columnar()
+    for _, code, _, _ in SIGNALS:
+        changes = []
+        for chunk in chunks:
+            signal = chunk.signals[code]
+            changes += columns_to_tuples(signal.time, signal.value, signal.xz)
+        signal = expected.signals[code]
+        assert changes == columns_to_tuples(signal.time, signal.value, signal.xz), code
+
+    # value changes of a timestamp are only released once the timestamp is complete
+    for prev, chunk in zip(chunks[:-1], chunks[1:]):
+        times = chunk.timestamps.view()
+        if len(times) and len(prev.timestamps):
+            assert times[0] > prev.timestamps.view()[-1]
+
+
+def test_follow_idle_without_file(tmp_path):
+    start = time.time()
+    assert list(ParseVCD(str(tmp_path / 'missing.vcd')).follow(poll_interval=0.01, idle_timeout=0.1)) == []
+    assert time.time() - start < 5
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from anasymod.utils.VCD_parser import ParseVCD
+from anasymod.utils.vcd_index import VCDIndex
+from unittests.vcd_utils import SIGNALS, write_random_vcd, columns_to_tuples
+
+
+@pytest.fixture
+def vcd_path(tmp_path):
+    return write_random_vcd(tmp_path / 'a.vcd', n=3000)
+
+
+@pytest.mark.parametrize('t_start, t_stop', [(0, 100), (1500, 1600), (4321, 4321), (5000, None), (None, 50)])
+@pytest.mark.parametrize('cache', [False, True])
+def test_window_matches_full_parse(vcd_path, t_start, t_stop, cache):
+    full = ParseVCD(vcd_path).parse_columnar()
+
+    parser = ParseVCD(vcd_path, cache=cache)
+    # a small interval places many checkpoints within the file
+    index = parser.build_index(interval=1024)
+    assert len(index) > 10
+    window = parser.parse_window(t_start=t_start, t_stop=t_stop)
+
+    expected = full.window(0 if t_start is None else t_start, t_stop)
+    for _, code, _, _ in SIGNALS:
+        assert columns_to_tuples(*window.columns(code)) == columns_to_tuples(*expected.columns(code)), code
+
+
+def test_index_checkpoints(vcd_path):
+    parser = ParseVCD(vcd_path)
+    index = parser.build_index(interval=4096)
+    full = parser.parse_columnar()
+
+    # each checkpoint points to a timestamp marker and holds the values right before it
+    with open(vcd_path, 'rb') as f:
+        content = f.read()
+    for k in range(1, len(index)):
+        marker = f'#{index.time[k]}\n'.encode()
+        assert content[index.offset[k]:index.offset[k] + len(marker)] == marker
+        for code, (value, xz) in index.snapshot(k).items():
+            signal = full.signals[code]
+            last = np.searchsorted(signal.time, index.time[k], side='left') - 1
+            np.testing.assert_array_equal(value, signal.value[last])
+            assert xz == signal.xz[last]
+
+
+def test_save_and_load(vcd_path, tmp_path):
+    index = ParseVCD(vcd_path).build_index(interval=4096)
+    index.save(str(tmp_path / 'index.npz'))
+    loaded = VCDIndex.load(str(tmp_path / 'index.npz'))
+    np.testing.assert_array_equal(loaded.time, index.time)
+    np.testing.assert_array_equal(loaded.offset, index.offset)
+    for k in range(len(index)):
+        assert loaded.snapshot(k).keys() == index.snapshot(k).keys()
+
+
+def write_sparse_vcd(tmp_path):
+    """
+    VCD file with an additional signal that only changes once, in the middle of the file.
+    """
+    text = open(write_random_vcd(tmp_path / 'a.vcd', n=3000)).read()
+    head, body = text.split('$enddefinitions $end\n')
+    head = head.replace('$upscope $end\n$upscope $end\n', '$var wire 1 & sparse $end\n$upscope $end\n$upscope $end\n')
+    pos = body.index('\n#', len(body) // 2) + 1
+    body = body[:pos] + body[pos:].replace('\n', '\n1&\n', 1)
+    path = tmp_path / 'sparse.vcd'
+    path.write_text(head + '$enddefinitions $end\n' + body)
+    return str(path)
+
+
+@pytest.mark.parametrize('t_start, t_stop', [(0, 100), (1500, 1600), (4321, 4321), (5000, None), (None, 50),
+                                             (8000, 8100)])
+@pytest.mark.parametrize('cache', [False, True])
+def test_span_matches_full_parse(tmp_path, t_start, t_stop, cache):
+    path = write_sparse_vcd(tmp_path)
+    full = ParseVCD(path).parse_columnar()
+
+    parser = ParseVCD(path, cache=cache)
+    if cache:
+        parser.parse_columnar()
+    parser.build_index(interval=1024)
+    span = parser.parse_span(t_start=t_start, t_stop=t_stop)
+
+    # the span holds the same value changes as the full parse, the sparse signal is found by widening the range
+    expected = full.span(0 if t_start is None else t_start, t_stop)
+    assert len(span.signals['&']) == 1
+    for code in expected.signals:
+        assert columns_to_tuples(*span.columns(code)) == columns_to_tuples(*expected.columns(code)), code
@@ -0,0 +1,51 @@
+import pytest
+
+import anasymod.utils.VCD_parser as VCD_parser
+from anasymod.utils.VCD_parser import ParseVCD
+from unittests.vcd_utils import SIGNALS, write_random_vcd, columns_to_tuples
+
+
+@pytest.fixture
+def vcd_path(tmp_path, monkeypatch):
+    # small ranges, so that the test file is split into several parts
+    monkeypatch.setattr(VCD_parser, 'MIN_RANGE_SIZE', 4096)
+    return write_random_vcd(tmp_path / 'a.vcd', n=5000)
+
+
+def test_ranges_start_at_timestamps(vcd_path):
+    parser = ParseVCD(vcd_path)
+    _, offset = parser.parse_header()
+    ranges = parser._split_body(offset, 4)
+    assert len(ranges) == 4
+    assert ranges[0][0] == offset
+
+    with open(vcd_path, 'rb') as f:
+        content = f.read()
+    for (_, stop), (start, _) in zip(ranges[:-1], ranges[1:]):
+        assert stop == start
+        assert content[start - 1:start + 1] == b'\n#'
+    assert ranges[-1][1] == len(content)
+
+
+@pytest.mark.parametrize('processes', [2, 3, 8])
+def test_parallel_matches_sequential(vcd_path, processes):
+    expected = ParseVCD(vcd_path).parse_columnar()
+    data = ParseVCD(vcd_path, processes=processes).parse_columnar()
+
+    assert data.timestamps.view().tolist() == expected.timestamps.view().tolist()
+    for _, code, _, _ in SIGNALS:
+        assert columns_to_tuples(*data.columns(code)) == columns_to_tuples(*expected.columns(code)), code
+
+
+def test_boundary_in_comment(tmp_path, monkeypatch):
+    # a $comment section spanning a range boundary falls back to sequential decoding
+    monkeypatch.setattr(VCD_parser, 'MIN_RANGE_SIZE', 4096)
+    path = tmp_path / 'comment.vcd'
+    text = open(write_random_vcd(tmp_path / 'a.vcd', n=1000)).read()
+    pos = text.index('\n#', len(text) // 2) + 1
+    path.write_text(text[:pos] + '$comment\n' + '#1 \n' * 3000 + '$end\n' + text[pos:])
+
+    expected = ParseVCD(str(path)).parse_columnar()
+    data = ParseVCD(str(path), processes=4).parse_columnar()
+    for _, code, _, _ in SIGNALS:
+        assert columns_to_tuples(*data.columns(code)) == columns_to_tuples(*expected.columns(code)), code
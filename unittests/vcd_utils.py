@@ -0,0 +1,119 @@
+import random
+import numpy as np
+from types import SimpleNamespace
+
+# signals written by write_random_vcd: full hierarchical name, identifier code, VCD type and width
+SIGNALS = [
+    ('top.trace_port_gen_i.emu_time', '!', 'reg', 64),
+    ('top.trace_port_gen_i.v_out', '"', 'reg', 16),
+    ('top.trace_port_gen_i.clk', '#', 'wire', 1),
+    ('top.trace_port_gen_i.r_sig', '$', 'real', 1),
+    ('top.trace_port_gen_i.wide', '%', 'reg', 80),
+]
+
+# time probe of the generated VCD files, its value is the cycle count times DT
+TIME_PROBE = 'top.trace_port_gen_i.emu_time'
+DT = 1000
+
+
+def random_vcd_text(n=2000, seed=0, t_offset=0):
+    """
+    Create the text of a VCD file with random value changes of the signals in SIGNALS, including X/Z states, real
+    values and a vector wider than 64 bits.
+
+    :param n: number of timestamps
+    :param seed: seed of the random generator
+    :param t_offset: timestamp of the first value changes after $dumpvars
+    :rtype: str
+    """
+    rng = random.Random(seed)
+    lines = ['$date today $end', '$timescale 1fs $end', '$scope module top $end',
+             '$scope module trace_port_gen_i $end']
+    for name, code, var_type, width in SIGNALS:
+        lines.append(f'$var {var_type} {width} {code} {name.split(".")[-1]} $end')
+    lines += ['$upscope $end', '$upscope $end', '$enddefinitions $end',
+              '#0', '$dumpvars', 'b0 !', 'bx "', '0#', 'r0 $', 'b0 %', '$end']
+
+    t = t_offset
+    for _ in range(n):
+        t += rng.randint(1, 5)
+        lines.append(f'#{t}')
+        if rng.random() < 0.7:
+            lines.append(f'b{t * DT:b} !')
+        if rng.random() < 0.5:
+            value = rng.randint(-30000, 30000) & 0xFFFF
+            lines.append(f'b{value:b} "' if rng.random() < 0.9 else 'b1x01 "')
+        if rng.random() < 0.5:
+            lines.append(rng.choice(['0#', '1#', 'x#', 'z#']))
+        if rng.random() < 0.3:
+            lines.append(f'r{rng.random():.6g} $')
+        if rng.random() < 0.2:
+            lines.append(f'b{rng.getrandbits(80):b} %')
+    lines.append(f'#{t + 10}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_random_vcd(path, **kwargs):
+    """
+    Write a VCD file created by random_vcd_text.
+
+    :return: path of the VCD file
+    """
+    with open(path, 'w') as f:
+        f.write(random_vcd_text(**kwargs))
+    return str(path)
+
+
+def parse_reference(text):
+    """
+    Straightforward line by line decoding of a VCD body, used as reference for the columnar parser.
+
+    :param text: VCD text as written by random_vcd_text
+    :return: dict mapping identifier codes to lists of (time, value, xz) tuples, with value as int or float and xz
+        being 0, 1 for X or 2 for Z
+    """
+    changes = {code: [] for _, code, _, _ in SIGNALS}
+    body = text.split('$enddefinitions $end', 1)[1]
+    t = 0
+    for line in body.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('$'):
+            continue
+        if line.startswith('#'):
+            t = int(line[1:])
+        elif line[0] in 'bBrR':
+            value, code = line[1:].split()
+            if line[0] in 'rR':
+                changes[code].append((t, float(value), 0))
+            else:
+                xz = 1 if 'x' in value.lower() else 2 if 'z' in value.lower() else 0
+                bits = ''.join('1' if c == '1' else '0' for c in value)
+                changes[code].append((t, int(bits, 2), xz))
+        else:
+            xz = {'x': 1, 'z': 2}.get(line[0].lower(), 0)
+            changes[line[1:]].append((t, 1 if line[0] == '1' else 0, xz))
+    return changes
+
+
+def columns_to_tuples(time, value, xz):
+    """
+    Convert columnar value changes to a list of (time, value, xz) tuples as returned by parse_reference, packed
+    values of vectors wider than 64 bits are converted to ints.
+    """
+    if value.ndim > 1:
+        value = [int.from_bytes(row.tobytes(), 'big') for row in value]
+    else:
+        value = np.asarray(value).tolist()
+    return list(zip(np.asarray(time).tolist(), value, np.asarray(xz).tolist()))
+
+
+def probe_target(vcd_path, name='sim', vcd_cache=False, vcd_processes=1, probe_cache_size=1024 * 1024 * 1024):
+    """
+    Minimal stand-in for a target object, providing the attributes that ProbeVCD accesses to read a VCD file written
+    by write_random_vcd.
+    """
+    cfg = SimpleNamespace(vcd_cache=vcd_cache, vcd_processes=vcd_processes, dt_scale=1e-12,
+                          probe_cache_size=probe_cache_size)
+    return SimpleNamespace(cfg=SimpleNamespace(vcd_path=str(vcd_path)), prj_cfg=SimpleNamespace(cfg=cfg),
+                           str_cfg=SimpleNamespace(time_probe=SimpleNamespace(name='emu_time')), _name=name,
+                           result_path_raw=str(vcd_path))